@@ -25,11 +25,25 @@ from tkinter import filedialog
 from tkinter.colorchooser import askcolor
 from tkfilebrowser import askopendirname, askopenfilename, asksaveasfilename
 from onedialog import *
+from virtualtree import VirtualTree
+from nodetypes import TypeRegistry, payload_size
+from timeslice import SliceQueue
+from selection import Selection
+from changeset import ChangeSet, INSERT, UPDATE, MOVE, DELETE, REPLACE
+from Pystore import SqliteRoot, RootJournal, atomic_open, write_root, iter_root, batch_root
+from Pystore import write_proot, MmapNodes, BlobStore, FileIngest, ChildIndex, RootLoader
+from Pystore import ThumbLoader, ThumbCache, Node, PathIndex, RefIndex, ref_target
+from Pystore import keys_between, RefResolver, RefCycleError, node_item, rekey_node
 
 import time
 import json
+import base64
 import uuid
+import shlex
+import shutil
 import platform
+import tempfile
+import subprocess
 from dotmap import DotMap
 from copy import deepcopy
 
@@ -83,6 +97,7 @@ class B:
     _T_ROWTYPE = "rowtype" # Dict key name of a rowtype value
     _T_PARENT = "parent" # Dict key name of a parent value
     _T_POS = "position" # Dict key name of a position value
+    _T_ORDER = "order" # Dict key name of an order key (sibling order)
     _T_TAGS = "tags" # Dict key name of a tags value
     _T_NAME = "text" # Dict key name of main tree items (column #0)
     _T_UID = "uid" # Dict key name of a uid value
@@ -101,7 +116,25 @@ class B:
     TREEROOT = None # Uses R_DIR, R_FILE, R_TYPE loaded from S_PREFS
     R_PREFS = None # Loaded from TREEROOT using P_KEY from S_PREFS
     R_NODES = None # Loaded from TREEROOT using N_KEY from R_PREFS
+    R_STORE = None # SqliteRoot when the root type is 'sqlite3'
+    R_JOURNAL = None # RootJournal of changes when the root type is 'json'
+    R_BLOBS = None # BlobStore of file, image and bytes node payloads
+    R_INGEST = None # FileIngest of the file import that is running
+    R_THUMBS = None # ThumbLoader that makes image rows' thumbnails
+    children = None # ChildIndex (parent uid: [child uids]) of the open root
+    paths = None # PathIndex ('root/Files/myName': uid) of the open root
+    refs = None # RefIndex (uid: uids whose 'ref' points at it) of the open root
+    resolver = None # RefResolver (uid: value its 'ref' resolves to) of the open root
+    PLACEHOLDER_PREFIX = '~placeholder~' # iid prefix of unopened tables' dummy row
     R_THEMES = None
+    R_TYPES = None # TypeRegistry built from the root's prefs and _type_map
+    WAIT_GIF = os.path.join(os.path.dirname(os.path.abspath(__file__)), 
+                            'Pyview', 'resources', 'animations', 'wait.gif')
+    WAIT_FRAME_DELAY = 100 # Millisecs between wait animation frames
+    SHIFT_MASK = 0x0001 # The Shift key's bit of an event's state
+    ICON_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 
+                            'Pyview', 'resources')
+    ORDER_KEY_LENGTH = 12 # Order keys longer than this get their table rebalanced
     
     # Mutable prefs store (P_) semi constants. Uses startup's 'prefsKey' value
     P_KEY = "prefs"
@@ -112,6 +145,7 @@ class B:
     # define required system flags
     flDirtyRoot = False # used to notify if root data has changed
     flDirtyPrefs = False # used to notify if Prefs data has changed
+    flPartialRoot = False # True if loading the root was cancelled or failed
     flStartingUp = False # used to notify if app is still starting up
     flShutdownNow = False # if True notify the app to start the shutdown process
     flShuttingDown = False # used to notify if app is shutting down up
@@ -241,7 +275,7 @@ class B:
         'pl': ['script', 'utf-8'],
         'png': ['image', 'bytes'],
         'proj': ['file', 'utf-8'],
-        'proot': ['file', 'utf-8'],
+        'proot': ['file', 'bytes'],
         'ps1': ['script', 'utf-8'],
         'ps1xml': ['file', 'utf-8'],
         'psd1': ['file', 'utf-8'],
@@ -266,21 +300,21 @@ class B:
         'yaml': ['file', 'utf-8']
         }
     
-    _row_types = ["Root", "Table", "Dir", "file", "text", "var", 
-                "image", "bytes", "script", "code", "none"]
-                    
-    _table_types = ['Table', 'Root', 'Dir']
-    
-    _file_types = ['file', 'script']
-    
-    _var_types = ['var', 'str', 'bool', 'int', 'float', 'dict', 'list', 'tuple', 
-                'bytes', 'bytearray', 'complex', 'frozenset', 'set', 'range', 'None']
-                    
-    _special_var_types = ['text', 'script', 'code', 'address', 'filespec', 'path', 'image', 'none']
-    
-    _script_types = ['script']
-
-    _code_types = ['code']
+    # Built-in row types: rowtype: (icon, under ICON_DIR, name of the Window 
+    # method that opens its nodes). TypeRegistry is built from these
+    _node_types = {
+        'Root': ('tango_icons/computer.png', 'open_table_node'),
+        'Table': ('tango_icons/folder.png', 'open_table_node'),
+        'Dir': ('tango_icons/folder.png', 'open_table_node'),
+        'file': ('tango_icons/file.png', 'open_file_node'),
+        'text': ('tango_icons/text-x-generic.png', 'show_node_value'),
+        'var': ('various/node_variable.png', 'show_node_value'),
+        'image': ('tango_icons/file.png', 'open_file_node'),
+        'bytes': ('various/node_const.png', 'open_file_node'),
+        'script': ('tango_icons/utilities-terminal.png', 'open_file_node'),
+        'code': ('various/node_function.png', 'show_node_value'),
+        'none': ('various/node_unknown.png', None)
+        }
 
 
 class Window(tk.Toplevel, B):
@@ -343,9 +377,10 @@ class Window(tk.Toplevel, B):
         self.init_treeview()
         self.apply_tree_columns()
         self.create_tags()
-        self.build_treeview()
         self.control_scrollbars()
+        self.build_treeview()
         self.create_bindings()
+        self.schedule_journal_compact()
 
     def do_startup(self):
         print('{}: {}({})'.format(self.__class__.__name__, 
@@ -362,9 +397,20 @@ class Window(tk.Toplevel, B):
 
         # Init default node prefs dict (B.prefs) with default values
         self.init_node_prefs()
+
+        # Node payloads are kept once each, by content hash, in the data dir
+        # and compressed or not by the type map encoding of their type
+        B.R_BLOBS = BlobStore(B.PREFS['dataDirName'], policy=B.PREFS['blobCompression'])
         
-        # Open last used root and load nodes and prefs over default node and prefs
-        self.get_root(B.R_PATH, B.R_TYPE, B.P_KEY, B.N_KEY)
+        # Image rows' thumbnails are made on worker threads, and kept on 
+        # disk by content hash, so each image is only shrunk once
+        B.R_THUMBS = ThumbLoader(B.R_BLOBS, 
+                                 os.path.join(B.PREFS['dataDirName'], 'thumbs'), 
+                                 size=B.PREFS['thumbSize'], 
+                                 workers=B.PREFS['thumbWorkers'])
+        
+        # The last used root is opened by build_treeview(), so that its 
+        # rows can be shown while it is still loading
 
     def init_startup_PREFS(self, FILE='./startup.json', TYPE='json', KEY=None):
         print('{}: {}({})'.format(self.__class__.__name__, 
@@ -374,6 +420,7 @@ class Window(tk.Toplevel, B):
             "autoSaveInterval": 5, # Must save
             "backupExt": ".bak", # Allow user access
             "backupDirName": "./backups", # Allow user access
+            "blobCompression": {"utf-8": "gzip", "bytes": ""}, # Codec per encoding: gzip, lzma or ""
             "dataDirName": "./data",
             "dataStoreType": "sqlite3",
             "dataStoreName": "root.sqlite",
@@ -386,20 +433,37 @@ class Window(tk.Toplevel, B):
             "flErrorLogs": True, # Allow user access
             "flFirstStartup": True, # Must save
             "flNightlyBackups": False, # Allow user access
+            "flThumbnails": True, # Allow user access. Show image rows' thumbnails
+            "flTypeIcons": True, # Allow user access. Show each row's type icon
+            "flVirtualTree": False, # Allow user access. Draw only the rows in view
             "flWebErrorLogs": True, # Allow user access
             "flWebLogs": False, # Allow user access
             "flWebStats": True, # Allow user access
+            "importBatchSize": 500, # Imported files added to the tree at a time
+            "importPollDelay": 50, # Millisecs between adding batches of imported files
+            "importWorkers": 4, # Threads that read and store imported files
+            "insertSliceMs": 16, # Most millisecs to spend inserting rows before Tk redraws
+            "journalCompactInterval": 300, # Secs before the root journal is compacted
+            "journalMaxEntries": 1000, # Entries before the root journal is compacted
             "lastBackupCount": 0, # Must save
             "lastBackupName": "", # User information
             "lastBackupDate": "", # User information
             "lastRoot": "root.json", # Must save
             "lastRootPath": "./", # Use this root path
             "lastRootType": "json", # Must save
+            "loadPollDelay": 30, # Millisecs between collecting batches of a loading root
             "logDirName": "./logs", # Allow user access
             "nodeKey": "nodes",
             "openBrowserCommand": "firefox {}", # Allow user access
+            "openFileCommand": "xdg-open {}", # Allow user access. Opens file and image nodes
             "prefsKey": "prefs",
             "recentRoots": ["./root.json"], # Must save with path
+            "rootCompactNodes": 50000, # Save json roots without indents from this size (0 = never)
+            "thumbCacheBytes": 8388608, # Most bytes of thumbnails to keep in memory
+            "thumbPollDelay": 30, # Millisecs between showing batches of made thumbnails
+            "thumbSize": 16, # Allow user access. Longest side of a thumbnail, in pixels
+            "thumbWorkers": 2, # Threads that make thumbnails
+            "virtualRowHeight": 20, # Allow user access
             "webCGIext": ".pcgi",
             "webHomePage": "index.html", # Allow user access
             "webServerHostName": "localhost:8080", # Allow user access
@@ -412,7 +476,7 @@ class Window(tk.Toplevel, B):
             print('The {} startup file does not exist, creating it...'.format(FILE))
             if TYPE == 'json':
                 # Save startup.json file with default data
-                with open(FILE, 'w') as outfile:
+                with atomic_open(FILE) as outfile:
                     print('Writing startup PREFS to: {}'.format(FILE))
                     if KEY is None: # Save PREFS data as is (without a dict key)
                         json.dump(B.PREFS, outfile, sort_keys=True, ensure_ascii=True, indent=2)
@@ -473,16 +537,31 @@ class Window(tk.Toplevel, B):
         B.prefs['rootGeo'] = "+56+28"
         B.prefs['rootTitle'] = "Pysist {}"
         B.prefs['topNodeUid'] = "root"
+        B.prefs['bookmarks'] = [] # Paths of bookmarked nodes, ie. 'root/Files/myName'
         B.prefs['fileFormat'] = 1.1
         
         self.update_constants()
 
     # Auto load last root file used
-    def get_root(self, FILE='./root.json', TYPE='json', P_KEY='prefs', N_KEY='nodes'):
+    # onBatch(batch) is called with the node_item()s of each batch of nodes 
+    # as soon as it is loaded
+    def get_root(self, FILE='./root.json', TYPE='json', P_KEY='prefs', N_KEY='nodes', 
+                onBatch=None):
         print("{}: {}({})".format(self.__class__.__name__, 
                             sys._getframe().f_code.co_name, 
                             "self, '{}', '{}', '{}', '{}'".format(FILE, TYPE, P_KEY, N_KEY)))
-        
+        # Read a root now, on this thread. load_root() reads it in the background
+        FILE, TYPE = self.find_root(FILE, TYPE, P_KEY, N_KEY)
+        self.close_root_stores()
+        for kind, value in self.iter_root_load(FILE, TYPE, P_KEY, N_KEY):
+            if kind == 'error':
+                raise value
+            if kind != 'progress': # Nothing to show it in
+                self.on_root_message(kind, value, onBatch)
+        self.update_constants()
+
+    def find_root(self, FILE='./root.json', TYPE='json', P_KEY='prefs', N_KEY='nodes'):
+        # RETURNS: (FILE, TYPE) of the root to open, making the default root if needed
         if not os.path.isfile(FILE): # Check again with default values
             print("Can't find your latest root file: {}...".format(FILE))
 
@@ -502,33 +581,280 @@ class Window(tk.Toplevel, B):
             
                 
                 # The new root must contain both the default nodes and prefs.
-                newRootData = {}
-                newRootData[N_KEY] = B.R_DEFAULT_NODES
-                newRootData[P_KEY] = B.prefs
-                
                 # Save data to root.json file
                 if TYPE == 'json':
-                    with open(FILE, 'w') as outfile:
-                        print("Writing default node prefs to: '{}'".format(FILE))
-                        json.dump(newRootData, outfile, sort_keys=False, ensure_ascii=True, indent=2)
+                    print("Writing default node prefs to: '{}'".format(FILE))
+                    write_root(FILE, B.R_DEFAULT_NODES, B.prefs, N_KEY, P_KEY)
                 else:
                     print('Unsupported Root file type.')
-
+        return FILE, TYPE
+
+    def close_root_stores(self):
+        # Close the open root's files before another root is read
+        if B.R_STORE is not None:
+            B.R_STORE.close()
+            B.R_STORE = None
+        if isinstance(B.nodes, MmapNodes):
+            B.nodes.close()
+        B.R_JOURNAL = None
+
+    def iter_root_load(self, FILE, TYPE, P_KEY='prefs', N_KEY='nodes', batchSize=500):
+        # Read a root, as messages for on_root_message(). Runs on the root 
+        # loader's thread, so it only reads B, all changes to B are made
+        # by on_root_message() on the Tk thread
+        #   YIELDS: ('open', (nodes, store, journal)), ('prefs', prefs), 
+        #           ('journalPrefs', prefs), 
+        #           ('nodes', ([node_item(), ...], {uid: node} or None)) 
+        #           and ('progress', (nodes, totalNodes, bytes, totalBytes))
+        # A json root's nodes come in their 'nodes' messages, to be added to
+        # B.nodes, the other roots' nodes are already in their store
         if TYPE == 'json':
+            # Changes journaled since the root was last compacted
+            journal = RootJournal(FILE, N_KEY, P_KEY, 
+                                maxEntries=B.PREFS['journalMaxEntries'], 
+                                interval=B.PREFS['journalCompactInterval'], 
+                                compactNodes=B.PREFS['rootCompactNodes'])
+            changes, journalPrefs = journal.read_changes()
+            if journal.entries:
+                print("Replaying {} journal entries into: '{}'".format(
+                                                journal.entries, FILE))
+
+            # B.nodes is where we get and set all node changes. Nodes are 
+            # streamed in, so batches are usable before the file is read
+            yield 'open', ({}, None, journal)
+            count = 0
+            size = os.path.getsize(FILE)
             with open(FILE) as json_file:
-                B.TREEROOT = json.load(json_file) # now contains full root.json
+                for key, value in batch_root(iter_root(json_file, N_KEY), N_KEY, batchSize):
+                    if key == N_KEY:
+                        batch = []
+                        records = {}
+                        for uid, node in value:
+                            if uid in changes: # Journaled nodes win over the file's
+                                node = changes.pop(uid)
+                                if node is None:
+                                    continue
+                            else: # Compact, the root is kept whole in memory
+                                node = Node(node)
+                            uid = sys.intern(uid) # The same str as node['uid']
+                            records[uid] = node
+                            batch.append(node_item(uid, node))
+                        count += len(batch)
+                        yield 'nodes', (batch, records)
+                        yield 'progress', (count, None, json_file.buffer.tell(), size)
+                    elif key == P_KEY: # Load node prefs
+                        yield 'prefs', value
+                    
+            # Nodes only in the journal are new since the last compaction
+            records = {uid: node for uid, node in changes.items() if node is not None}
+            if records:
+                yield 'nodes', ([node_item(uid, node) for uid, node in records.items()], 
+                                records)
+            if journalPrefs is not None:
+                yield 'journalPrefs', journalPrefs
+        elif TYPE == 'sqlite3':
+            # sqlite3 roots already save per node, so have no journal
+            store = SqliteRoot(FILE, N_KEY, P_KEY)
+            if store.is_empty(): # A new (or empty) sqlite root
+                print("Writing default nodes and prefs to: '{}'".format(FILE))
+                store.import_root(B.R_DEFAULT_NODES, B.prefs, FILE).wait()
                 
-            # Load node prefs from TREEROOT
-            B.R_PREFS = B.prefs = self.merge_dicts(B.prefs, B.TREEROOT[P_KEY])
-            #B.R_PREFS = B.prefs # just a reference to prefs
-
-            # nodes is where we get and set all node changes
-            B.R_NODES = B.nodes = B.TREEROOT[N_KEY]
-            #R_NODES = B.nodes # just a reference to nodes
+            # Prefs are small so load them now, nodes are read when used
+            yield 'open', (store.nodes, store, None)
+            yield 'prefs', store.load_prefs()
+            yield from self.iter_parent_batches(store.nodes, batchSize)
+        elif TYPE == 'proot':
+            # The file is memory mapped, nodes are only decoded when used.
+            # proot roots are always saved whole, so have no journal
+            nodes = MmapNodes(FILE)
+            yield 'open', (nodes, None, None)
+            yield 'prefs', nodes.prefs()
+            yield from self.iter_parent_batches(nodes, batchSize)
         else:
             print('Unsupported Root file type.')
-        
+
+    def iter_parent_batches(self, nodes, batchSize=500):
+        # ('nodes', (batch, None)) of batchSize node_item()s at a time, and progress. 
+        # The store keeps the items beside its nodes, so none are decoded. 
+        # on_root_message() applies the Tk thread's changes to them. The total
+        # is of the saved items too, len(nodes) reads what the Tk thread changes
+        total = nodes.item_count()
+        count = 0
+        batch = []
+        for item in nodes.iter_items():
+            batch.append(item)
+            if len(batch) >= batchSize:
+                count += len(batch)
+                yield 'nodes', (batch, None)
+                yield 'progress', (count, total, None, None)
+                batch = []
+        if batch:
+            count += len(batch)
+            yield 'nodes', (batch, None)
+            yield 'progress', (count, total, None, None)
+
+    def on_root_message(self, kind, value, onBatch=None):
+        # Apply one message from iter_root_load() to B, on the Tk thread
+        if kind == 'open':
+            nodes, B.R_STORE, B.R_JOURNAL = value
+            B.R_NODES = B.nodes = nodes
+            B.resolver.attach(nodes)
+        elif kind == 'prefs':
+            B.R_PREFS = B.prefs = self.merge_dicts(B.prefs, value)
+        elif kind == 'journalPrefs':
+            B.prefs.update(value)
+        elif kind == 'nodes':
+            batch, records = value
+            if records is not None: # A json root's nodes, with their items so both or neither are in
+                B.nodes.update(records)
+            else: # Read from the store's file, nodes may have changed since
+                batch = B.nodes.fresh_items(batch)
+            if onBatch is not None:
+                onBatch(batch)
+        elif kind == 'progress':
+            self.show_load_progress(*value)
+        elif kind == 'error':
+            print("Could not read the root: {}".format(value))
+
+    def load_root(self, FILE='./root.json', TYPE='json', P_KEY='prefs', N_KEY='nodes'):
+        print("{}: {}({})".format(self.__class__.__name__, 
+                            sys._getframe().f_code.co_name, 
+                            "self, '{}', '{}', '{}', '{}'".format(FILE, TYPE, P_KEY, N_KEY)))
+        # Read a root on a worker thread. The window stays usable, and rows
+        # are added as their batches arrive
+        self.cancel_root_load()
+        FILE, TYPE = self.find_root(FILE, TYPE, P_KEY, N_KEY)
+        self.close_root_stores()
+        B.flDirtyRoot = False
+        B.flPartialRoot = False
+        self.loadFile = FILE
+        self.loader = RootLoader(lambda loader: self.iter_root_load(FILE, TYPE, P_KEY, N_KEY))
+        self.loader.start()
+        self.show_wait()
+        self.poll_root_load(self.loader)
+
+    def poll_root_load(self, loader):
+        # Apply the loader's messages for up to one insert slice, then wait
+        if loader is not self.loader: # Cancelled, or another root was opened
+            return
+        deadline = time.perf_counter() + B.PREFS['insertSliceMs'] / 1000
+        while time.perf_counter() < deadline:
+            messages = loader.results(1)
+            if not messages:
+                break
+            kind, value = messages[0]
+            self.on_root_message(kind, value, self.add_nodes)
+            if kind == 'open':
+                self.selection.attach(B.nodes, B.children)
+        if loader.is_done():
+            self.finish_root_load()
+            return
+        self.root.after(B.PREFS['loadPollDelay'], self.poll_root_load, loader)
+
+    def finish_root_load(self):
+        loader, self.loader = self.loader, None
+        self.hide_wait()
+        if loader.error is not None or loader.is_cancelled():
+            B.flPartialRoot = True # Saving it would lose the rest of the root
         self.update_constants()
+        # The root's own prefs may differ from the defaults used while loading
+        self.apply_root_prefs()
+        if B.flPartialRoot:
+            self.root.title('{} (not fully loaded)'.format(
+                                    B.prefs['rootTitle'].format(B.R_PATH)))
+        # Rows went in as they were loaded, put them in order key order
+        for parent in self.unordered:
+            self.inserts.put(self.order_rows, parent)
+        self.unordered.clear()
+        self.inserts.run_slice() # The first rows, so 'root' can be selected
+        self.schedule_inserts()
+        
+        if not self.tree.selection() and self.tree.exists('root'): # if empty select 'root'
+            self.tree.focus('root')
+            self.tree.selection_set('root')
+        # Selected node data is read from B.nodes, not asked of the tree
+        self.selection.attach(B.nodes, B.children)
+        self.selection.set(self.tree.selection())
+        self.selected_items = self.selection.uids # tuple
+
+    def cancel_root_load(self):
+        # Stop the root loader, what has been read so far stays in the tree
+        # RETURNS: True if a root was loading
+        if self.loader is None:
+            return False
+        print("Cancelling the load of: '{}'".format(self.loadFile))
+        self.loader.cancel()
+        self.loader.wait()
+        self.finish_root_load()
+        return True
+
+    def is_root_loading(self):
+        return self.loader is not None
+
+    def is_partial_root(self):
+        # True while B.nodes may not hold the whole root: it is loading, 
+        # or its load was cancelled or failed
+        return self.is_root_loading() or B.flPartialRoot
+
+    def refuse_partial_write(self, FILE):
+        # Writing a whole root file now would drop the nodes that were not 
+        # read. RETURNS: True if the write must not happen
+        if self.is_partial_root():
+            print("Not writing '{}', the root is not fully loaded".format(FILE))
+            return True
+        return False
+
+    def show_wait(self):
+        # The wait animation and load progress, under the tree
+        if self.waitBar is None:
+            self.waitFrames = self.load_wait_frames()
+            self.waitBar = tk.Frame(self.root)
+            self.waitImage = tk.Label(self.waitBar)
+            self.waitImage.pack(side=tk.LEFT, padx=4)
+            self.waitText = tk.Label(self.waitBar, anchor=tk.W)
+            self.waitText.pack(side=tk.LEFT, fill='x', expand=True)
+            ttk.Button(self.waitBar, text='Cancel', 
+                       command=self.on_file_cancel_load).pack(side=tk.RIGHT, padx=4)
+        self.waitText.configure(text="Loading '{}'...".format(self.loadFile))
+        self.waitBar.pack(side=tk.BOTTOM, fill='x', before=self.tree)
+        if self.waitAfter is not None:
+            self.root.after_cancel(self.waitAfter)
+        self.animate_wait(0)
+
+    def hide_wait(self):
+        if self.waitAfter is not None:
+            self.root.after_cancel(self.waitAfter)
+            self.waitAfter = None
+        if self.waitBar is not None:
+            self.waitBar.pack_forget()
+
+    def load_wait_frames(self):
+        # Every frame of the wait gif, Tk only shows a gif's first by itself
+        frames = []
+        while True:
+            try:
+                frames.append(tk.PhotoImage(file=B.WAIT_GIF, 
+                                    format='gif -index {}'.format(len(frames))))
+            except tk.TclError:
+                return frames
+
+    def animate_wait(self, frame):
+        self.waitAfter = None
+        if self.waitFrames:
+            self.waitImage.configure(image=self.waitFrames[frame % len(self.waitFrames)])
+        self.waitAfter = self.root.after(B.WAIT_FRAME_DELAY, self.animate_wait, frame + 1)
+
+    def show_load_progress(self, nodes, totalNodes, done, size):
+        if self.waitBar is None:
+            return
+        if totalNodes is None:
+            text = '{:,} nodes'.format(nodes)
+        else:
+            text = '{:,} of {:,} nodes'.format(nodes, totalNodes)
+        if size:
+            text = '{}, {:.1f} of {:.1f} MB'.format(text, done / 1e6, size / 1e6)
+        self.waitText.configure(text="Loading '{}': {}".format(
+                                            os.path.basename(self.loadFile), text))
         
     def update_constants(self):
         print('{}: {}({})'.format(self.__class__.__name__, 
@@ -577,6 +903,13 @@ class Window(tk.Toplevel, B):
         filemenu.add('command', command=self.on_file_backup_root, 
                      label='Backup root', state='normal', underline='0')
         filemenu.add('separator')
+        filemenu.add('command', command=self.on_file_import_files, 
+                     label='Import files...', state='normal', underline='0')
+        filemenu.add('command', command=self.on_file_cancel_import, 
+                     label='Cancel import', state='normal', accelerator="Escape")
+        filemenu.add('command', command=self.on_file_cancel_load, 
+                     label='Cancel loading', state='normal', accelerator="Escape")
+        filemenu.add('separator')
         filemenu.add('command', command=self.on_file_close_root, 
                      label='Close root', state='normal', underline='0')
         filemenu.add('command', command=self.on_file_quit, 
@@ -675,6 +1008,9 @@ class Window(tk.Toplevel, B):
         # heading font
         self.style.configure("mystyle.Treeview.Heading", 
                             font=('Calibri', 12,'bold'))
+        # Rows tall enough for image rows' thumbnails
+        if B.PREFS['flThumbnails'] and B.PREFS['thumbSize'] > 16:
+            self.style.configure("mystyle.Treeview", rowheight=B.PREFS['thumbSize'] + 4)
         # Remove borders
         self.style.layout("mystyle.Treeview", 
                         [('mystyle.Treeview.treearea', {'sticky': 'nswe'})])
@@ -694,9 +1030,16 @@ class Window(tk.Toplevel, B):
                             sys._getframe().f_code.co_name, 
                             'self'))
         # create the treeview with scrollbars
-        self.tree = ttk.Treeview(self.root, style="mystyle.Treeview", 
-                                yscrollcommand=self.SVBar.set, 
-                                xscrollcommand=self.SHBar.set)
+        if B.PREFS['flVirtualTree']: # Only draws the rows in view, for huge tables
+            self.tree = VirtualTree(self.root, rowHeight=B.PREFS['virtualRowHeight'], 
+                                    font=('Calibri', 11), 
+                                    headingFont=('Calibri', 12,'bold'), 
+                                    yscrollcommand=self.SVBar.set, 
+                                    xscrollcommand=self.SHBar.set)
+        else:
+            self.tree = ttk.Treeview(self.root, style="mystyle.Treeview", 
+                                    yscrollcommand=self.SVBar.set, 
+                                    xscrollcommand=self.SHBar.set)
         self.root.protocol("WM_DELETE_WINDOW", self.on_window_close)
         
         self.root.title(B.prefs['rootTitle'].format(B.R_PATH))
@@ -717,70 +1060,395 @@ class Window(tk.Toplevel, B):
         print('{}: {}({})'.format(self.__class__.__name__, 
                             sys._getframe().f_code.co_name, 
                             'self'))
-        # Define some tags to use
-        #print(B.prefs['tagNames'])
-        for x in range(0, len(B.prefs['tagNames'])):
-            tag = B.prefs['tagNames'][x]
-            #print(tag)
-            self.tree.tag_configure(B.prefs['tagNames'][x], background=B.prefs['tagBg'][x])
+        # Build the node type registry from the root's prefs, then
+        # define the tags to use from it
+        icons = {name: icon for name, (icon, handler) in B._node_types.items()}
+        B.R_TYPES = TypeRegistry(B.prefs['rowTypes'], B.prefs['tagNames'], 
+                                 B.prefs['tagBg'], B._type_map, icons)
+        for name, (icon, handler) in B._node_types.items():
+            if handler is not None and name in B.R_TYPES.types:
+                B.R_TYPES.set_handler(name, getattr(self, handler))
+        for tag, background in B.R_TYPES.tag_colours():
+            self.tree.tag_configure(tag, background=background)
+
+    def type_icon(self, rowtype):
+        # RETURNS: the row type's icon, as a PhotoImage shared by its rows, 
+        # or '' for no icon
+        if not B.PREFS['flTypeIcons']:
+            return ''
+        nodeType = B.R_TYPES.get(rowtype)
+        if nodeType is None or nodeType.icon is None:
+            return ''
+        icon = self.typeIcons.get(nodeType.icon)
+        if icon is None:
+            try: # The icons are 32 pixels, rows are 16 or so
+                icon = tk.PhotoImage(file=os.path.join(B.ICON_DIR, nodeType.icon))
+                scale = max(1, -(-max(icon.width(), icon.height()) // B.PREFS['thumbSize']))
+                icon = icon.subsample(scale)
+            except tk.TclError as err:
+                print("No icon '{}': {}".format(nodeType.icon, err))
+                icon = ''
+            self.typeIcons[nodeType.icon] = icon
+        return icon
 
     def build_treeview(self, FILE='./root.json', TYPE='json', KEY='prefs'):
         print("{}: {}({})".format(self.__class__.__name__, 
                             sys._getframe().f_code.co_name, 
                             "self, '{}', '{}', '{}'".format(FILE, TYPE, KEY)))
-        xx = B.prefs["rowTypes"]
-        tagList = B.prefs["tagNames"]
+        # Pack everything into the window
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        # Open last used root and load nodes and prefs over default node and prefs
+        # It is read on a worker thread, with a wait animation under the tree
+        self.loader = None # RootLoader of the root being read
+        self.loadFile = None
+        self.waitBar = None
+        self.waitAfter = None # after() id of the next wait animation frame
+        self.inserts = SliceQueue(B.PREFS['insertSliceMs'])
+        self.insertPending = None # after() id of the next slice
+        self.selection = Selection(values=self.row_values) # Cells as the rows show them
+        self.changesPending = None # after_idle() id of the next refresh
+        self.thumbs = ThumbCache(B.PREFS['thumbCacheBytes']) # key: PhotoImage
+        self.thumbsPending = None # after() id of the next thumbnail batch
+        self.typeIcons = {} # icon file: PhotoImage of it, or '' when it can't be read
+        self.reset_treeview()
+        self.load_root(B.R_PATH, B.R_TYPE, B.P_KEY, B.N_KEY)
+
+    def reset_treeview(self):
+        # Empty the tree for another root.
+        # Only rows under open tables are inserted, the rest wait until opened.
+        # Rows are queued as they are read and inserted a slice at a time, 
+        # so the window paints and takes input while a big root fills in
+        rows = self.tree.get_children('')
+        if rows:
+            self.tree.delete(*rows)
+        B.children = ChildIndex()
+        B.paths = PathIndex()
+        B.refs = RefIndex()
+        B.resolver = RefResolver(B.nodes)
+        self.unordered = set() # Parents whose children were loaded out of order
+        self.rebalancing = set() # Parents with a rebalance_children() to come
+        self.filled = set() # uids whose children are in the tree, or queued
+        self.shown = set() # iids in the tree, or queued
+        self.rowThumbs = {} # uid: PhotoImage its row shows, kept while it is shown
+        self.inserts.clear()
+        self.changes = ChangeSet() # Node changes the tree has not shown yet
+        self.selection.attach(B.nodes, B.children)
+        self.selected_items = ()
+
+    def add_nodes(self, batch):
+        # Index node_item()s of new nodes, and queue the rows that can be 
+        # seen now
+        parents = set()
+        for uid, parent, size, name, target, order in batch:
+            index = B.children.add(uid, parent, size=size, key=order)
+            if index + 1 < B.children.child_count(parent):
+                self.unordered.add(parent) # Its rows are in load order
+            B.paths.add(uid, parent, name)
+            if target is not None:
+                B.refs.set(uid, target)
+            for reader in B.resolver.invalidate(uid): # Its refs dangled until now
+                if reader in self.shown:
+                    self.changes.update(reader)
+            parents.add(parent)
+            if parent == '' or parent in self.filled:
+                self.queue_row(uid)
+            elif parent in self.shown:
+                self.add_placeholder(parent) # Filled when it is opened
+        self.schedule_inserts()
+        self.count_changed(parents)
+
+    def count_changed(self, parents):
+        # Tables whose number of items changed show the new number
+        for parent in parents:
+            if parent in self.shown:
+                self.changes.update(parent)
+        self.schedule_changes()
+
+    def row_values(self, uid, node):
+        # The columns a node's row shows. A table's item count comes from 
+        # B.children, not from its saved (and maybe stale) "N items"
+        values = node[B._T_VALS]
+        if values and uid in B.children and B.R_TYPES.is_table(node[B._T_ROWTYPE]):
+            count = B.children.child_count(uid)
+            values = ['{} item{}'.format(count, '' if count == 1 else 's')] + list(values[1:])
+        elif values and B.refs.target_of(uid) is not None:
+            # A node ref shows the value it resolves to, remembered by B.resolver
+            try:
+                value = B.resolver.resolve(uid)
+                values = ['' if value is None else str(value)] + list(values[1:])
+            except RefCycleError:
+                values = ['Ref cycle'] + list(values[1:])
+            except KeyError:
+                pass # Its target isn't there, or isn't loaded yet
+        return values
+
+    def queue_row(self, uid):
+        # Queue uid's row, then its children's if it is open, or a placeholder
+        self.shown.add(uid)
+        self.inserts.put(self.insert_row, uid)
+        if B.nodes[uid][B._T_OPEN]:
+            self.fill_children(uid)
+        elif B.children.has_children(uid):
+            self.add_placeholder(uid)
+
+    def fill_children(self, uid):
+        # Queue all of uid's children, in place of its placeholder
+        if uid in self.filled:
+            return
+        self.filled.add(uid)
+        placeholder = self.placeholder_of(uid)
+        if placeholder in self.shown:
+            self.shown.discard(placeholder)
+            self.inserts.put(self.delete_row, placeholder)
+        for child in B.children.children_of(uid):
+            if child not in self.shown:
+                self.queue_row(child)
+
+    def placeholder_of(self, uid):
+        return '{}{}'.format(B.PLACEHOLDER_PREFIX, uid)
+
+    def add_placeholder(self, uid):
+        placeholder = self.placeholder_of(uid)
+        if uid not in self.filled and placeholder not in self.shown:
+            self.shown.add(placeholder)
+            self.inserts.put(self.insert_row, placeholder)
+
+    def insert_row(self, iid):
+        # Queued rows that were deleted or moved away since are skipped
+        if iid not in self.shown:
+            return
+        if iid.startswith(B.PLACEHOLDER_PREFIX):
+            parent = iid[len(B.PLACEHOLDER_PREFIX):]
+            self.tree.insert(parent, 'end', iid, text='...')
+        else:
+            self.insert_nodes([iid])
+
+    def delete_row(self, iid):
+        if self.tree.exists(iid):
+            self.tree.delete(iid)
+
+    def on_treeOpen(self, event=None):
+        self.fill_children(self.tree.focus())
+        self.schedule_inserts()
+
+    def forget_rows(self, uids):
+        # uids are no longer in the tree, so they must be queued again
+        self.filled.difference_update(uids)
+        self.shown.difference_update(uids)
+        for uid in uids:
+            self.rowThumbs.pop(uid, None)
+        self.shown.difference_update([self.placeholder_of(uid) for uid in uids])
+
+    def schedule_inserts(self):
+        # Run the queued inserts a slice at a time, once Tk is idle
+        if self.inserts and self.insertPending is None:
+            self.insertPending = self.root.after_idle(self.run_inserts)
+
+    def run_inserts(self):
+        # One slice of inserts, then give Tk a turn to paint and take input
+        self.insertPending = None
+        if self.inserts.run_slice():
+            self.insertPending = self.root.after(1, self.run_inserts)
+
+    def flush_inserts(self):
+        # Insert every queued row now, before changing rows that may be queued
+        self.inserts.run_all()
+
+    def schedule_changes(self):
+        # Refresh the tree once, when Tk is next idle, however many changes
+        if self.changesPending is None:
+            self.changesPending = self.root.after_idle(self.apply_changes)
+
+    def apply_changes(self):
+        # Turn the folded node changes into as few tree calls as possible.
+        # The calls go in the insert queue, behind any rows still waiting
+        self.changesPending = None
+        changes, self.changes = self.changes, ChangeSet()
+        deleted = changes.deleted()
+        for uid, kind in changes.items():
+            if kind in (DELETE, REPLACE):
+                # Deleting a table's row deletes its children's rows too
+                if uid in self.shown and changes.parents.get(uid) not in deleted:
+                    self.inserts.put(self.delete_row, uid)
+                self.forget_rows([uid])
+            if kind == INSERT:
+                self.show_row(uid)
+            elif kind == REPLACE:
+                self.show_row(uid, place=True)
+            elif kind == MOVE:
+                self.place_moved_row(uid)
+            elif kind == UPDATE and uid in self.shown:
+                self.inserts.put(self.refresh_row, uid)
+        self.schedule_inserts()
+
+    def show_row(self, uid, place=False):
+        # A new node gets a row if its parent's children are shown. It goes
+        # at its index in B.children, with place, after the sibling before it
+        if uid in self.shown or uid not in B.children:
+            return
+        parent = B.children.parent_of(uid)
+        if parent == '' or parent in self.filled:
+            self.queue_row(uid)
+            if place:
+                self.inserts.put(self.place_row, uid)
+        elif parent in self.shown:
+            self.add_placeholder(parent)
+
+    def place_moved_row(self, uid):
+        if uid not in self.shown:
+            self.show_row(uid, place=True)
+            return
+        parent = B.children.parent_of(uid)
+        if parent == '' or parent in self.filled:
+            self.inserts.put(self.place_row, uid)
+            self.inserts.put(self.refresh_row, uid)
+        else: # Shown again when the new parent is opened
+            self.inserts.put(self.delete_row, uid)
+            self.forget_rows(B.children.subtree(uid))
+            if parent in self.shown:
+                self.add_placeholder(parent)
+
+    def order_rows(self, parent):
+        # Put parent's child rows in the order they have in B.children
+        if parent != '' and parent not in self.filled:
+            return # Not shown, they are queued in order when it is opened
+        for index, uid in enumerate(B.children.children_of(parent)):
+            if uid in self.shown:
+                self.tree.move(uid, parent, index)
+
+    def place_row(self, uid):
+        # Put uid's row where it is among its parent's children: after the
+        # row of the nearest sibling before it that is already in place. 
+        # Siblings moved in the same change set are placed by their own job
+        if uid not in B.children:
+            return
+        parent = B.children.parent_of(uid)
+        siblings = B.children.children_of(parent)
+        index = 0
+        for sibling in reversed(siblings[:B.children.index_of(uid)]):
+            if sibling in self.shown and self.tree.exists(sibling) and \
+                    self.tree.parent(sibling) == parent:
+                index = self.tree.index(sibling) + 1
+                break
+        if self.tree.exists(uid) and self.tree.parent(uid) == parent and \
+                self.tree.index(uid) < index:
+            index -= 1 # It is taken out from before the place it goes
+        self.tree.move(uid, parent, index)
+
+    def refresh_row(self, uid):
+        # Show the node's text, columns and tags again, in one call
+        if uid not in B.children:
+            return
+        node = B.nodes[uid]
+        node[B._T_TAGS] = B.R_TYPES.tag_of(node[B._T_ROWTYPE])
+        self.tree.item(uid, text=node[B._T_NAME], values=self.row_values(uid, node), 
+                       tags=tuple(node[B._T_TAGS]))
+        if B.R_TYPES.has_thumb(node[B._T_ROWTYPE]):
+            self.request_thumb(uid, node)
+        elif self.rowThumbs.pop(uid, None) is not None: # No longer an image
+            self.tree.item(uid, image=self.type_icon(node[B._T_ROWTYPE]))
+
+    def insert_nodes(self, keys):
+        tag_of = B.R_TYPES.tag_of
         
         # loop through all nodes and build tree
-        for key in B.nodes:
-            # print(key)
-            rowtype = B.nodes[key][B._T_ROWTYPE]
-            # print(rowtype)
-            parent = B.nodes[key][B._T_PARENT]
-            # print(parent)
-            position = B.nodes[key][B._T_POS]
-            # print(position)
-            uid = B.nodes[key][B._T_UID]
-            # print(uid)
-            itemname = B.nodes[key][B._T_NAME]
-            # print(itemname)
-            itemcolumns = B.nodes[key][B._T_VALS]
-            # print(itemcolumns)
-            isopen = B.nodes[key][B._T_OPEN]
-            # print(isopen)
+        for key in keys:
+            node = B.nodes[key]
+            rowtype = node[B._T_ROWTYPE]
+            parent = node[B._T_PARENT]
+            # Where it is among its siblings now, not its saved 'position'. 
+            # Tk puts an index past the rows there so far at the end
+            position = B.children.index_of(key) if key in B.children else 'end'
+            uid = node[B._T_UID]
+            itemname = node[B._T_NAME]
+            itemcolumns = self.row_values(key, node)
+            isopen = node[B._T_OPEN]
             
             # Make sure the style tag is correct for rowtype
-            typeitemlist = rowtype.split() # get the last word
-            baseitem = typeitemlist[-1]
-            subitem = typeitemlist[0]
-            baseIndex = xx.index(baseitem)
-            tag = tagList[baseIndex]
-            #print("The tag for '{}' is {}".format(baseitem, tag))
-            
-            B.nodes[key][B._T_TAGS] = tag # Change it in B.nodes
-            itemtags = tuple(B.nodes[key][B._T_TAGS]) # To tuple
-            # print(itemtags, '\n')
+            node[B._T_TAGS] = tag_of(rowtype) # Change it in B.nodes
+            itemtags = tuple(node[B._T_TAGS]) # To tuple
 
-            self.tree.insert(parent, position, uid, text=itemname, 
+            self.tree.insert(parent, position, uid, text=itemname, image=self.type_icon(rowtype),
                         values=itemcolumns, open=isopen, tags=itemtags)
-        
-        # Pack everything into the window
-        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        
-        if self.tree.selection() is (): # if empty select 'root'
-            self.tree.focus('root')
-            self.tree.selection_set('root')
-        self.selected_items = self.tree.selection() # tuple
-        # print('self.selected items:', self.selected_items)
-        self.selected_data = {}
-        for selected_uid in self.selected_items: # for multi selections
-            # print('selected_uid: {}'.format(selected_uid))
-            selected_item_data = self.tree.item(selected_uid) # dict of data
-            # print('selected_item_data: {}'.format(selected_item_data))
-            self.selected_data.update({selected_uid : selected_item_data}) # keyed dict
-        # print('self.selected_data: {}'.format(self.selected_data))
-        # ~ self.selections = self.tuple2list(self.selected_items) # list 
-        # ~ #self.tree.selection_set(self.selections) # select all uids in list
+            if B.R_TYPES.has_thumb(rowtype):
+                self.request_thumb(uid, node)
+
+    def request_thumb(self, uid, node):
+        # Show an image row's thumbnail, from memory, or once a worker made it
+        if not B.PREFS['flThumbnails'] or B.PREFS['flVirtualTree']:
+            return
+        dataRef = node.get('dataRef')
+        key = B.R_THUMBS.ref_key(dataRef)
+        thumb = self.thumbs.get(key) if key is not None else None
+        if thumb is not None:
+            self.show_row_thumb(uid, thumb)
+        elif key is not None or os.path.isfile(node.get('ref', '')):
+            B.R_THUMBS.request(uid, dataRef, node.get('ref'), node.get('type', ''))
+            self.schedule_thumbs()
+
+    def schedule_thumbs(self):
+        if self.thumbsPending is None:
+            self.thumbsPending = self.root.after(B.PREFS['thumbPollDelay'], 
+                                                 self.poll_thumbs)
+
+    def poll_thumbs(self):
+        # Show the thumbnails the workers have made, for at most a slice
+        self.thumbsPending = None
+        budget = B.PREFS['insertSliceMs'] / 1000
+        start = time.perf_counter()
+        while time.perf_counter() - start < budget:
+            records = B.R_THUMBS.results(1)
+            if not records:
+                break
+            self.show_thumb(records[0])
+        if B.R_THUMBS.is_busy():
+            self.schedule_thumbs()
+
+    def show_thumb(self, record):
+        uid = record['uid']
+        if record['error'] is not None: # The row keeps its type's icon
+            print("No thumbnail for '{}': {}".format(uid, record['error']))
+            return
+        thumb = self.thumbs.get(record['key'])
+        if thumb is None:
+            thumb = self.make_thumb(record)
+            if thumb is None:
+                return
+        if uid in self.shown and self.tree.exists(uid): # Not deleted, or of another root, since
+            self.show_row_thumb(uid, thumb)
+
+    def show_row_thumb(self, uid, thumb):
+        # The row keeps its image alive, self.thumbs may let go of it any time
+        self.rowThumbs[uid] = thumb
+        self.tree.item(uid, image=thumb)
+
+    def make_thumb(self, record):
+        # RETURNS: a PhotoImage of a worker's thumbnail, kept in self.thumbs
+        # for other rows of the same image. A raw record's whole png or gif 
+        # is read and shrunk by Tk, and a worker keeps the result on disk
+        try:
+            thumb = tk.PhotoImage(data=base64.b64encode(record['data']))
+            if record['raw']:
+                factor = -(-max(thumb.width(), thumb.height()) // B.R_THUMBS.size)
+                if factor > 1:
+                    thumb = thumb.subsample(factor)
+                png = thumb.tk.call(thumb, 'data', '-format', 'png')
+                B.R_THUMBS.keep(record['key'], base64.b64decode(png))
+        except tk.TclError as err:
+            print("No thumbnail for '{}': {}".format(record['uid'], err))
+            return None
+        self.thumbs.put(record['key'], thumb, thumb.width() * thumb.height() * 4)
+        return thumb
+
+    def apply_root_prefs(self):
+        print('{}: {}({})'.format(self.__class__.__name__, 
+                            sys._getframe().f_code.co_name, 
+                            'self'))
+        self.root.title(B.prefs['rootTitle'].format(B.R_PATH))
+        self.root.geometry(B.prefs['rootGeo'])  # W x H + Left + Top
+        self.apply_tree_columns()
+        self.create_tags()
 
     def control_scrollbars(self):
         print('{}: {}({})'.format(self.__class__.__name__, 
@@ -797,13 +1465,17 @@ class Window(tk.Toplevel, B):
         # Bind up a few things
         self.root.bind('<Control-q>', self.on_file_quit)
         self.tree.bind('<ButtonRelease-1>', self.on_selectItem)
+        self.tree.bind('<Shift-Button-1>', self.on_selectRange)
         self.tree.bind('<Double-Button-1>', self.on_openSelected)
+        self.tree.bind('<<TreeviewOpen>>', self.on_treeOpen)
         self.tree.bind("<Return>", lambda e: self.on_openSelected())
         self.tree.bind('<Control-o>', self.on_openSelected)
         self.tree.bind('<Control-x>', self.on_tree_cut)
         self.tree.bind('<Control-c>', self.on_tree_copy)
         self.tree.bind('<Control-v>', self.on_tree_paste)
         self.tree.bind('<Delete>', self.on_tree_delete)
+        self.root.bind('<Escape>', self.on_file_cancel_import)
+        self.root.bind('<Escape>', self.on_file_cancel_load, '+')
         self.tree.bind('<ButtonPress-3>', self.on_showContexMenu)
         self.tree.bind('<ButtonRelease-3>', self.on_doContexMenu)
         # self.tree.bind('<ButtonPress-1>', self.on_selectItem)
@@ -828,52 +1500,15 @@ class Window(tk.Toplevel, B):
             B.prefs.colHeads.append(self.tree.heading(colName, 'text'))
 
     def get_theme_tree_type(self, typeStr, fromTheme='default', sub='tree'):
-        
-        R_THEMES = dict()
-        R_THEMES['default'] = dict()
-        R_THEMES['default']['tree'] = dict()
-        R_THEMES['default']['tree']['types'] = dict()
-        R_THEMES['default']['tree']['types']['Root'] = dict()
-        R_THEMES['default']['tree']['types']['Root']['tagName'] = "R"
-        R_THEMES['default']['tree']['types']['Root']['tagBg'] = "#DDB3B3"
-        R_THEMES['default']['tree']['types']['Table']['tagName'] = "T"
-        R_THEMES['default']['tree']['types']['Table']['tagBg'] = "#F0CFCF"
-        R_THEMES['default']['tree']['types']['Dir']['tagName'] = "d"
-        R_THEMES['default']['tree']['types']['Dir']['tagBg'] = "#F0CFCF"
-        R_THEMES['default']['tree']['types']['File']['tagName'] = "f"
-        R_THEMES['default']['tree']['types']['File']['tagBg'] = "#F8F8F8"
-        R_THEMES['default']['tree']['types']['Text']['tagName'] = "t"
-        R_THEMES['default']['tree']['types']['Text']['tagBg'] = "#F8F8F8"
-        R_THEMES['default']['tree']['types']['Var']['tagName'] = "v"
-        R_THEMES['default']['tree']['types']['Var']['tagBg'] = "#9EEEEB"
-        R_THEMES['default']['tree']['types']['Image']['tagName'] = "i"
-        R_THEMES['default']['tree']['types']['Image']['tagBg'] = "#A5E0F5"
-        R_THEMES['default']['tree']['types']['Bytes']['tagName'] = "b"
-        R_THEMES['default']['tree']['types']['Bytes']['tagBg'] = "#E2E389"
-        R_THEMES['default']['tree']['types']['Code']['tagName'] = "c"
-        R_THEMES['default']['tree']['types']['Code']['tagBg'] = "#F8F8F8"
-        R_THEMES['default']['tree']['types']['None']['tagName'] = "n"
-        R_THEMES['default']['tree']['types']['None']['tagBg'] = "#FFFFFF"
-        
-        # R_THEMES['default']['tree']['types']['Root']['tagName'] = "R"
-        # R_THEMES['default']['tree']['types']['Root']['tagBg'] = "#DDB3B3"
-        
-        if useTheme not in R_THEMES.keys():
-            print("Theme '{}' does not exist.".format(useTheme))
+        # RETURNS: {'tagName': ..., 'tagBg': ...} of a row type, or None
+        if fromTheme != 'default' or sub != 'tree':
+            print("Theme ['{}']['{}'] does not exist.".format(fromTheme, sub))
             return None
-        theme = R_THEMES[useTheme]
-        if sub not in theme.keys():
-            print("Theme ['{}'] ['{}'] does not exist.".format(useTheme, sub))
-            return None
-        sub = theme[sub]
-        if 'types' not in sub.keys():
-            print("Theme ['{}']['{}']['{}'] does not exist.".format(useTheme, sub, 'types'))
-            return None
-        types = sub['types']
-        if typeStr in types.keys():
-            return types[typeStr]
-        print("Theme ['{}']['{}']['{}']['{}'] does not exist.".format(useTheme, sub, 'types', typeStr))
-        return None
+        entry = B.R_TYPES.theme_entry(typeStr)
+        if entry is None:
+            print("Theme ['{}']['{}']['{}']['{}'] does not exist.".format(fromTheme, sub, 
+                                                                'types', typeStr))
+        return entry
 
     # Binding callback functions
     def on_selectItem(self, event=None):
@@ -881,47 +1516,91 @@ class Window(tk.Toplevel, B):
                             sys._getframe().f_code.co_name, 
                             "self, {}".format(str(event))))
 
-        if self.tree.selection() is (): # if empty select 'root'
+        if not self.tree.selection(): # if empty select 'root'
             self.tree.focus('root')
             self.tree.selection_set('root')
             return
-        self.selected_items = self.tree.selection() # tuple
-        # print('Selected items:', self.selected_items)
-        self.selected_data = {}
-        for selected_uid in self.selected_items: # for multi selections
-            self.selected_item_data = self.tree.item(selected_uid) # dict of data
-            # print ('Selected row_text: {}'.format(self.selected_item_data['text']))
-            self.selected_data[selected_uid] = self.selected_item_data # at key and data to dict
-        print('Selected_data: {}'.format(self.selected_data))
+        self.selection.set(self.tree.selection()) # Only the uids come from Tk
+        self.selected_items = self.selection.uids # tuple
+        if not self.selection:
+            return
+        # The clicked row, or the last one selected
+        uid = self.tree.focus()
+        if uid not in self.selection:
+            uid = self.selection.last()
+        if event is None or not event.state & B.SHIFT_MASK: # Shift clicks keep the anchor
+            self.selection.set_anchor(uid)
             
-        self.col = self.tree.identify_column(event.x)
+        self.col = self.tree.identify_column(event.x) if event is not None else '#0'
         if self.col == '':
             self.col = '#0'
-        if self.col == '#0':
-            self.cell_value = self.selected_item_data['text']
-        elif self.col == '#1':
-            self.cell_value = self.selected_item_data['values'][0]
-        elif self.col == '#2':
-            self.cell_value = self.selected_item_data['values'][1]
-        elif self.col == '#3':
-            self.cell_value = self.selected_item_data['values'][2]
+        self.cell_value = self.selection.cell(uid, self.col)
             
-        print ("Selected_items: {}, col: '{}', cell_value: '{}'".format(self.selected_items, 
+        print ("Selected {} item(s), col: '{}', cell_value: '{}'".format(len(self.selection), 
                                                             self.col, self.cell_value))
 
+    def on_selectRange(self, event):
+        # Select from the anchor to the clicked row, in one selection_set()
+        uid = self.tree.identify_row(event.y)
+        if B.PREFS['flVirtualTree'] or self.selection.anchor is None or not uid:
+            return None # Tk's own shift click
+        self.flush_inserts() # Rows queued in the range must be in the tree
+        uids = [uid for uid in self.selection.range_to(uid) if uid in self.shown]
+        if not uids:
+            return None
+        self.tree.selection_set(uids)
+        self.tree.focus(uid)
+        return 'break'
+
     def on_openSelected(self, event=None):
         print('{}: {}({})'.format(self.__class__.__name__, sys._getframe().f_code.co_name, 
                                 "self, {}".format(str(event))))
 
-        self.selected_items = self.tree.selection()
-        # print('Selected items:', self.selected_items)
-        self.selected_data = {}
-        for selected_uid in self.selected_items:
-            self.selected_item_data = self.tree.item(selected_uid) # dict of data
-            # print ('Selected row_text: {}'.format(self.selected_item_data['text']))
-            self.selected_data[selected_uid] = self.selected_item_data # at key and data to dict
-        print('Selected_data: {}'.format(self.selected_data))
-            
+        self.selection.set(self.tree.selection())
+        self.selected_items = self.selection.uids
+
+        # Open each node with its type's handler, if it has one
+        for selected_uid, node in self.selection.nodes():
+            nodeType = B.R_TYPES.get(node[B._T_ROWTYPE])
+            if nodeType is not None and nodeType.handler is not None:
+                nodeType.handler(selected_uid)
+        return 'break' # Tables were toggled already, not again by Tk's double click
+
+    def open_table_node(self, uid):
+        # Open a table's row, showing its children, or close it when it is open
+        if not self.tree.exists(uid):
+            return
+        isopen = not self.tree.item(uid, 'open')
+        self.tree.item(uid, open=isopen)
+        if isopen:
+            self.fill_children(uid)
+            self.schedule_inserts()
+
+    def open_file_node(self, uid):
+        # Open a node's file with B.PREFS['openFileCommand']. A payload that
+        # is only in the blob store is copied out to a temp file first
+        node = B.nodes[uid]
+        FILE = node.get('ref', '')
+        if not os.path.isfile(FILE):
+            data = self.open_node_data(uid)
+            if data is None:
+                print("Node '{}' has no file to open".format(uid))
+                return
+            suffix = '.{}'.format(node['type']) if node.get('type') else ''
+            with data, tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as outfile:
+                shutil.copyfileobj(data, outfile)
+            FILE = outfile.name
+        try:
+            subprocess.Popen(shlex.split(B.PREFS['openFileCommand'].format(shlex.quote(FILE))))
+        except (OSError, ValueError) as err:
+            print("Could not open '{}': {}".format(FILE, err))
+
+    def show_node_value(self, uid):
+        # Show a text or var node's value, as its row shows it
+        node = B.nodes[uid]
+        values = self.row_values(uid, node)
+        self.show_info(values[0] if values else '', node[B._T_NAME])
+
     def on_showContexMenu(self, event=None):
         print('{}: {}({})'.format(self.__class__.__name__, 
                             sys._getframe().f_code.co_name, 
@@ -944,21 +1623,220 @@ class Window(tk.Toplevel, B):
     def get_node(self, nodeUID):
         return B.nodes[nodeUID]
     
-    # Use this on leaf nodes only.
-    # Do NOT use this on Table nodes as it will disassociate all child nodes
-    # Use alter_table_node_uid(oldUID, newUID) instead
+    def mark_node_dirty(self, nodeUID, deleted=False, flSave=True, flShow=True):
+        # Call after any change to B.nodes[nodeUID] so a save only writes it
+        # Use flSave=False when marking many nodes, then save once
+        # Use flShow=False when the change doesn't show in the node's row
+        B.flDirtyRoot = True
+        if B.R_JOURNAL is not None:
+            if deleted:
+                B.R_JOURNAL.mark_deleted(nodeUID)
+            else:
+                B.R_JOURNAL.mark_dirty(nodeUID)
+        elif hasattr(B.nodes, 'mark_dirty') and not deleted:
+            B.nodes.mark_dirty(nodeUID) # sqlite3 and proot node views
+        for uid in B.resolver.invalidate(nodeUID): # Rows showing its value
+            if uid != nodeUID and uid in self.shown and uid in B.children:
+                self.changes.update(uid)
+                self.schedule_changes()
+        if not deleted: # Deletes are noted by delete_node(), with their parent
+            if nodeUID in B.children: # Its payload or ref may have changed
+                node = B.nodes[nodeUID]
+                B.children.set_size(nodeUID, payload_size(node))
+                B.refs.set(nodeUID, ref_target(node.get('ref')))
+            if flShow:
+                self.changes.update(nodeUID)
+                self.schedule_changes()
+        if flSave and B.PREFS['flAutoSaveOnChange']:
+            self.on_file_save_root()
+
+    def store_node_data(self, nodeUID, FILE=None):
+        # Copy a node's file (its 'ref' path by default) into the blob store
+        node = B.nodes[nodeUID]
+        FILE = FILE or node.get('ref', '')
+        if not os.path.isfile(FILE):
+            print("Node '{}' has no file to store: '{}'".format(nodeUID, FILE))
+            return None
+        encoding = B.R_TYPES.encoding_of(node.get('type'))
+        dataRef = B.R_BLOBS.put_file(FILE, B.R_BLOBS.codec_for(encoding))
+        if node.get('dataRef') != dataRef:
+            node['dataRef'] = dataRef
+            node['size'] = os.path.getsize(FILE)
+            self.mark_node_dirty(nodeUID)
+        return dataRef
+
+    def open_node_data(self, nodeUID):
+        # RETURNS: a node's payload opened for binary reading, or None
+        node = B.nodes[nodeUID]
+        dataRef = node.get('dataRef', '')
+        if dataRef in B.R_BLOBS:
+            return B.R_BLOBS.open(dataRef)
+        if os.path.isfile(node.get('ref', '')):
+            return open(node['ref'], 'rb')
+        return None
+
+    def is_compact_root(self):
+        # Big json roots are saved without indents, which halves their size
+        compactNodes = B.PREFS['rootCompactNodes']
+        return bool(compactNodes) and len(B.nodes) >= compactNodes
+
+    def schedule_journal_compact(self):
+        # Fold the root journal into the root file when it is due
+        if (B.R_JOURNAL is not None and not self.is_partial_root() and 
+                B.R_JOURNAL.needs_compact()):
+            B.R_JOURNAL.compact(B.nodes, B.prefs)
+        self.root.after(B.PREFS['journalCompactInterval'] * 1000, 
+                        self.schedule_journal_compact)
+
+    # Use this on leaf nodes. Neither this nor alter_table_node_uid() 
+    # re-keys a part loaded root, its other nodes may name the old uid
     def alter_leaf_node_uid(self, oldUID, newUID=None):
+        return self.rekey_uid(oldUID, newUID)
+
+    def rekey_uid(self, oldUID, newUID=None):
+        # Give a node a new uid. rekey_node() changes B.nodes and the 
+        # indexes, the tree gets it as a change, and the root is saved once
         if newUID is None:
-            newUID = self.newUID()
-        oldNode = B.nodes[oldUID]
-        oldNode['uid'] = newUID # Change the internal 'uid' ref as well
-        B.nodes[newUID] = oldNode
-        del B.nodes[oldUID]
+            newUID = str(self.new_uid())
+        self.flush_inserts() # Its rows may still be queued under the old uid
+        try:
+            parent = B.children.parent_of(oldUID)
+            kids, refs = rekey_node(B.nodes, B.children, B.paths, B.refs, oldUID, newUID, 
+                                    partial=self.is_partial_root())
+        except (KeyError, ValueError) as err:
+            print("Can't re-key '{}': {}".format(oldUID, err))
+            return None
+        self.rekey_rows(oldUID, newUID, parent)
+        self.mark_node_dirty(oldUID, deleted=True, flSave=False)
+        for uid in kids: # Only their 'parent' changed
+            self.mark_node_dirty(uid, flSave=False, flShow=False)
+        for uid in refs | {newUID}:
+            self.mark_node_dirty(uid, flSave=False)
+        if B.PREFS['flAutoSaveOnChange']:
+            self.on_file_save_root()
         return newUID
-    
+
+    def rekey_rows(self, oldUID, newUID, parent):
+        # A row's iid can't change, so the old row is noted as deleted and 
+        # the new uid as moved, which puts its row where the old one was. 
+        # Tk deletes the rows under the old row with it, so they are 
+        # forgotten, to be queued again under the new row
+        if oldUID in self.shown and self.tree.exists(oldUID): # Opened as it was
+            B.nodes[newUID][B._T_OPEN] = bool(self.tree.item(oldUID, 'open'))
+        self.forget_rows(B.children.walk(newUID))
+        self.changes.delete(oldUID, parent)
+        self.changes.move(newUID)
+        self.schedule_changes()
+
+    def delete_node(self, nodeUID):
+        # Delete a node and everything under it. RETURNS: the deleted uids
+        parents = [(uid, B.children.parent_of(uid)) for uid in B.children.subtree(nodeUID)]
+        deleted = B.children.remove(nodeUID)
+        B.paths.remove(nodeUID)
+        for uid, parent in parents:
+            del B.nodes[uid]
+            B.refs.discard(uid)
+            self.changes.delete(uid, parent)
+            self.mark_node_dirty(uid, deleted=True, flSave=False)
+        self.count_changed([parents[0][1]])
+        if B.PREFS['flAutoSaveOnChange']:
+            self.on_file_save_root()
+        return deleted
+
+    def move_node(self, nodeUID, parentUID, index=None):
+        # Reparent a node, its children move with it
+        oldParent = B.children.parent_of(nodeUID)
+        B.children.move(nodeUID, parentUID, index)
+        B.paths.move(nodeUID, parentUID)
+        B.nodes[nodeUID][B._T_PARENT] = parentUID
+        self.order_node(nodeUID) # Only its own key changes
+        self.changes.move(nodeUID)
+        self.count_changed([oldParent, parentUID])
+        self.mark_node_dirty(nodeUID)
+
+    def order_node(self, nodeUID):
+        # Give a node an order key between its new neighbours' keys
+        parent = B.children.parent_of(nodeUID)
+        key = B.children.key_for(nodeUID)
+        if key is None: # The table has no keys yet
+            self.rebalance_children(parent)
+            return
+        B.nodes[nodeUID][B._T_ORDER] = key
+        B.children.set_key(nodeUID, key)
+        if len(key) > B.ORDER_KEY_LENGTH:
+            self.schedule_rebalance(parent)
+
+    def order_new_nodes(self, parentUID, uids):
+        # Order keys for nodes just added at the end of parentUID, all at once
+        children = B.children.children_of(parentUID)
+        before = None
+        if len(children) > len(uids):
+            before = B.children.key_of(children[-len(uids) - 1])
+            if before is None: # The table has no keys yet
+                self.rebalance_children(parentUID)
+                return
+        for uid, key in zip(uids, keys_between(before, None, len(uids))):
+            B.nodes[uid][B._T_ORDER] = key
+            B.children.set_key(uid, key)
+            if len(key) > B.ORDER_KEY_LENGTH:
+                self.schedule_rebalance(parentUID)
+
+    def schedule_rebalance(self, parentUID):
+        # Rebalance a table's long order keys once Tk is idle
+        if parentUID not in self.rebalancing:
+            self.rebalancing.add(parentUID)
+            self.root.after_idle(self.rebalance_children, parentUID)
+
+    def rebalance_children(self, parentUID):
+        # New, short order keys for all of a table's children. Only nodes
+        # whose key changed are marked dirty
+        self.rebalancing.discard(parentUID)
+        if parentUID not in B.children and parentUID != '':
+            return # Deleted since
+        changed = 0
+        for uid, key in B.children.rebalance(parentUID):
+            node = B.nodes[uid]
+            if node.get(B._T_ORDER) != key:
+                node[B._T_ORDER] = key
+                self.mark_node_dirty(uid, flSave=False, flShow=False)
+                changed += 1
+        print("Rebalanced the order keys of '{}' ({} changed)".format(parentUID, changed))
+        if changed and B.PREFS['flAutoSaveOnChange']:
+            self.on_file_save_root()
+
+    def rename_node(self, nodeUID, name):
+        # Change a node's name (its 'text'), paths under it follow
+        B.nodes[nodeUID][B._T_NAME] = name
+        B.paths.rename(nodeUID, name)
+        self.mark_node_dirty(nodeUID)
+
+    def find_node(self, path):
+        # RETURNS: the uid at path, ie. 'root/Files/myName', or None
+        return B.paths.find(path)
+
+    def path_of_node(self, nodeUID):
+        return B.paths.path_of(nodeUID)
+
+    def reveal_node(self, nodeUID):
+        # Open the tables above a node, then select it and scroll it into view
+        parents = []
+        parent = B.children.parent_of(nodeUID)
+        while parent in B.children:
+            parents.append(parent)
+            parent = B.children.parent_of(parent)
+        for parent in reversed(parents):
+            self.fill_children(parent)
+        self.inserts.run_all() # The rows must be in the tree to be opened
+        for parent in parents:
+            self.tree.item(parent, open=True)
+        self.tree.selection_set(nodeUID)
+        self.tree.focus(nodeUID)
+        self.tree.see(nodeUID)
+        self.selection.set(self.tree.selection())
+
     # Use this on Table nodes. It will reassociate all child nodes
     def alter_table_node_uid(self, oldUID, newUID=None):
-        pass
+        return self.rekey_uid(oldUID, newUID)
     
     def ask_open_startup(self, initdir='./'):
         print('{}: {}({})'.format(self.__class__.__name__, 
@@ -983,6 +1861,7 @@ class Window(tk.Toplevel, B):
             title = "Select root file to use", 
             filetypes = (("json files","*.json|*.JSON"), 
                         ("sqlite files","*.sqlite*"), 
+                        ("proot files","*.proot"), 
                         ("all files","*.*")))
         # self.use_startup = startup
         print("Selected root: '{}'".format(newroot))
@@ -999,18 +1878,10 @@ class Window(tk.Toplevel, B):
         rootpath = _self.ask_save_root_as()
         if rootpath is None:
             return False
-        with rootpath as newroot:
-            # save a copy of current root and prefs
-            # Build the nodes and prefs into one dict object
-            newRootData = {}
-            newRootData[B.N_KEY] = B.nodes
-            newRootData[B.P_KEY] = B.prefs
-            # Or can I just use B.TREEROOT
-            
-            print("Saving copy of root to: '{}'".format(rootpath))
-            json.dump(newRootData, outfile, sort_keys=False, 
-                        ensure_ascii=True, indent=2)
-            B.flDirtyRoot = False
+        # save a copy of current root and prefs
+        print("Saving copy of root to: '{}'".format(rootpath))
+        write_root(rootpath, B.nodes, B.prefs, B.N_KEY, B.P_KEY, self.is_compact_root())
+        B.flDirtyRoot = False
         return True
     
     def _ask_save_root_as(self, initdir='./', initfile='root.json', mode='w'):
@@ -1238,26 +2109,79 @@ print(m.toDict())
                             sys._getframe().f_code.co_name, 
                             "self, '{}', '{}'".format(FILE, TYPE)))
 
-    def on_file_open_root(self, FILE='root.json', TYPE='json'):
+    def on_file_open_root(self, FILE=None, TYPE=None):
         print('{}: {}({})'.format(self.__class__.__name__, 
                             sys._getframe().f_code.co_name, 
                             "self, '{}', '{}'".format(FILE, TYPE)))
-
-    def on_file_save_root(self, FILE='root.json', TYPE='json'):
+        if FILE is None:
+            FILE = self.ask_open_root(B.R_DIR)
+            if not FILE:
+                return
+        if TYPE is None:
+            TYPE = self.root_type_of(FILE)
+        # Save the open root first, a part loaded one only to its journal
+        if B.flDirtyRoot:
+            self.on_file_save_root()
+        self.on_file_cancel_import()
+        self.cancel_root_load() # Switching roots part way through a load is fine
+        B.PREFS['lastRootPath'] = os.path.dirname(FILE) or './'
+        B.PREFS['lastRoot'] = os.path.basename(FILE)
+        B.PREFS['lastRootType'] = TYPE
+        self.update_constants()
+        self.reset_treeview()
+        self.load_root(B.R_PATH, B.R_TYPE, B.P_KEY, B.N_KEY)
+
+    def root_type_of(self, FILE):
+        ext = os.path.splitext(FILE)[1].lower()
+        if ext.startswith('.sqlite'):
+            return 'sqlite3'
+        if ext == '.proot':
+            return 'proot'
+        return 'json'
+
+    def on_file_save_root(self, FILE=None, TYPE=None):
         print('{}: {}({})'.format(self.__class__.__name__, 
                             sys._getframe().f_code.co_name, 
                             "self, '{}', '{}'".format(FILE, TYPE)))
+        if FILE is None: # Save the currently open root
+            FILE = B.R_PATH
+        if TYPE is None:
+            TYPE = B.R_TYPE
+
+        if TYPE == 'sqlite3':
+            # Only the changed node rows and the prefs are written
+            written = B.R_STORE.save(B.prefs)
+            print("Saved {} changed nodes to: '{}'".format(written, FILE))
+            B.flDirtyRoot = False
+            return
 
+        if TYPE == 'json' and B.R_JOURNAL is not None and FILE == B.R_JOURNAL.FILE:
+            # Only append what changed, the journal compacts itself when due.
+            # A part loaded root is only appended to, compacting it would 
+            # drop the nodes that were not read
+            if self.is_partial_root():
+                written = B.R_JOURNAL.flush(B.nodes, B.prefs)
+            else:
+                written = B.R_JOURNAL.save(B.nodes, B.prefs)
+            print("Journaled {} bytes of changes to: '{}'".format(written, FILE))
+            B.flDirtyRoot = False
+            return
+
+        if self.refuse_partial_write(FILE):
+            return
         # The root must contain both the default B.nodes and B.prefs.
-        newRootData = {}
-        newRootData[B.N_KEY] = B.nodes
-        newRootData[B.P_KEY] = B.prefs
-        
         # Save data to root.json file
         if TYPE == 'json':
-            with open(FILE, 'w') as outfile:
-                print("Writing default node prefs to: '{}'".format(FILE))
-                json.dump(newRootData, outfile, sort_keys=False, ensure_ascii=True, indent=2)
+            print("Writing root to: '{}'".format(FILE))
+            write_root(FILE, B.nodes, B.prefs, B.N_KEY, B.P_KEY, self.is_compact_root())
+            B.flDirtyRoot = False
+        elif TYPE == 'proot':
+            print("Writing root to: '{}'".format(FILE))
+            if isinstance(B.nodes, MmapNodes):
+                B.nodes.save(B.prefs, FILE)
+            else:
+                write_proot(FILE, B.nodes, B.prefs)
+            B.flDirtyRoot = False
         else:
             print('Unsupported Root file type.')
 
@@ -1265,35 +2189,71 @@ print(m.toDict())
         print('{}: {}({})'.format(self.__class__.__name__, 
                             sys._getframe().f_code.co_name, 
                             "self, '{}', '{}'".format(FILE, TYPE)))
+        if self.refuse_partial_write(FILE):
+            return
 
         # The root must contain both the default nodes and prefs.
-        newRootData = {}
-        newRootData[B.N_KEY] = B.nodes
-        newRootData[B.P_KEY] = B.prefs
-        
         # Save data to root.json file
         if TYPE == 'json':
-            with open(FILE, 'w') as outfile:
-                print("Writing new root to: '{}'".format(FILE))
-                json.dump(newRootData, outfile, sort_keys=False, ensure_ascii=True, indent=2)
+            print("Writing new root to: '{}'".format(FILE))
+            write_root(FILE, B.nodes, B.prefs, B.N_KEY, B.P_KEY, self.is_compact_root())
+        elif TYPE == 'sqlite3':
+            print("Writing new root to: '{}'".format(FILE))
+            # Written by the copy's writer thread, closed once it is done
+            rootcopy = SqliteRoot(FILE, B.N_KEY, B.P_KEY)
+            self.poll_root_copy(rootcopy, rootcopy.import_root(B.nodes, B.prefs, FILE))
+        elif TYPE == 'proot':
+            print("Writing new root to: '{}'".format(FILE))
+            write_proot(FILE, B.nodes, B.prefs)
         else:
             print('Unsupported Root file type.')
             
-    def on_file_save_prefs(self, FILE='root.json', TYPE='json'):
+    def poll_root_copy(self, rootcopy, write):
+        if not write.is_done():
+            self.root.after(B.PREFS['loadPollDelay'], self.poll_root_copy, rootcopy, write)
+            return
+        rootcopy.close()
+        try:
+            print("Wrote {} nodes to: '{}'".format(write.wait(), rootcopy.FILE))
+        except Exception as err:
+            print("Could not write '{}': {}".format(rootcopy.FILE, err))
+
+    def on_file_save_prefs(self, FILE=None, TYPE=None):
         print('{}: {}({})'.format(self.__class__.__name__, 
                             sys._getframe().f_code.co_name, 
                             "self, '{}', '{}'".format(FILE, TYPE)))
+        if FILE is None: # Save the currently open root's prefs
+            FILE = B.R_PATH
+        if TYPE is None:
+            TYPE = B.R_TYPE
 
+        if TYPE == 'sqlite3':
+            print("Saving root prefs to: '{}'".format(FILE))
+            B.R_STORE.save_prefs(B.prefs)
+            return
+        if TYPE == 'json' and B.R_JOURNAL is not None and FILE == B.R_JOURNAL.FILE:
+            print("Journaling root prefs to: '{}'".format(FILE))
+            B.R_JOURNAL.mark_prefs()
+            if self.is_partial_root():
+                B.R_JOURNAL.flush(B.nodes, B.prefs)
+            else:
+                B.R_JOURNAL.save(B.nodes, B.prefs)
+            B.flDirtyPrefs = False
+            return
+
+        if self.refuse_partial_write(FILE):
+            return
         # The root must contain both the default nodes and prefs.
-        newRootData = {}
-        newRootData[B.N_KEY] = B.nodes
-        newRootData[B.P_KEY] = B.prefs
-        
         # Save data to root.json file
         if TYPE == 'json':
-            with open(FILE, 'w') as outfile:
-                print("Saving root prefs to: '{}'".format(FILE))
-                json.dump(newRootData, outfile, sort_keys=False, ensure_ascii=True, indent=2)
+            print("Saving root prefs to: '{}'".format(FILE))
+            write_root(FILE, B.nodes, B.prefs, B.N_KEY, B.P_KEY, self.is_compact_root())
+        elif TYPE == 'proot':
+            print("Saving root prefs to: '{}'".format(FILE))
+            if isinstance(B.nodes, MmapNodes):
+                B.nodes.save(B.prefs, FILE)
+            else:
+                write_proot(FILE, B.nodes, B.prefs)
         else:
             print('Unsupported Root file type.')
 
@@ -1307,6 +2267,87 @@ print(m.toDict())
                             sys._getframe().f_code.co_name, 
                             "self, '{}', '{}'".format(FILE, TYPE)))
 
+    def on_file_import_files(self, event=None):
+        print('{}: {}({})'.format(self.__class__.__name__, 
+                            sys._getframe().f_code.co_name, 
+                            "self, {}".format(str(event))))
+        if B.R_INGEST is not None:
+            print('An import is already running.')
+            return
+        folder = askopendirname(parent=self.root, title='Select folder to import')
+        if not folder:
+            return
+        # Import into the selected table, or the table of the selected item
+        selected = self.tree.focus() or 'root'
+        if not B.R_TYPES.is_table(B.nodes[selected][B._T_ROWTYPE]):
+            selected = B.nodes[selected][B._T_PARENT] or 'root'
+        B.R_INGEST = FileIngest(B.R_BLOBS, B._type_map, 
+                                workers=B.PREFS['importWorkers'])
+        B.R_INGEST.start([folder])
+        self.poll_import(selected)
+
+    def on_file_cancel_import(self, event=None):
+        if B.R_INGEST is not None:
+            print('Cancelling import...')
+            B.R_INGEST.cancel()
+
+    def on_file_cancel_load(self, event=None):
+        self.cancel_root_load()
+
+    def poll_import(self, parentUID):
+        # Add the files the import workers have finished, a batch at a time
+        ingest = B.R_INGEST
+        records = ingest.results(B.PREFS['importBatchSize'])
+        if records:
+            self.add_imported_nodes(parentUID, records)
+        done, found, walked, failed, size = ingest.progress()
+        if ingest.is_done(): # Also when cancelled, so no stored file is left out
+            print('Imported {} of {} files ({} failed, {} bytes){}'.format(
+                done - failed, found, failed, size, 
+                ', cancelled' if ingest.is_cancelled() else ''))
+            for codec, stats in B.R_BLOBS.compression_stats().items():
+                print('Blobs stored with {}: {}'.format(codec or 'no compression', stats))
+            B.R_INGEST = None
+            self.root.title(B.prefs['rootTitle'].format(B.R_PATH))
+            if B.PREFS['flAutoSaveOnChange']:
+                self.on_file_save_root()
+            return
+        self.root.title('Importing {} of {}{} files...'.format(done, found, 
+                                                    '' if walked else '+'))
+        self.root.after(B.PREFS['importPollDelay'], self.poll_import, parentUID)
+
+    def add_imported_nodes(self, parentUID, records):
+        uids = []
+        for record in records:
+            if record['error'] is not None:
+                print("Could not import '{}': {}".format(record['path'], record['error']))
+                continue
+            uid = str(self.new_uid())
+            rowtype = record['rowtype']
+            B.nodes[uid] = Node({
+                "rowtype": rowtype,
+                "columns": ["Stored", "{} {}".format(record['ext'].upper(), rowtype)],
+                "isopen": False,
+                "parent": parentUID,
+                "position": "end",
+                "tags": B.R_TYPES.tag_of(rowtype),
+                "text": record['name'],
+                "uid": uid,
+                "value": "",
+                "type": record['ext'],
+                "ref": record['path'],
+                "dataRef": record['dataRef'],
+                "size": record['size']
+                })
+            B.children.add(uid, parentUID, size=record['size'])
+            B.paths.add(uid, parentUID, record['name'])
+            uids.append(uid)
+        self.order_new_nodes(parentUID, uids)
+        for uid in uids:
+            self.changes.insert(uid)
+            self.mark_node_dirty(uid, flSave=False)
+        self.count_changed([parentUID])
+
     def on_window_close(self, event=None):
         print('{}: {}({})'.format(self.__class__.__name__, 
                             sys._getframe().f_code.co_name, 
@@ -1354,6 +2395,16 @@ print(m.toDict())
         print('{}: {}({})'.format(self.__class__.__name__, 
                             sys._getframe().f_code.co_name, 
                             "self, {}".format(str(event))))
+        self.selection.set(self.tree.selection())
+        selected = [uid for uid in self.selection if B.children.parent_of(uid) != '']
+        if not selected:
+            return
+        count = sum(len(B.children.subtree(uid)) for uid in selected)
+        if self.ask_yes_no('Delete {} selected item(s), {} node(s) in all?'.format(
+                            len(selected), count), 'Delete items?'):
+            for uid in selected:
+                if uid in B.children: # Not already deleted under another
+                    self.delete_node(uid)
 
     def on_edit_root_prefs(self, event=None):
         print('{}: {}({})'.format(self.__class__.__name__, 
@@ -1456,17 +2507,57 @@ print(m.toDict())
         print('{}: {}({})'.format(self.__class__.__name__, 
                             sys._getframe().f_code.co_name, 
                             "self, {}".format(str(event))))
+        uid = self.tree.focus()
+        if uid not in B.children:
+            return
+        # All from B.children's running totals, no subtree is walked
+        node = B.nodes[uid]
+        self.show_info('\n'.join([
+            "Name: {}".format(node[B._T_NAME]), 
+            "Type: {}".format(node[B._T_ROWTYPE]), 
+            "Uid: {}".format(uid), 
+            "Items: {:,}".format(B.children.child_count(uid)), 
+            "Items in all: {:,}".format(B.children.count(uid)), 
+            "Payload: {:,} bytes".format(B.children.size_of(uid)), 
+            "Payload in all: {:,} bytes".format(B.children.total_size(uid)), 
+            ]), "Info for '{}'".format(node[B._T_NAME]))
 
     # Dynamic user menu callback functions
     def on_user_add_bookmark(self, event=None):
         print('{}: {}({})'.format(self.__class__.__name__, 
                             sys._getframe().f_code.co_name, 
                             "self, {}".format(str(event))))
+        uid = self.tree.focus()
+        if uid not in B.children:
+            return
+        # Bookmarks are kept by path, in the root's prefs
+        path = B.paths.path_of(uid)
+        bookmarks = B.prefs.setdefault('bookmarks', [])
+        if path not in bookmarks:
+            bookmarks.append(path)
+            B.flDirtyPrefs = True
+            self.on_file_save_prefs()
+        print("Bookmarked: '{}'".format(path))
 
     def on_user_bookmarks(self, event=None):
         print('{}: {}({})'.format(self.__class__.__name__, 
                             sys._getframe().f_code.co_name, 
                             "self, {}".format(str(event))))
+        bookmarks = B.prefs.get('bookmarks', [])
+        if not bookmarks:
+            self.show_info('There are no bookmarks yet.', 'Bookmarks')
+            return
+        # A list, as there may be more bookmarks than buttons fit across
+        choice = onechooser(self.root, text='Go to bookmark:', choices=bookmarks, 
+                            default=0, title='Bookmarks').go()
+        if choice is None:
+            return
+        uid = B.paths.find(bookmarks[choice])
+        if uid is None:
+            self.show_warning("'{}' is not in this root.".format(bookmarks[choice]), 
+                              'Bookmarks')
+            return
+        self.reveal_node(uid)
 
     # Help menu callback functions
     def on_help_about(self, event=None):
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+#  blobstore.py
+#
+#  2020 Wharpus Web and Dev <wharpus@gmail.com>
+#
+
+'''
+The :class:`BlobStore` class keeps the payloads of file, image and bytes
+nodes under the data folder (PREFS['dataDirName']).
+
+Every blob is stored once, named by the hash of its content, so the same
+file imported into many tables costs one copy. A node only keeps the
+short blob ref (ie. 'sha256:9f86d08...') in node['dataRef'].
+
+    data/blobs/9f/86/9f86d081884c7d659a2feaa0c55ad015a3bf4f1b2b0b822cd15d6c15b0f00a08
+
+The two fan-out folders keep any one folder small, and as the path is
+worked out from the ref alone, finding a blob never needs a search.
+Blobs are written a chunk at a time to a temp file while being hashed,
+then renamed into place, so big files are never held in memory.
+
+Blobs can be compressed, picked per payload by the type map's encoding
+(see COMPRESSION_POLICY): text compresses well, images and pdfs already
+are compressed so they are stored as they are. The codec shows in the
+file name (.gz or .xz) and open() decompresses as it is read. A blob
+that does not get smaller is stored as it is. The ref is always the
+hash of the uncompressed content, so dedup doesn't depend on the codec.
+'''
+
+import io
+import os
+import shutil
+import gzip
+import lzma
+import hashlib
+import tempfile
+import threading
+
+from .rootwriter import _fsync_dir
+
+__all__ = ['BlobStore', 'BLOB_ALGORITHM', 'COMPRESSION_POLICY']
+
+BLOB_ALGORITHM = 'sha256'
+CHUNK_SIZE = 1 << 20 # Bytes to read and hash at a time
+
+# Type map encoding: codec. gzip is zlib's deflate in a streamable file
+COMPRESSION_POLICY = {'utf-8': 'gzip', 'bytes': None}
+
+# Codec: (file name suffix, open function)
+CODECS = {
+    None: ('', open),
+    'gzip': ('.gz', gzip.open),
+    'lzma': ('.xz', lzma.open)
+    }
+
+
+class BlobStore:
+
+    def __init__(self, dataDir='./data', algorithm=BLOB_ALGORITHM, fanout=2, 
+                 policy=None):
+        self.dataDir = dataDir
+        self.blobDir = os.path.join(dataDir, 'blobs')
+        self.tempDir = os.path.join(dataDir, 'tmp')
+        self.algorithm = algorithm
+        self.fanout = fanout # Folder levels, two hex chars each
+        self.policy = dict(COMPRESSION_POLICY if policy is None else policy)
+        self.lock = threading.Lock()
+        self.stats = {} # codec: [blobs, bytes in, bytes stored] of this session
+
+    def codec_for(self, encoding):
+        # The codec the policy gives a type map encoding ('utf-8', 'bytes')
+        codec = self.policy.get(encoding) or None
+        if codec not in CODECS:
+            raise ValueError("Unknown blob codec: '{}'".format(codec))
+        return codec
+
+    def make_dirs(self):
+        os.makedirs(self.blobDir, exist_ok=True)
+        os.makedirs(self.tempDir, exist_ok=True)
+
+    def split_ref(self, ref):
+        # 'sha256:9f86...' -> ('sha256', '9f86...')
+        algorithm, sep, digest = ref.partition(':')
+        if not sep or algorithm != self.algorithm or not digest:
+            raise ValueError("Not a {} blob ref: '{}'".format(self.algorithm, ref))
+        digest = digest.lower()
+        if len(digest) != hashlib.new(algorithm).digest_size * 2 or \
+                digest.strip('0123456789abcdef'):
+            raise ValueError("Not a {} blob ref: '{}'".format(self.algorithm, ref))
+        return algorithm, digest
+
+    def is_ref(self, ref):
+        try:
+            self.split_ref(ref)
+        except (ValueError, AttributeError):
+            return False
+        return True
+
+    def path_of(self, ref, codec=None):
+        # The blob's file path, worked out from the ref alone
+        digest = self.split_ref(ref)[1]
+        parts = [digest[i * 2:i * 2 + 2] for i in range(self.fanout)]
+        return os.path.join(self.blobDir, *parts, digest + CODECS[codec][0])
+
+    def find(self, ref):
+        # RETURNS: (path, codec) of a stored blob, or (None, None)
+        for codec in CODECS:
+            BLOB = self.path_of(ref, codec)
+            if os.path.isfile(BLOB):
+                return BLOB, codec
+        return None, None
+
+    def __contains__(self, ref):
+        return self.is_ref(ref) and self.find(ref)[0] is not None
+
+    def put_stream(self, fileobj, codec=None, chunkSize=CHUNK_SIZE):
+        # Copy a binary file object into the store. RETURNS: blob ref
+        self.make_dirs()
+        hasher = hashlib.new(self.algorithm)
+        rawSize = 0
+        fd, temppath = tempfile.mkstemp(dir=self.tempDir, suffix='.tmp')
+        rawpath = None
+        try:
+            with os.fdopen(fd, 'wb') as outfile:
+                writer = self._writer(outfile, codec)
+                while True:
+                    chunk = fileobj.read(chunkSize)
+                    if not chunk:
+                        break
+                    hasher.update(chunk)
+                    rawSize += len(chunk)
+                    writer.write(chunk)
+                if writer is not outfile:
+                    writer.close()
+                outfile.flush()
+                os.fsync(outfile.fileno())
+            ref = '{}:{}'.format(self.algorithm, hasher.hexdigest())
+            if ref in self: # Already stored, keep the one copy
+                os.remove(temppath)
+                return ref
+            if codec is not None and os.path.getsize(temppath) >= rawSize:
+                # Didn't get any smaller, store it as it is instead
+                rawpath = self._decompress(temppath, codec, chunkSize)
+                os.remove(temppath)
+                temppath, rawpath, codec = rawpath, None, None
+            BLOB = self.path_of(ref, codec)
+            os.makedirs(os.path.dirname(BLOB), exist_ok=True)
+            storedSize = os.path.getsize(temppath)
+            os.replace(temppath, BLOB)
+        except BaseException:
+            for path in (temppath, rawpath):
+                if path is not None and os.path.exists(path):
+                    os.remove(path)
+            raise
+        _fsync_dir(os.path.dirname(BLOB))
+        with self.lock:
+            stat = self.stats.setdefault(codec, [0, 0, 0])
+            stat[0] += 1
+            stat[1] += rawSize
+            stat[2] += storedSize
+        return ref
+
+    def _writer(self, outfile, codec):
+        if codec == 'gzip':
+            return gzip.GzipFile(fileobj=outfile, mode='wb', mtime=0)
+        if codec == 'lzma':
+            return lzma.LZMAFile(outfile, 'wb')
+        return outfile
+
+    def _decompress(self, FILE, codec, chunkSize=CHUNK_SIZE):
+        # Decompress FILE to a new temp file. RETURNS: the temp file's path
+        fd, rawpath = tempfile.mkstemp(dir=self.tempDir, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as outfile, CODECS[codec][1](FILE, 'rb') as infile:
+            shutil.copyfileobj(infile, outfile, chunkSize)
+            outfile.flush()
+            os.fsync(outfile.fileno())
+        return rawpath
+
+    def put_file(self, FILE, codec=None, chunkSize=CHUNK_SIZE):
+        with open(FILE, 'rb') as infile:
+            return self.put_stream(infile, codec, chunkSize)
+
+    def put_bytes(self, data, codec=None):
+        return self.put_stream(io.BytesIO(data), codec)
+
+    def open(self, ref):
+        # RETURNS: the blob opened for binary reading, decompressed as it is read
+        BLOB, codec = self.find(ref)
+        if BLOB is None:
+            raise FileNotFoundError("No blob for ref: '{}'".format(ref))
+        return CODECS[codec][1](BLOB, 'rb')
+
+    def get_bytes(self, ref):
+        with self.open(ref) as infile:
+            return infile.read()
+
+    def codec_of(self, ref):
+        return self.find(ref)[1]
+
+    def stored_size(self, ref):
+        # Bytes the blob takes on disk, compressed or not
+        BLOB = self.find(ref)[0]
+        if BLOB is None:
+            raise FileNotFoundError("No blob for ref: '{}'".format(ref))
+        return os.path.getsize(BLOB)
+
+    def compression_stats(self):
+        # RETURNS: {codec: {'blobs', 'bytes', 'stored', 'ratio'}} of this session
+        with self.lock:
+            return {codec: {'blobs': blobs, 'bytes': size, 'stored': stored, 
+                            'ratio': round(stored / size, 3) if size else 1.0}
+                    for codec, (blobs, size, stored) in self.stats.items()}
+
+    def copy_to(self, ref, FILE, chunkSize=CHUNK_SIZE):
+        # Write a blob back out as a normal file
+        with self.open(ref) as infile, open(FILE, 'wb') as outfile:
+            shutil.copyfileobj(infile, outfile, chunkSize)
+
+    def iter_refs(self):
+        if not os.path.isdir(self.blobDir):
+            return
+        suffixes = tuple(suffix for (suffix, opener) in CODECS.values() if suffix)
+        for folder, dirs, files in os.walk(self.blobDir):
+            dirs.sort()
+            for name in sorted(files):
+                if name.endswith(suffixes):
+                    name = os.path.splitext(name)[0]
+                ref = '{}:{}'.format(self.algorithm, name)
+                if self.is_ref(ref):
+                    yield ref
+
+    def remove_unused(self, usedRefs):
+        # Delete blobs no node refers to any more. RETURNS: number removed
+        usedRefs = set(usedRefs)
+        removed = 0
+        for ref in list(self.iter_refs()):
+            if ref not in usedRefs:
+                os.remove(self.find(ref)[0])
+                removed += 1
+        return removed
@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+#  childindex.py
+#
+#  2020 Wharpus Web and Dev <wharpus@gmail.com>
+#
+
+'''
+The :class:`ChildIndex` class is the parent -> children index of a root.
+
+Nodes only store their 'parent', so without it "what are the children
+of d1" means a scan of every node. The index keeps each parent's
+children in order, and each node's parent, so children_of() is a dict
+lookup and walk() / subtree() only visit the nodes under a uid.
+
+Nodes can be added in any order, a child may come before its parent,
+and topological() gives an order where every parent comes before its
+children (and siblings keep their order), for inserting or exporting.
+
+Each uid also keeps its position among its siblings. A removed or moved
+uid leaves a hole (None) in its old parent's list instead of shifting
+the rest, and the holes are closed up the next time the list is asked
+for, so taking many children out of a big table costs one pass, not one
+pass each. An insert at a position is a list insert, which is O(n) but
+only a memmove in C. The positions it shifts (and those closing holes
+shifts) are not rewritten then: the parent notes the first position
+that may be wrong, and they are rewritten from there, once, when one of
+them is next asked for. So a batch of inserts and moves into a big table
+costs one pass over the siblings after the first of them, and the
+siblings before it are never touched.
+
+Each uid also keeps how many uids are under it and the payload bytes of
+its whole subtree. Every add, remove, move and set_size() only changes
+those totals along the uid's parent chain, so count() and total_size()
+are dict lookups, however big the table.
+
+Siblings can have order keys (see orderkey.py). A uid added with a key
+goes among its keyed siblings in key order, and keyless siblings stay
+after them in the order they were added. key_for() gives a uid a key
+from its neighbours' after it was moved, and rebalance() re-keys a
+table whose keys got long, or that had none.
+'''
+
+from .orderkey import key_between, even_keys
+
+__all__ = ['ChildIndex']
+
+
+class ChildIndex:
+
+    def __init__(self, pairs=()):
+        self.children = {} # parent uid: [child uids], in order, None for holes
+        self.positions = {} # uid: its position in its parent's list
+        self.holes = {} # parent uid: number of holes in its list
+        self.stale = {} # parent uid: first position in its list whose uid's position may be wrong
+        self.parents = {} # uid: parent uid
+        self.counts = {} # uid: number of uids under it
+        self.sizes = {} # uid: payload bytes of the node itself
+        self.totals = {} # uid: payload bytes of uid and every uid under it
+        self.keys = {} # uid: order key, of uids that have one
+        self.add_pairs(pairs)
+
+    def __contains__(self, uid):
+        return uid in self.parents
+
+    def __len__(self):
+        return len(self.parents)
+
+    def add(self, uid, parent, index=None, size=0, key=None):
+        # Add uid under parent, at the end, at position index, or by its 
+        # order key. RETURNS: the position it went at
+        if uid in self.parents:
+            raise KeyError("'{}' is already in the index".format(uid))
+        self.parents[uid] = parent
+        if key is not None:
+            self.keys[uid] = key
+            if index is None:
+                index = self._key_index(self.children_of(parent), key)
+        index = self._link(uid, parent, index)
+        # Children added before uid are already counted under it
+        kids = self.children_of(uid)
+        self.counts[uid] = sum(1 + self.counts[child] for child in kids)
+        self.sizes[uid] = size
+        self.totals[uid] = size + sum(self.totals[child] for child in kids)
+        self._add_up(parent, 1 + self.counts[uid], self.totals[uid])
+        return index
+
+    def _key_index(self, siblings, key):
+        # Binary search of the keyed siblings, which come before the rest
+        keys = self.keys
+        lo, hi = 0, len(siblings)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            midKey = keys.get(siblings[mid])
+            if midKey is not None and midKey <= key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _link(self, uid, parent, index=None):
+        # Put uid in parent's list. RETURNS: its position
+        siblings = self.children.get(parent)
+        if siblings is None:
+            siblings = self.children[parent] = []
+        if index is not None and index < len(siblings) - self.holes.get(parent, 0):
+            siblings = self.children_of(parent)
+            siblings.insert(index, uid)
+            self.positions[uid] = index
+            self._mark_stale(parent, index) # The siblings after it moved up one
+            return index
+        self.positions[uid] = len(siblings)
+        siblings.append(uid)
+        return len(siblings) - 1 - self.holes.get(parent, 0)
+
+    def _unlink(self, uid, parent):
+        # Take uid out of parent's list, leaving a hole
+        siblings = self.children[parent]
+        index = self._slot(uid)
+        del self.positions[uid]
+        holes = self.holes.get(parent, 0)
+        if index == len(siblings) - 1:
+            siblings.pop()
+            while siblings and siblings[-1] is None: # Holes left at the end
+                siblings.pop()
+                holes -= 1
+        else:
+            siblings[index] = None
+            holes += 1
+        if holes:
+            self.holes[parent] = holes
+            if holes * 2 > len(siblings): # Mostly holes
+                self.children_of(parent)
+        else:
+            self.holes.pop(parent, None)
+
+    def add_pairs(self, pairs):
+        for uid, parent in pairs:
+            self.add(uid, parent)
+
+    def remove(self, uid):
+        # Remove uid and everything under it. RETURNS: the removed uids
+        removed = self.subtree(uid)
+        parent = self.parents[uid]
+        self._add_up(parent, -1 - self.counts[uid], -self.totals[uid])
+        self._unlink(uid, parent)
+        for child in removed:
+            del self.parents[child]
+            self.positions.pop(child, None)
+            self.children.pop(child, None)
+            self.holes.pop(child, None)
+            self.stale.pop(child, None)
+            del self.counts[child], self.sizes[child], self.totals[child]
+            self.keys.pop(child, None)
+        return removed
+
+    def move(self, uid, parent, index=None):
+        # Reparent uid (and so its whole subtree)
+        if uid == parent or parent in self.iter_walk(uid):
+            raise ValueError("Can't move '{}' under itself".format(uid))
+        count, total = 1 + self.counts[uid], self.totals[uid]
+        self._add_up(self.parents[uid], -count, -total)
+        self._unlink(uid, self.parents[uid])
+        self.parents[uid] = parent
+        self._link(uid, parent, index)
+        self._add_up(parent, count, total)
+
+    def rename(self, oldUID, newUID):
+        # Re-key a uid in place, its children follow it
+        if newUID in self.parents:
+            raise KeyError("'{}' is already in the index".format(newUID))
+        index = self._slot(oldUID)
+        parent = self.parents.pop(oldUID)
+        self.parents[newUID] = parent
+        for table in (self.counts, self.sizes, self.totals):
+            table[newUID] = table.pop(oldUID)
+        if oldUID in self.keys:
+            self.keys[newUID] = self.keys.pop(oldUID)
+        self.positions[newUID] = index
+        del self.positions[oldUID]
+        self.children[parent][index] = newUID
+        if oldUID in self.children:
+            kids = self.children.pop(oldUID)
+            self.children[newUID] = kids
+            for table in (self.holes, self.stale):
+                if oldUID in table:
+                    table[newUID] = table.pop(oldUID)
+            for child in kids:
+                if child is not None:
+                    self.parents[child] = newUID
+
+    def key_of(self, uid):
+        return self.keys.get(uid)
+
+    def set_key(self, uid, key):
+        self.keys[uid] = key
+
+    def key_for(self, uid):
+        # RETURNS: an order key between uid's neighbours' keys, or None if 
+        # one of them has no key (then the table needs a rebalance())
+        siblings = self.children_of(self.parents[uid])
+        index = self.index_of(uid)
+        before = after = None
+        if index > 0:
+            before = self.keys.get(siblings[index - 1])
+            if before is None:
+                return None
+        if index + 1 < len(siblings):
+            after = self.keys.get(siblings[index + 1])
+            if after is None:
+                return None
+        return key_between(before, after)
+
+    def rebalance(self, parent):
+        # New, short keys for all of parent's children, in their order.
+        # RETURNS: [(uid, key), ...]
+        siblings = self.children_of(parent)
+        keyed = list(zip(siblings, even_keys(len(siblings))))
+        self.keys.update(keyed)
+        return keyed
+
+    def parent_of(self, uid):
+        return self.parents[uid]
+
+    def children_of(self, uid):
+        # RETURNS: uid's children, in order. Don't change the list
+        siblings = self.children.get(uid)
+        if siblings is None:
+            return []
+        if uid in self.holes: # Close up the holes, once for all of them
+            del self.holes[uid]
+            first = siblings.index(None)
+            siblings[first:] = [child for child in siblings[first:] if child is not None]
+            self._mark_stale(uid, first)
+        return siblings
+
+    def has_children(self, uid):
+        return self.child_count(uid) > 0
+
+    def index_of(self, uid):
+        parent = self.parents[uid]
+        if parent in self.holes:
+            self.children_of(parent)
+        return self._slot(uid)
+
+    def _slot(self, uid):
+        # uid's place in its parent's list (holes and all), rewriting the
+        # parent's stale positions first if uid's is one of them
+        parent = self.parents[uid]
+        start = self.stale.get(parent)
+        if start is not None and self.positions[uid] >= start:
+            del self.stale[parent]
+            siblings = self.children[parent]
+            self.positions.update((child, index) for index, child in
+                        enumerate(siblings[start:], start) if child is not None)
+        return self.positions[uid]
+
+    def _mark_stale(self, parent, index):
+        # The positions of parent's children from index on may be wrong.
+        # Positions before the first such index are still right
+        start = self.stale.get(parent)
+        if start is None or index < start:
+            self.stale[parent] = index
+
+    def iter_walk(self, uid):
+        # Every uid under uid (not uid itself), parents before children
+        children = self.children
+        stack = [iter(children.get(uid, ()))]
+        while stack:
+            for child in stack[-1]:
+                if child is None: # A hole
+                    continue
+                yield child
+                if child in children:
+                    stack.append(iter(children[child]))
+                break
+            else:
+                stack.pop()
+
+    def walk(self, uid):
+        return list(self.iter_walk(uid))
+
+    def subtree(self, uid):
+        # uid and every uid under it
+        return [uid] + self.walk(uid)
+
+    def count(self, uid):
+        # Number of uids under uid
+        return self.counts[uid]
+
+    def child_count(self, uid):
+        return len(self.children.get(uid, ())) - self.holes.get(uid, 0)
+
+    def set_size(self, uid, size):
+        # Set the payload bytes of uid itself
+        change = size - self.sizes[uid]
+        if change:
+            self.sizes[uid] = size
+            self.totals[uid] += change
+            self._add_up(self.parents[uid], 0, change)
+
+    def set_sizes(self, sizes):
+        for uid, size in sizes:
+            self.set_size(uid, size)
+
+    def size_of(self, uid):
+        return self.sizes[uid]
+
+    def total_size(self, uid):
+        # Payload bytes of uid and everything under it
+        return self.totals[uid]
+
+    def _add_up(self, parent, count, size):
+        # Add to the totals of parent and each of its parents
+        counts = self.counts
+        totals = self.totals
+        parents = self.parents
+        while parent in parents:
+            counts[parent] += count
+            totals[parent] += size
+            parent = parents[parent]
+
+    def roots(self):
+        # uids whose parent is not in the index ('' for the root node)
+        return [uid for uid, parent in self.parents.items() if parent not in self.parents]
+
+    def topological(self):
+        # Every uid, each parent before its children
+        for uid in self.roots():
+            yield uid
+            yield from self.iter_walk(uid)
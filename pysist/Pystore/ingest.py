@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+#  ingest.py
+#
+#  2020 Wharpus Web and Dev <wharpus@gmail.com>
+#
+
+'''
+The :class:`FileIngest` class imports files into a :class:`BlobStore`
+with a pool of worker threads, so the Tk thread only has to build nodes.
+
+One thread walks the sources and feeds file paths to the workers, the
+workers work out each file's type from its extension (using a type map
+like B._type_map), store it, and hand back a record:
+
+    {'path': ..., 'name': ..., 'ext': 'png', 'rowtype': 'image',
+     'encoding': 'bytes', 'size': 1234, 'dataRef': 'sha256:...', 'error': None}
+
+Both queues are bounded, so a huge import never gets far ahead of the UI.
+The UI calls results() from an after() callback to collect finished
+records a batch at a time. cancel() stops everything at the next file,
+the UI still collects records until is_done(), as files that were being
+stored when it was cancelled are already in the blob store.
+'''
+
+import os
+import queue
+import threading
+
+__all__ = ['FileIngest']
+
+DEFAULT_TYPE = ['file', 'bytes'] # For extensions that are not in the type map
+_DONE = None # Tells a worker there are no more paths
+
+
+class FileIngest:
+
+    def __init__(self, blobs, typeMap, workers=4, queueSize=256):
+        self.blobs = blobs
+        self.typeMap = typeMap
+        self.workerCount = max(1, workers)
+        self.paths = queue.Queue(queueSize)
+        self.records = queue.Queue(queueSize)
+        self.cancelled = threading.Event()
+        self.lock = threading.Lock()
+        self.threads = []
+        self.running = 0 # Workers that have not finished yet
+        self.found = 0 # Files found so far
+        self.walked = False # True once every file has been found
+        self.done = 0 # Files stored, or failed
+        self.failed = 0
+        self.bytes = 0 # Bytes stored
+
+    def start(self, sources):
+        # sources: a list of files and folders, folders are read recursively
+        self.running = self.workerCount
+        walker = threading.Thread(target=self._walk, args=(list(sources), ),
+                                  name='ingest-walk', daemon=True)
+        self.threads = [walker]
+        for x in range(self.workerCount):
+            self.threads.append(threading.Thread(target=self._work,
+                                name='ingest-{}'.format(x), daemon=True))
+        for thread in self.threads:
+            thread.start()
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def is_cancelled(self):
+        return self.cancelled.is_set()
+
+    def is_done(self):
+        # True when every worker has finished and every record was collected
+        return self.running == 0 and self.records.empty()
+
+    def progress(self):
+        # RETURNS: (done, found, walked, failed, bytes)
+        with self.lock:
+            return self.done, self.found, self.walked, self.failed, self.bytes
+
+    def results(self, maxItems=500):
+        # Collect up to maxItems finished records without waiting
+        records = []
+        while len(records) < maxItems:
+            try:
+                records.append(self.records.get_nowait())
+            except queue.Empty:
+                break
+        return records
+
+    def wait(self, timeout=None):
+        for thread in self.threads:
+            thread.join(timeout)
+
+    def _put(self, q, item):
+        # A put that gives up when the import is cancelled
+        while not self.cancelled.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _walk(self, sources):
+        try:
+            for source in sources:
+                if os.path.isdir(source):
+                    for folder, dirs, files in os.walk(source):
+                        dirs.sort()
+                        for name in sorted(files):
+                            if not self._add(os.path.join(folder, name)):
+                                return
+                elif not self._add(source):
+                    return
+        finally:
+            with self.lock:
+                self.walked = True
+            for x in range(self.workerCount):
+                self._put(self.paths, _DONE)
+
+    def _add(self, path):
+        with self.lock:
+            self.found += 1
+        return self._put(self.paths, path)
+
+    def _work(self):
+        try:
+            while not self.cancelled.is_set():
+                try:
+                    path = self.paths.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                if path is _DONE:
+                    return
+                record = self.ingest_file(path)
+                with self.lock:
+                    self.done += 1
+                    if record['error'] is None:
+                        self.bytes += record['size']
+                    else:
+                        self.failed += 1
+                self.records.put(record) # Even when cancelled, it is stored
+        finally:
+            with self.lock:
+                self.running -= 1
+
+    def ingest_file(self, path):
+        name = os.path.basename(path)
+        ext = os.path.splitext(name)[1][1:].lower()
+        rowtype, encoding = self.typeMap.get(ext, DEFAULT_TYPE)
+        record = {'path': path, 'name': name, 'ext': ext, 'rowtype': rowtype,
+                  'encoding': encoding, 'size': 0, 'dataRef': None, 'error': None}
+        try:
+            record['size'] = os.path.getsize(path)
+            record['dataRef'] = self.blobs.put_file(path, self.blobs.codec_for(encoding))
+        except Exception as err: # ie. OSError, or a codec error
+            record['error'] = str(err)
+        return record
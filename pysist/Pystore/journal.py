@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+#  journal.py
+#
+#  2020 Wharpus Web and Dev <wharpus@gmail.com>
+#
+
+'''
+The :class:`RootJournal` class is an append-only change journal for a
+json root file.
+
+Saving only appends the dirty nodes (and prefs if changed) to a
+'<root>.journal' file, one json entry per line. The journal is folded
+back into the root file by compact() once it has too many entries, has
+grown too big compared to the root, or is older than the interval.
+'''
+
+import os
+import json
+import time
+
+from .rootwriter import write_root
+from .node import Node, node_json
+
+__all__ = ['RootJournal']
+
+
+class RootJournal:
+
+    def __init__(self, FILE, N_KEY='nodes', P_KEY='prefs',
+                maxEntries=1000, maxRatio=0.5, interval=300, compactNodes=0):
+        self.FILE = FILE # The base root file
+        self.JOURNAL = FILE + '.journal'
+        self.N_KEY = N_KEY
+        self.P_KEY = P_KEY
+        self.maxEntries = maxEntries # Compact after this many entries
+        self.maxRatio = maxRatio # or when journal size > root size * maxRatio
+        self.interval = interval # or when this many seconds old (0 = never)
+        self.compactNodes = compactNodes # Write roots this big without indents
+        self.dirty = set() # uids changed since the last flush
+        self.deleted = set() # uids deleted since the last flush
+        self.flDirtyPrefs = False
+        self.entries = 0 # entries in the journal file
+        self.lastCompact = time.time()
+
+    def mark_dirty(self, uid):
+        self.deleted.discard(uid)
+        self.dirty.add(uid)
+
+    def mark_deleted(self, uid):
+        self.dirty.discard(uid)
+        self.deleted.add(uid)
+
+    def mark_prefs(self):
+        self.flDirtyPrefs = True
+
+    def is_dirty(self):
+        return bool(self.dirty or self.deleted or self.flDirtyPrefs)
+
+    def flush(self, nodes, prefs):
+        # Append every change since the last flush, returns bytes written
+        if not self.is_dirty():
+            return 0
+        lines = []
+        for uid in self.deleted:
+            lines.append(json.dumps({'op': 'del', 'uid': uid}, ensure_ascii=True))
+        for uid in self.dirty:
+            if uid in nodes:
+                lines.append(json.dumps({'op': 'put', 'uid': uid, 'node': nodes[uid]},
+                                        ensure_ascii=True, default=node_json))
+        if self.flDirtyPrefs:
+            lines.append(json.dumps({'op': 'prefs', 'prefs': prefs}, ensure_ascii=True))
+        data = ''.join(line + '\n' for line in lines)
+        with open(self.JOURNAL, 'a') as journal:
+            journal.write(data)
+            journal.flush()
+            os.fsync(journal.fileno())
+        self.entries += len(lines)
+        self.dirty.clear()
+        self.deleted.clear()
+        self.flDirtyPrefs = False
+        return len(data)
+
+    def save(self, nodes, prefs):
+        # flush() then compact() if the journal has got too big or too old
+        written = self.flush(nodes, prefs)
+        if self.needs_compact():
+            self.compact(nodes, prefs)
+        return written
+
+    def needs_compact(self):
+        if self.entries == 0:
+            return False
+        if self.entries >= self.maxEntries:
+            return True
+        if self.interval and time.time() - self.lastCompact >= self.interval:
+            return True
+        try:
+            journalSize = os.path.getsize(self.JOURNAL)
+            rootSize = os.path.getsize(self.FILE)
+        except OSError:
+            return True
+        return journalSize > rootSize * self.maxRatio
+
+    def compact(self, nodes, prefs):
+        # Fold the journal into the base root file, then empty the journal
+        self.flush(nodes, prefs)
+        print("Compacting root journal into: '{}'".format(self.FILE))
+        compact = bool(self.compactNodes) and len(nodes) >= self.compactNodes
+        write_root(self.FILE, nodes, prefs, self.N_KEY, self.P_KEY, compact)
+        # A crash before this leaves a journal that simply replays again
+        if os.path.isfile(self.JOURNAL):
+            os.remove(self.JOURNAL)
+        self.entries = 0
+        self.lastCompact = time.time()
+
+    def read_changes(self):
+        # The journal folded down to its end result, without applying it.
+        # RETURNS: ({uid: node, or None if deleted}, prefs or None)
+        self.entries = 0
+        changes = {}
+        journalPrefs = None
+        if not os.path.isfile(self.JOURNAL):
+            return changes, journalPrefs
+        good = 0 # byte length of the journal up to the last good entry
+        with open(self.JOURNAL, 'rb') as journal:
+            for line in journal:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    entry = None
+                if entry is None or not line.endswith(b'\n'):
+                    # Only the last line can be torn by a crash, cut it off
+                    # so later appends don't land after a broken entry
+                    print("Dropping a torn journal entry in: '{}'".format(self.JOURNAL))
+                    break
+                good += len(line)
+                if entry['op'] == 'put':
+                    changes[entry['uid']] = Node(entry['node'])
+                elif entry['op'] == 'del':
+                    changes[entry['uid']] = None
+                elif entry['op'] == 'prefs':
+                    journalPrefs = entry['prefs']
+                self.entries += 1
+        if good != os.path.getsize(self.JOURNAL):
+            os.truncate(self.JOURNAL, good)
+        return changes, journalPrefs
+
+    def replay(self, nodes, prefs):
+        # Apply a journal left by the last session to the loaded base root
+        changes, journalPrefs = self.read_changes()
+        for uid, node in changes.items():
+            if node is None:
+                nodes.pop(uid, None)
+            else:
+                nodes[uid] = node
+        if journalPrefs is not None:
+            prefs.update(journalPrefs)
+        return self.entries
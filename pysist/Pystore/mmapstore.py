@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+#  mmapstore.py
+#
+#  2020 Wharpus Web and Dev <wharpus@gmail.com>
+#
+
+'''
+The :class:`MmapNodes` class is a dict like, random access view of the
+nodes in a .proot file.
+
+The file is memory mapped and get_node(uid) / node_exists(uid) binary
+search the uid index at the end of the file, so only the records that
+are actually touched are ever decoded. Memory use follows what has been
+looked at, not the size of the root. iter_items() reads every node's
+node_item() from the file's items section, also without decoding.
+'''
+
+import os
+import mmap
+from collections.abc import MutableMapping
+
+from .prootfile import ProotFile, RECORD_LEN, write_proot, load_proot
+from .node import Node
+from .nodeitem import node_item
+
+__all__ = ['MmapNodes']
+
+
+class MmapNodes(MutableMapping):
+
+    def __init__(self, FILE):
+        self.FILE = FILE
+        self.fileobj = None
+        self.mm = None
+        self.proot = None
+        self.decoded = {} # uid: node of every record touched so far
+        self.changed = {} # uid: node of new or changed nodes, kept until saved
+        self.new = set() # uids in self.changed that are not in the file
+        self.deleted = set() # uids in the file that have been deleted
+        self.open()
+
+    def open(self):
+        self.fileobj = open(self.FILE, 'rb')
+        self.mm = mmap.mmap(self.fileobj.fileno(), 0, access=mmap.ACCESS_READ)
+        self.proot = ProotFile(self.mm)
+
+    def close(self):
+        self.proot = None
+        if self.mm is not None:
+            self.mm.close()
+            self.mm = None
+        if self.fileobj is not None:
+            self.fileobj.close()
+            self.fileobj = None
+
+    def find(self, uid):
+        # Binary search the index. RETURNS: (offset, length) or None
+        key = uid.encode('utf-8')
+        lo = 0
+        hi = self.proot.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            midKey, offset, length = self.proot.index_entry(mid)
+            if midKey < key:
+                lo = mid + 1
+            elif midKey > key:
+                hi = mid
+            else:
+                return offset, length
+        return None
+
+    def __getitem__(self, uid):
+        node = self.changed.get(uid)
+        if node is not None:
+            return node
+        node = self.decoded.get(uid)
+        if node is not None:
+            return node
+        if uid in self.deleted:
+            raise KeyError(uid)
+        found = self.find(uid)
+        if found is None:
+            raise KeyError(uid)
+        node = Node(self.proot.record_at(*found)[1])
+        self.decoded[uid] = node
+        return node
+
+    def __setitem__(self, uid, node):
+        self.decoded.pop(uid, None)
+        if uid not in self.changed and self.find(uid) is None:
+            self.new.add(uid)
+        self.deleted.discard(uid)
+        self.changed[uid] = node
+
+    def __delitem__(self, uid):
+        if uid in self.new:
+            self.new.discard(uid)
+            del self.changed[uid]
+            return
+        if uid in self.deleted or self.find(uid) is None:
+            raise KeyError(uid)
+        self.decoded.pop(uid, None)
+        self.changed.pop(uid, None)
+        self.deleted.add(uid)
+
+    def __contains__(self, uid):
+        if uid in self.changed or uid in self.decoded:
+            return True
+        return uid not in self.deleted and self.find(uid) is not None
+
+    def __iter__(self):
+        # Saved order, reading just the uid at the front of each record
+        buf = self.mm
+        decode = self.proot.decoder.decode
+        pos = self.proot.recordsOffset
+        for x in range(self.proot.count):
+            length = RECORD_LEN.unpack_from(buf, pos)[0]
+            pos += RECORD_LEN.size
+            uid = decode(buf, pos)[0]
+            pos += length
+            if uid not in self.deleted:
+                yield uid
+        yield from [uid for uid in self.changed if uid in self.new]
+
+    def __len__(self):
+        return self.proot.count - len(self.deleted) + len(self.new)
+
+    def peek(self, uid):
+        # Like self[uid], but a record read from the file is not kept
+        if uid in self.changed or uid in self.decoded or uid in self.deleted:
+            return self[uid]
+        found = self.find(uid)
+        if found is None:
+            raise KeyError(uid)
+        return self.proot.record_at(*found)[1]
+
+    def iter_parents(self):
+        # (uid, parent) pairs, in saved order, without decoding the nodes
+        for item in self.fresh_items(self.iter_items()):
+            yield item[:2]
+        for uid in [uid for uid in self.changed if uid in self.new]:
+            yield uid, self.changed[uid].get('parent', '')
+
+    def iter_items(self):
+        # node_item()s of the nodes in the file, in saved order. Only the 
+        # file is read, not changed or deleted, so a loader thread can walk 
+        # it while the Tk thread changes nodes
+        return self.proot.iter_items()
+
+    def snapshot(self):
+        # On the Tk thread: (uid, node) pairs of every node as it is now, for
+        # another thread to walk. The file is read again by that thread, so 
+        # a save() that remaps this one doesn't matter
+        changed = dict(self.decoded)
+        changed.update(self.changed)
+        new = [uid for uid in self.changed if uid in self.new]
+        return self._iter_snapshot(self.FILE, changed, new, set(self.deleted))
+
+    def _iter_snapshot(self, FILE, changed, new, deleted):
+        for uid, node in load_proot(FILE):
+            if uid in changed:
+                yield uid, changed[uid]
+            elif uid not in deleted:
+                yield uid, node
+        for uid in new:
+            yield uid, changed[uid]
+
+    def item_count(self):
+        # The number of iter_items() items, the records in the file
+        return self.proot.count
+
+    def fresh_items(self, items):
+        # On the Tk thread: iter_items() items less the deleted nodes, and 
+        # the items of nodes that were read (and maybe changed) made again
+        fresh = []
+        for item in items:
+            uid = item[0]
+            node = self.changed.get(uid)
+            if node is None:
+                node = self.decoded.get(uid)
+            if node is not None:
+                fresh.append(node_item(uid, node))
+            elif uid not in self.deleted:
+                fresh.append(item)
+        return fresh
+
+    def iter_records(self):
+        # (uid, node) pairs, in saved order, without keeping the nodes
+        for uid in self:
+            yield uid, self.peek(uid)
+
+    def get_node(self, uid):
+        return self[uid]
+
+    def node_exists(self, uid):
+        return uid in self
+
+    def prefs(self):
+        return self.proot.prefs()
+
+    def mark_dirty(self, uid):
+        # Call after changing a node in place, so forget() keeps the change
+        if uid in self.decoded:
+            self.changed[uid] = self.decoded.pop(uid)
+
+    def forget(self, uid=None):
+        # Drop decoded nodes so memory only holds new and changed nodes
+        if uid is None:
+            self.decoded.clear()
+        else:
+            self.decoded.pop(uid, None)
+
+    def save(self, prefs, FILE=None):
+        # Write every node to a new .proot file, then map the new file
+        FILE = FILE or self.FILE
+        written = write_proot(FILE, _Uncached(self), prefs)
+        if os.path.abspath(FILE) == os.path.abspath(self.FILE):
+            self.close()
+            self.decoded.clear()
+            self.changed.clear()
+            self.new.clear()
+            self.deleted.clear()
+            self.open()
+        return written
+
+
+class _Uncached:
+    # Lets write_proot read every node without decoding them all into memory
+
+    def __init__(self, nodes):
+        self.nodes = nodes
+
+    def __iter__(self):
+        return iter(self.nodes)
+
+    def __getitem__(self, uid):
+        return self.nodes.peek(uid)
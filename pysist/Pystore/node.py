@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+#  node.py
+#
+#  2020 Wharpus Web and Dev <wharpus@gmail.com>
+#
+
+'''
+The :class:`Node` class is a compact node that reads and writes like the
+node dict it replaces, so B.nodes[uid][B._T_PARENT] keeps working.
+
+A node dict has a hash table for its eleven or so keys, its own copy of
+every rowtype, tags, type and parent string, and a columns list whose
+first item is usually an equal copy of its value. A Node keeps the usual
+fields in __slots__, interns the strings that repeat from node to node,
+and makes a column that equals the value the value's own string:
+
+    node = Node({'rowtype': 'var', 'value': 'Greg', 'columns': ['Greg', 'STR[4] var']})
+    node['columns'][0] is node['value'] # True, one 'Greg' is kept
+    node['columns'][1] = 'STR var' # columns is the node's own list, edits stay
+    node['value'] = 'Ann' # columns still show 'Greg', as a dict's would
+    node.parent # Fields can also be read as attributes, which is faster
+
+Keys that are not one of NODE_FIELDS go to a small dict, made on first use.
+Nodes iterate their keys in NODE_FIELDS order, which is the order json roots
+already have, then the other keys.
+
+json can't write a Node by itself, so writers pass default=node_json.
+'''
+
+import sys
+from collections.abc import MutableMapping
+
+__all__ = ['Node', 'node_json', 'NODE_FIELDS']
+
+NODE_FIELDS = ('rowtype', 'columns', 'isopen', 'parent', 'position', 'order', 'tags',
+               'text', 'uid', 'value', 'type', 'ref', 'dataRef', 'size')
+_FIELD_SET = frozenset(NODE_FIELDS)
+# Fields whose strings repeat from node to node, or are also B.nodes keys
+_INTERN_FIELDS = frozenset(['rowtype', 'parent', 'position', 'tags', 'type', 'uid'])
+
+
+class Node(MutableMapping):
+    __slots__ = NODE_FIELDS + ('_extra', )
+
+    def __init__(self, *args, **kw):
+        self._extra = None # Keys that are not in NODE_FIELDS
+        if args or kw:
+            self.update(*args, **kw)
+
+    def __getitem__(self, key):
+        if key in _FIELD_SET:
+            try:
+                value = getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+            return value
+        if self._extra is None:
+            raise KeyError(key)
+        return self._extra[key]
+
+    def __setitem__(self, key, value):
+        if key in _FIELD_SET:
+            if key == 'columns':
+                value = self._share_columns(value)
+            elif key == 'value':
+                self.value = value
+                columns = getattr(self, 'columns', None)
+                if type(columns) is list: # Columns set first, ie. by json order
+                    self._share_columns(columns)
+                return
+            elif key in _INTERN_FIELDS and type(value) is str:
+                value = sys.intern(value)
+            setattr(self, key, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __delitem__(self, key):
+        if key in _FIELD_SET:
+            try:
+                delattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        else:
+            if self._extra is None:
+                raise KeyError(key)
+            del self._extra[key]
+            if not self._extra:
+                self._extra = None
+
+    def __contains__(self, key):
+        if key in _FIELD_SET:
+            return hasattr(self, key)
+        return self._extra is not None and key in self._extra
+
+    def __iter__(self):
+        for key in NODE_FIELDS:
+            if hasattr(self, key):
+                yield key
+        if self._extra is not None:
+            yield from list(self._extra)
+
+    def __len__(self):
+        count = sum(1 for key in NODE_FIELDS if hasattr(self, key))
+        return count + (len(self._extra) if self._extra is not None else 0)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def copy(self):
+        return Node(self)
+
+    def __reduce__(self):
+        # copy, deepcopy and pickle all go through the plain dict
+        return Node, (dict(self), )
+
+    def __repr__(self):
+        return 'Node({!r})'.format(dict(self))
+
+    def _share_columns(self, columns):
+        # In place, columns that equal the value become the value's string, 
+        # and the others are interned. Columns stay the list they were given
+        if type(columns) is not list:
+            return columns
+        value = getattr(self, 'value', None)
+        for i, column in enumerate(columns):
+            if type(column) is str:
+                if type(value) is str and column == value:
+                    columns[i] = value
+                else:
+                    columns[i] = sys.intern(column)
+        return columns
+
+
+def node_json(obj):
+    # json.dump(..., default=node_json) writes a Node as the dict it stands for
+    if isinstance(obj, Node):
+        return dict(obj)
+    raise TypeError('Object of type {} is not JSON serializable'.format(
+                    type(obj).__name__))
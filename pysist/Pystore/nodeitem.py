@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+#  nodeitem.py
+#
+#  2020 Wharpus Web and Dev <wharpus@gmail.com>
+#
+
+'''
+What the indexes (ChildIndex, PathIndex, RefIndex) need of a node, so a
+store can keep it beside the node and a root can be indexed without
+decoding every node:
+
+    node_item('v1', {'parent': 'd1', 'text': 'name', 'value': 'Greg'})
+    # ('v1', 'd1', 4, 'name', None, None)
+
+node_item(uid, node) -- (uid, parent, size, name, target, order), size is
+its payload bytes, target the uid its 'ref' points at (or None) and order
+its order key (or None)
+payload_size(node) -- the bytes a node holds: its stored file's 'size',
+or its 'value' text. Tables hold none, their value is only a label.
+'''
+
+__all__ = ['node_item', 'payload_size', 'TABLE_TYPES']
+
+from .refindex import ref_target
+
+TABLE_TYPES = frozenset(['Root', 'Table', 'Dir'])
+
+
+def payload_size(node):
+    rowtype = node.get('rowtype', '').split()
+    if rowtype and rowtype[-1] in TABLE_TYPES:
+        return 0
+    size = node.get('size')
+    if size is None:
+        value = node.get('value', '')
+        size = len(value.encode('utf-8')) if isinstance(value, str) else 0
+    return size
+
+
+def node_item(uid, node):
+    return (uid, node.get('parent', ''), payload_size(node), node.get('text', ''),
+            ref_target(node.get('ref')), node.get('order'))
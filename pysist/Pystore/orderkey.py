@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+#  orderkey.py
+#
+#  2020 Wharpus Web and Dev <wharpus@gmail.com>
+#
+
+'''
+Fractional order keys, which keep siblings in order without numbering.
+
+A key is a string of base 62 digits read as a fraction, 'V' is about
+0.5, and keys sort as strings in the same order as the fractions. There
+is always a key between two others, so a node is put before, after or
+between its siblings by giving it one new key. No sibling is touched:
+
+    a = key_between(None, None) # 'V', the first key
+    b = key_between(a, None) # After a
+    c = key_between(a, b) # Between a and b
+    key_between(None, a) # Before a
+
+Keys never end in '0', as 'A' and 'A0' are the same fraction and there
+would be no key between them.
+
+Putting many nodes in the same gap one at a time makes keys longer, by
+about one digit per five or six. keys_between(a, b, n) spreads n keys
+over a gap at once (ie. a batch of imported files), so a key only gets
+about one digit longer each time n grows 62 times. even_keys(n) gives n
+short keys spread evenly, to rebalance a table whose keys got long.
+'''
+
+__all__ = ['key_between', 'keys_between', 'even_keys', 'DIGITS']
+
+DIGITS = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz'
+_BASE = len(DIGITS)
+
+
+def key_between(a, b):
+    # RETURNS: a key after a and before b. None for a is the start, for b the end
+    a = a or ''
+    if b is not None and a >= b:
+        raise ValueError("'{}' is not before '{}'".format(a, b))
+    if a.endswith('0') or (b is not None and b.endswith('0')):
+        raise ValueError("Order keys can't end in '0'")
+    return _midpoint(a, b)
+
+
+def keys_between(a, b, n):
+    # RETURNS: n keys, in order, after a and before b
+    if n <= 0:
+        return []
+    mid = key_between(a, b)
+    half = (n - 1) // 2
+    return keys_between(a, mid, half) + [mid] + keys_between(mid, b, n - 1 - half)
+
+
+def _midpoint(a, b):
+    if b is not None:
+        # Keep the digits a and b share (a is padded with '0's)
+        n = 0
+        while n < len(b) and (a[n] if n < len(a) else '0') == b[n]:
+            n += 1
+        if n > 0:
+            return b[:n] + _midpoint(a[n:], b[n:])
+    low = DIGITS.index(a[0]) if a else 0
+    high = DIGITS.index(b[0]) if b is not None else _BASE
+    if high - low > 1: # A digit fits between them
+        return DIGITS[(low + high) // 2]
+    if b is not None and len(b) > 1: # b's first digit alone is before b
+        return b[0]
+    return DIGITS[low] + _midpoint(a[1:], None)
+
+
+def even_keys(n):
+    # RETURNS: n keys, in order, as short as they can be and evenly spread
+    length = 1
+    while _BASE ** length <= n:
+        length += 1
+    scale = _BASE ** length
+    keys = []
+    for x in range(1, n + 1):
+        value = x * scale // (n + 1)
+        digits = []
+        for y in range(length):
+            value, digit = divmod(value, _BASE)
+            digits.append(DIGITS[digit])
+        keys.append(''.join(reversed(digits)).rstrip('0'))
+    return keys
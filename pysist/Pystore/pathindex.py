@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+#  pathindex.py
+#
+#  2020 Wharpus Web and Dev <wharpus@gmail.com>
+#
+
+'''
+The :class:`PathIndex` class finds nodes by path, ie. "root/Files/myName".
+
+A path is the names ('text') of a node and its parents, joined by '/'.
+The top node is named by its uid, 'root', as its text is only a title.
+A '/' or '\\' in a name is escaped with a '\\'.
+
+The index keeps each parent's children by name, so find() looks up one
+name per path part, however big the root is. A node's path is never
+stored, so rename(), move() and rekey() only change the node itself, and
+everything under it follows:
+
+    paths = PathIndex()
+    paths.add('root', '', 'ROOT')
+    paths.add('d1', 'root', 'Files')
+    paths.add('v1', 'd1', 'myName')
+    paths.find('root/Files/myName') # 'v1'
+    paths.path_of('v1') # 'root/Files/myName'
+    paths.under('root/Files') # [('root/Files/myName', 'v1')]
+
+Siblings can have the same name. find() gives the first one added, and
+find_all() all of them.
+'''
+
+__all__ = ['PathIndex', 'split_path', 'join_path']
+
+SEP = '/'
+ESC = '\\'
+
+
+def join_path(names):
+    return SEP.join(name.replace(ESC, ESC + ESC).replace(SEP, ESC + SEP)
+                    for name in names)
+
+
+def split_path(path):
+    # 'root/my\/name' -> ['root', 'my/name']
+    if ESC not in path:
+        return path.split(SEP)
+    parts = []
+    part = []
+    escaped = False
+    for char in path:
+        if escaped:
+            part.append(char)
+            escaped = False
+        elif char == ESC:
+            escaped = True
+        elif char == SEP:
+            parts.append(''.join(part))
+            part = []
+        else:
+            part.append(char)
+    parts.append(''.join(part))
+    return parts
+
+
+class PathIndex:
+
+    def __init__(self, items=()):
+        self.names = {} # uid: name
+        self.parents = {} # uid: parent uid
+        self.named = {} # parent uid: {name: uid, or [uids] of same named siblings}
+        for uid, parent, name in items:
+            self.add(uid, parent, name)
+
+    def __contains__(self, uid):
+        return uid in self.names
+
+    def __len__(self):
+        return len(self.names)
+
+    def add(self, uid, parent, name):
+        if uid in self.names:
+            raise KeyError("'{}' is already in the index".format(uid))
+        if parent == '':
+            name = uid
+        self.names[uid] = name
+        self.parents[uid] = parent
+        self._link(uid, parent, name)
+
+    def remove(self, uid):
+        # Remove uid and everything under it. RETURNS: the removed uids
+        self._unlink(uid, self.parents[uid], self.names[uid])
+        removed = []
+        stack = [uid]
+        while stack:
+            uid = stack.pop()
+            removed.append(uid)
+            del self.names[uid], self.parents[uid]
+            for found in self.named.pop(uid, {}).values():
+                stack.extend(found if isinstance(found, list) else (found, ))
+        return removed
+
+    def move(self, uid, parent):
+        # Reparent uid, its whole subtree's paths follow
+        name = self.names[uid]
+        self._unlink(uid, self.parents[uid], name)
+        self.parents[uid] = parent
+        self._link(uid, parent, name)
+
+    def rename(self, uid, name):
+        parent = self.parents[uid]
+        if parent == '': # Named by its uid
+            return
+        self._unlink(uid, parent, self.names[uid])
+        self.names[uid] = name
+        self._link(uid, parent, name)
+
+    def rekey(self, oldUID, newUID):
+        # Give a uid a new uid, its children follow it
+        if newUID in self.names:
+            raise KeyError("'{}' is already in the index".format(newUID))
+        parent = self.parents.pop(oldUID)
+        name = self.names.pop(oldUID)
+        self._unlink(oldUID, parent, name)
+        if parent == '':
+            name = newUID
+        self.names[newUID] = name
+        self.parents[newUID] = parent
+        self._link(newUID, parent, name)
+        kids = self.named.pop(oldUID, None)
+        if kids is not None:
+            self.named[newUID] = kids
+            for found in kids.values():
+                for child in (found if isinstance(found, list) else (found, )):
+                    self.parents[child] = newUID
+
+    def find(self, path):
+        # RETURNS: the uid at path, or None
+        uid = ''
+        named = self.named
+        for name in split_path(path):
+            found = named.get(uid, {}).get(name)
+            if found is None:
+                return None
+            uid = found[0] if isinstance(found, list) else found
+        return uid
+
+    def find_all(self, path):
+        # RETURNS: every uid at path, when siblings share a name
+        parts = split_path(path)
+        parent = self.find(join_path(parts[:-1])) if len(parts) > 1 else ''
+        if parent is None:
+            return []
+        found = self.named.get(parent, {}).get(parts[-1])
+        if found is None:
+            return []
+        return list(found) if isinstance(found, list) else [found]
+
+    def path_of(self, uid):
+        names = []
+        parents = self.parents
+        while uid in parents:
+            names.append(self.names[uid])
+            uid = parents[uid]
+        names.reverse()
+        return join_path(names)
+
+    def iter_under(self, path):
+        # (path, uid) of everything under path, parents before children
+        uid = self.find(path)
+        if uid is None:
+            return
+        stack = [(path, uid)]
+        while stack:
+            path, uid = stack.pop()
+            kids = []
+            for name, found in self.named.get(uid, {}).items():
+                childPath = path + SEP + join_path([name])
+                for child in (found if isinstance(found, list) else (found, )):
+                    kids.append((childPath, child))
+            yield from kids
+            stack.extend(reversed(kids))
+
+    def under(self, path):
+        return list(self.iter_under(path))
+
+    def _link(self, uid, parent, name):
+        names = self.named.setdefault(parent, {})
+        found = names.get(name)
+        if found is None:
+            names[name] = uid
+        elif isinstance(found, list):
+            found.append(uid)
+        else:
+            names[name] = [found, uid]
+
+    def _unlink(self, uid, parent, name):
+        names = self.named[parent]
+        found = names[name]
+        if isinstance(found, list):
+            found.remove(uid)
+            if len(found) == 1:
+                names[name] = found[0]
+        else:
+            del names[name]
+            if not names:
+                del self.named[parent]
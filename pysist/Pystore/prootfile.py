@@ -0,0 +1,413 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+#  prootfile.py
+#
+#  2020 Wharpus Web and Dev <wharpus@gmail.com>
+#
+
+'''
+The .proot binary root file format.
+
+A json root spells out "rowtype", "columns", "parent" ... for every
+node. A .proot file stores every dict key, and the values of fields that
+repeat a lot (rowtype, tags, type, parent, columns), once in a string
+table and refers to them by number. Each node is a length prefixed
+record, and a uid sorted index at the end of the file gives the offset
+and length of every record, so one node can be read without the others.
+An items section after it keeps every node's node_item(), so a root can
+be indexed without decoding its records.
+
+File layout (all numbers little endian):
+    header  -- magic, version, node count and the offsets below
+    records -- per node: u32 length, uid, node value
+    prefs   -- the prefs value
+    strings -- the string table
+    shapes  -- the key lists (as string numbers) of every dict
+    index   -- u32 count, count * (key offset, key length, record offset,
+               record length) sorted by uid, then the uid bytes
+    items   -- if flags has F_ITEMS: per node, in saved order, the list
+               [uid, parent, size, name, target, order]. Files without
+               one are still read, their items come from the records
+
+write_proot -- save nodes and prefs to a .proot file (atomically)
+read_proot -- load a whole .proot file
+    RETURNS: (nodes, prefs)
+load_proot -- read a .proot file into a ProotFile
+iter_proot -- yield (uid, node) in the order the nodes were saved
+json_to_proot / proot_to_json -- lossless conversion both ways
+'''
+
+import struct
+
+from .rootwriter import atomic_open, write_root
+from .rootreader import iter_root_file
+from .nodeitem import node_item
+
+__all__ = ['ProotFile', 'write_proot', 'read_proot', 'iter_proot', 'load_proot',
+        'json_to_proot', 'proot_to_json', 'is_proot_file', 'PROOT_VERSION']
+
+PROOT_MAGIC = b'PROOT\x00'
+PROOT_VERSION = 1
+F_ITEMS = 1 # The file ends with an items section
+
+# magic, version, flags, node count, records, prefs, strings, shapes, index
+HEADER = struct.Struct('<6sHHIQQQQQ')
+# uid offset (in the uid blob), uid length, record offset, record length
+INDEX_ENTRY = struct.Struct('<QIQI')
+RECORD_LEN = struct.Struct('<I')
+FLOAT = struct.Struct('<d')
+
+# Node fields whose string values are kept in the string table
+INTERN_FIELDS = frozenset(['rowtype', 'tags', 'type', 'parent', 'position', 'columns'])
+
+# Value type codes
+T_NONE, T_FALSE, T_TRUE, T_INT, T_FLOAT, T_STR, T_SREF, T_LIST, T_DICT = range(9)
+
+
+def _put_varint(out, n):
+    while n > 0x7F:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def _get_varint(buf, pos):
+    n = 0
+    shift = 0
+    while True:
+        b = buf[pos]
+        pos += 1
+        n |= (b & 0x7F) << shift
+        if b < 0x80:
+            return n, pos
+        shift += 7
+
+
+class _Encoder:
+
+    def __init__(self):
+        self.strings = {} # str: string number
+        self.shapes = {} # tuple of string numbers: shape number
+
+    def string_id(self, text):
+        sid = self.strings.get(text)
+        if sid is None:
+            sid = self.strings[text] = len(self.strings)
+        return sid
+
+    def encode(self, out, value, intern=False):
+        # bool before int, as True and False are ints too
+        if value is None:
+            out.append(T_NONE)
+        elif value is True:
+            out.append(T_TRUE)
+        elif value is False:
+            out.append(T_FALSE)
+        elif isinstance(value, str):
+            if intern:
+                out.append(T_SREF)
+                _put_varint(out, self.string_id(value))
+            else:
+                data = value.encode('utf-8')
+                out.append(T_STR)
+                _put_varint(out, len(data))
+                out += data
+        elif isinstance(value, int):
+            out.append(T_INT)
+            _put_varint(out, value << 1 if value >= 0 else (-value << 1) - 1)
+        elif isinstance(value, float):
+            out.append(T_FLOAT)
+            out += FLOAT.pack(value)
+        elif isinstance(value, (list, tuple)):
+            out.append(T_LIST)
+            _put_varint(out, len(value))
+            for item in value:
+                self.encode(out, item, intern)
+        elif hasattr(value, 'keys'):
+            keys = list(value.keys())
+            shape = tuple(self.string_id(key) for key in keys)
+            shapeId = self.shapes.get(shape)
+            if shapeId is None:
+                shapeId = self.shapes[shape] = len(self.shapes)
+            out.append(T_DICT)
+            _put_varint(out, shapeId)
+            for key in keys:
+                self.encode(out, value[key], key in INTERN_FIELDS)
+        else:
+            raise TypeError('Can not save a {} in a proot file'.format(type(value).__name__))
+
+    def table(self):
+        # The string table then the shape table, as bytes
+        out = bytearray()
+        _put_varint(out, len(self.strings))
+        for text in self.strings: # dicts keep the numbering order
+            data = text.encode('utf-8')
+            _put_varint(out, len(data))
+            out += data
+        shapesOut = bytearray()
+        _put_varint(shapesOut, len(self.shapes))
+        for shape in self.shapes:
+            _put_varint(shapesOut, len(shape))
+            for sid in shape:
+                _put_varint(shapesOut, sid)
+        return bytes(out), bytes(shapesOut)
+
+
+class _Decoder:
+
+    def __init__(self, strings, shapes):
+        self.strings = strings
+        self.shapes = shapes
+        self.decode = self._make_decode()
+
+    def _make_decode(self):
+        # One closure with the common cases inlined, as this is the hot loop
+        strings = self.strings
+        shapes = self.shapes
+        unpack_float = FLOAT.unpack_from
+
+        def decode(buf, pos):
+            # RETURNS: (value, position after the value)
+            code = buf[pos]
+            pos += 1
+            if code == T_DICT:
+                shapeId, pos = _get_varint(buf, pos)
+                value = {}
+                for key in shapes[shapeId]:
+                    # Strings and flags inline, saves a call per field
+                    code = buf[pos]
+                    if code == T_SREF and buf[pos + 1] < 0x80:
+                        value[key] = strings[buf[pos + 1]]
+                        pos += 2
+                    elif code == T_STR and buf[pos + 1] < 0x80:
+                        end = pos + 2 + buf[pos + 1]
+                        value[key] = bytes(buf[pos + 2:end]).decode('utf-8')
+                        pos = end
+                    elif code == T_TRUE or code == T_FALSE:
+                        value[key] = code == T_TRUE
+                        pos += 1
+                    else:
+                        value[key], pos = decode(buf, pos)
+                return value, pos
+            if code == T_LIST:
+                count, pos = _get_varint(buf, pos)
+                value = []
+                for x in range(count):
+                    item, pos = decode(buf, pos)
+                    value.append(item)
+                return value, pos
+            if code == T_SREF:
+                sid, pos = _get_varint(buf, pos)
+                return strings[sid], pos
+            if code == T_STR:
+                size, pos = _get_varint(buf, pos)
+                return bytes(buf[pos:pos + size]).decode('utf-8'), pos + size
+            if code == T_INT:
+                n, pos = _get_varint(buf, pos)
+                return (n >> 1) if not n & 1 else -((n + 1) >> 1), pos
+            if code == T_TRUE:
+                return True, pos
+            if code == T_FALSE:
+                return False, pos
+            if code == T_FLOAT:
+                return unpack_float(buf, pos)[0], pos + FLOAT.size
+            if code == T_NONE:
+                return None, pos
+            raise ValueError('Unknown proot value type {} at byte {}'.format(code, pos - 1))
+
+        return decode
+
+    def record(self, buf, pos=0):
+        # RETURNS: (uid, node) of the record (without its length) at pos
+        uid, pos = self.decode(buf, pos)
+        node, pos = self.decode(buf, pos)
+        return uid, node
+
+
+def _read_strings(buf, pos):
+    count, pos = _get_varint(buf, pos)
+    strings = []
+    for x in range(count):
+        size, pos = _get_varint(buf, pos)
+        strings.append(bytes(buf[pos:pos + size]).decode('utf-8'))
+        pos += size
+    return strings
+
+
+def _read_shapes(buf, pos, strings):
+    count, pos = _get_varint(buf, pos)
+    shapes = []
+    for x in range(count):
+        size, pos = _get_varint(buf, pos)
+        shape = []
+        for y in range(size):
+            sid, pos = _get_varint(buf, pos)
+            shape.append(strings[sid])
+        shapes.append(tuple(shape))
+    return shapes
+
+
+def is_proot_file(FILE):
+    with open(FILE, 'rb') as prootfile:
+        return prootfile.read(len(PROOT_MAGIC)) == PROOT_MAGIC
+
+
+class ProotFile:
+    '''
+    The parsed header, string table and shapes of a .proot file held in
+    buf (bytes, or a mmap). Records are decoded only when asked for.
+    '''
+
+    def __init__(self, buf):
+        self.buf = buf
+        (magic, version, self.flags, self.count, self.recordsOffset, self.prefsOffset,
+            self.stringsOffset, self.shapesOffset, self.indexOffset) = HEADER.unpack_from(buf, 0)
+        if magic != PROOT_MAGIC:
+            raise ValueError('Not a proot file')
+        if version > PROOT_VERSION:
+            raise ValueError('proot file version {} is newer than {}'.format(
+                                version, PROOT_VERSION))
+        self.version = version
+        strings = _read_strings(buf, self.stringsOffset)
+        self.decoder = _Decoder(strings, _read_shapes(buf, self.shapesOffset, strings))
+        self.itemsOffset = None
+        if self.flags & F_ITEMS: # Right after the index's uid bytes
+            keysLen = 0
+            if self.count:
+                keyOffset, keyLen = INDEX_ENTRY.unpack_from(
+                        buf, self.indexOffset + 4 + (self.count - 1) * INDEX_ENTRY.size)[:2]
+                keysLen = keyOffset + keyLen
+            self.itemsOffset = self.indexOffset + 4 + self.count * INDEX_ENTRY.size + keysLen
+
+    def prefs(self):
+        return self.decoder.decode(self.buf, self.prefsOffset)[0]
+
+    def record_at(self, offset, length=None):
+        # Decode the record starting at offset (its length prefix)
+        if length is None:
+            length = RECORD_LEN.unpack_from(self.buf, offset)[0]
+        return self.decoder.record(self.buf, offset + RECORD_LEN.size)
+
+    def __iter__(self):
+        # (uid, node) in saved order
+        buf = self.buf
+        pos = self.recordsOffset
+        for x in range(self.count):
+            length = RECORD_LEN.unpack_from(buf, pos)[0]
+            pos += RECORD_LEN.size
+            yield self.decoder.record(buf, pos)
+            pos += length
+
+    def index_entry(self, i):
+        # RETURNS: (uid bytes, record offset, record length) of index entry i
+        keyOffset, keyLen, recOffset, recLen = INDEX_ENTRY.unpack_from(
+                        self.buf, self.indexOffset + 4 + i * INDEX_ENTRY.size)
+        start = self.indexOffset + 4 + self.count * INDEX_ENTRY.size + keyOffset
+        return bytes(self.buf[start:start + keyLen]), recOffset, recLen
+
+    def iter_items(self):
+        # node_item()s in saved order, without decoding any record (but for
+        # a file written without an items section)
+        if self.itemsOffset is None:
+            for uid, node in self:
+                yield node_item(uid, node)
+            return
+        buf = self.buf
+        decode = self.decoder.decode
+        pos = self.itemsOffset
+        for x in range(self.count):
+            item, pos = decode(buf, pos)
+            yield tuple(item)
+
+
+def write_proot(FILE, nodes, prefs):
+    # Returns the number of bytes written
+    encoder = _Encoder()
+    index = [] # (uid bytes, record offset, record length)
+    items = bytearray() # The items section, strings are numbered as it is made
+    with atomic_open(FILE, 'wb') as outfile:
+        outfile.write(b'\0' * HEADER.size) # filled in at the end
+        pos = HEADER.size
+        chunk = bytearray()
+        for uid in nodes:
+            node = nodes[uid]
+            record = bytearray()
+            encoder.encode(record, uid)
+            encoder.encode(record, node)
+            uid, parent, size, name, target, order = node_item(uid, node)
+            items.append(T_LIST)
+            _put_varint(items, 6)
+            encoder.encode(items, uid)
+            encoder.encode(items, parent, True) # Parents repeat, as in records
+            for value in (size, name, target, order):
+                encoder.encode(items, value)
+            index.append((uid.encode('utf-8'), pos, len(record)))
+            chunk += RECORD_LEN.pack(len(record))
+            chunk += record
+            pos += RECORD_LEN.size + len(record)
+            if len(chunk) >= 1 << 16:
+                outfile.write(chunk)
+                chunk = bytearray()
+        outfile.write(chunk)
+
+        prefsOffset = pos
+        prefsOut = bytearray()
+        encoder.encode(prefsOut, prefs)
+        outfile.write(prefsOut)
+        pos += len(prefsOut)
+
+        strings, shapes = encoder.table()
+        stringsOffset = pos
+        outfile.write(strings)
+        pos += len(strings)
+        shapesOffset = pos
+        outfile.write(shapes)
+        pos += len(shapes)
+
+        indexOffset = pos
+        index.sort()
+        entries = bytearray(struct.pack('<I', len(index)))
+        keys = bytearray()
+        for uid, recOffset, recLen in index:
+            entries += INDEX_ENTRY.pack(len(keys), len(uid), recOffset, recLen)
+            keys += uid
+        outfile.write(entries)
+        outfile.write(keys)
+        outfile.write(items)
+        pos += len(entries) + len(keys) + len(items)
+
+        outfile.seek(0)
+        outfile.write(HEADER.pack(PROOT_MAGIC, PROOT_VERSION, F_ITEMS, len(index), HEADER.size,
+                        prefsOffset, stringsOffset, shapesOffset, indexOffset))
+    return pos
+
+
+def load_proot(FILE):
+    with open(FILE, 'rb') as prootfile:
+        return ProotFile(prootfile.read())
+
+
+def iter_proot(FILE):
+    yield from load_proot(FILE)
+
+
+def read_proot(FILE):
+    proot = load_proot(FILE)
+    return dict(proot), proot.prefs()
+
+
+def json_to_proot(jsonFILE, prootFILE, N_KEY='nodes', P_KEY='prefs'):
+    nodes = {}
+    prefs = {}
+    for key, uid, value in iter_root_file(jsonFILE, N_KEY):
+        if key == N_KEY:
+            nodes[uid] = value
+        elif key == P_KEY:
+            prefs = value
+    return write_proot(prootFILE, nodes, prefs)
+
+
+def proot_to_json(prootFILE, jsonFILE, N_KEY='nodes', P_KEY='prefs', compact=False):
+    nodes, prefs = read_proot(prootFILE)
+    return write_root(jsonFILE, nodes, prefs, N_KEY, P_KEY, compact)
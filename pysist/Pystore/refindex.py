@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+#  refindex.py
+#
+#  2020 Wharpus Web and Dev <wharpus@gmail.com>
+#
+
+'''
+The :class:`RefIndex` class is the reverse index of node refs.
+
+A node's 'ref' can point at another node, ie. "nodes:v1:value" (a field
+of node v1 of the 'nodes' store) or "tablename:uid". The uid is always
+the second part. Other refs, such as file paths, point at no node.
+
+RefIndex keeps the uid each node's ref points at, and for each uid the
+nodes that point at it, so "who refers to v1" is a dict lookup instead
+of a scan of every ref:
+
+    refs = RefIndex()
+    refs.set('i1', ref_target('nodes:v1:value')) # i1 points at v1
+    refs.referrers_of('v1') # {'i1'}
+    for uid in refs.rekey('v1', 'v2'): # v1 is now called v2
+        node = nodes[uid]
+        node['ref'] = retarget_ref(node['ref'], 'v1', 'v2')
+'''
+
+__all__ = ['RefIndex', 'ref_target', 'retarget_ref']
+
+REF_SEP = ':'
+
+
+def ref_target(ref):
+    # RETURNS: the uid a ref points at, or None
+    if not isinstance(ref, str) or REF_SEP not in ref:
+        return None
+    parts = ref.split(REF_SEP)
+    store, uid = parts[0], parts[1]
+    if not store or not uid:
+        return None
+    for char in '/\\.': # A path, ie. 'C:\\files' or 'http://...'
+        if char in store or char in uid:
+            return None
+    return uid
+
+
+def retarget_ref(ref, oldUID, newUID):
+    # A ref that points at oldUID, made to point at newUID
+    parts = ref.split(REF_SEP)
+    if len(parts) > 1 and parts[1] == oldUID:
+        parts[1] = newUID
+    return REF_SEP.join(parts)
+
+
+class RefIndex:
+
+    def __init__(self):
+        self.targets = {} # uid: uid its ref points at
+        self.referrers = {} # uid: {uids whose refs point at it}
+
+    def __len__(self):
+        return len(self.targets)
+
+    def set(self, uid, target):
+        # Note where uid's ref points now, None for nowhere
+        old = self.targets.get(uid)
+        if old == target:
+            return
+        if old is not None:
+            del self.targets[uid]
+            self._unlink(uid, old)
+        if target is not None:
+            self.targets[uid] = target
+            self.referrers.setdefault(target, set()).add(uid)
+
+    def discard(self, uid):
+        # uid is gone. Refs that point at it are left, they just dangle
+        self.set(uid, None)
+
+    def target_of(self, uid):
+        return self.targets.get(uid)
+
+    def referrers_of(self, uid):
+        return set(self.referrers.get(uid, ()))
+
+    def rekey(self, oldUID, newUID):
+        # oldUID is now called newUID, both as a ref holder and a target.
+        # RETURNS: the uids (new names) whose ref strings must be rewritten
+        target = self.targets.pop(oldUID, None)
+        if target is not None:
+            self._unlink(oldUID, target)
+        refs = self.referrers.pop(oldUID, set())
+        for uid in refs:
+            self.targets[uid] = newUID
+        if refs:
+            self.referrers.setdefault(newUID, set()).update(refs)
+        refs = set(refs)
+        if target == oldUID: # Its ref points at itself
+            target = newUID
+            refs.add(newUID)
+        if target is not None:
+            self.targets[newUID] = target
+            self.referrers.setdefault(target, set()).add(newUID)
+        return refs
+
+    def _unlink(self, uid, target):
+        refs = self.referrers[target]
+        refs.discard(uid)
+        if not refs:
+            del self.referrers[target]
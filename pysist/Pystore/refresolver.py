@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+#  refresolver.py
+#
+#  2020 Wharpus Web and Dev <wharpus@gmail.com>
+#
+
+'''
+The :class:`RefResolver` class resolves node refs to the values they
+point at, and remembers them until a node they were read from changes.
+
+A ref is "store:uid:field", the field of node uid, or "store:uid", the
+node itself. Like RefIndex, every node ref points into the open root's
+nodes, the store part only names where it lives. A node reached by a
+"store:uid" ref resolves through its own ref if it has one, else to its
+'value', so refs can be chained:
+
+    nodes = {'a': {'ref': 'nodes:b'}, 'b': {'ref': 'nodes:c:value'},
+             'c': {'value': 'Greg'}}
+    refs = RefResolver(nodes)
+    refs.resolve('a') # 'Greg', read from a, b and c
+    nodes['c']['value'] = 'Bob'
+    refs.invalidate('c') # {'a', 'b'}, the memos that read c
+    refs.resolve('a') # 'Bob'
+
+Each ref string is parsed once per root, attach() starts over. resolve()
+raises RefCycleError when a chain comes back to itself, and KeyError when
+it points at a node that isn't there (maybe not loaded yet). Both are
+remembered like values, as the error's type and args, so each resolve()
+raises a new exception. They are forgotten by invalidate() of any node
+in the chain, or the missing one.
+'''
+
+__all__ = ['RefResolver', 'RefCycleError', 'parse_ref']
+
+from .refindex import ref_target, REF_SEP
+
+VALUE = 'value' # The field a "store:uid" ref gives, when uid has no ref
+
+
+class RefCycleError(ValueError):
+
+    def __init__(self, cycle):
+        self.cycle = cycle # The uids in the cycle, in ref order
+        super().__init__("Refs go round in a cycle: {}".format(
+                            ' -> '.join(cycle + cycle[:1])))
+
+
+def parse_ref(ref):
+    # RETURNS: (uid, field) a node ref points at, field None for the whole
+    # node, or None when it points at no node (ie. a file path)
+    uid = ref_target(ref)
+    if uid is None:
+        return None
+    parts = ref.split(REF_SEP, 2)
+    return (uid, parts[2] if len(parts) > 2 and parts[2] else None)
+
+
+class RefResolver:
+
+    def __init__(self, nodes=None):
+        self.nodes = nodes
+        self.parsed = {} # ref string: parse_ref()
+        self.memo = {} # uid: (value, (error type, args) or None) its ref resolved to
+        self.reads = {} # uid: uids its memo was read from
+        self.readers = {} # uid: uids whose memos were read from it
+
+    def __len__(self):
+        return len(self.memo)
+
+    def attach(self, nodes):
+        # Resolve against another root's nodes, and forget this one's refs
+        self.nodes = nodes
+        self.parsed.clear()
+        self.clear()
+
+    def clear(self):
+        self.memo.clear()
+        self.reads.clear()
+        self.readers.clear()
+
+    def parse(self, ref):
+        try:
+            return self.parsed[ref]
+        except KeyError:
+            pass
+        except TypeError: # Not a string
+            return None
+        parsed = self.parsed[ref] = parse_ref(ref)
+        return parsed
+
+    def has_ref(self, uid):
+        # RETURNS: True if uid's ref points at a node
+        node = self._node(uid)
+        return node is not None and self.parse(node.get('ref')) is not None
+
+    def resolve(self, uid):
+        # RETURNS: the value uid's ref points at, or None if it has no node
+        # ref. Raises RefCycleError or KeyError, see above
+        if uid not in self.memo:
+            if not self.has_ref(uid):
+                return None
+            self._resolve(uid)
+        value, error = self.memo[uid]
+        if error is not None:
+            errorType, args = error
+            raise errorType(*args)
+        return value
+
+    def invalidate(self, uid):
+        # uid changed, was added or was deleted. Forget every memo read
+        # from it. RETURNS: the uids whose memos were forgotten
+        forgotten = self.readers.pop(uid, set())
+        for reader in forgotten:
+            del self.memo[reader]
+            for read in self.reads.pop(reader):
+                if read != uid:
+                    readers = self.readers[read]
+                    readers.discard(reader)
+                    if not readers:
+                        del self.readers[read]
+        return forgotten
+
+    def _node(self, uid):
+        try:
+            return self.nodes[uid]
+        except KeyError:
+            return None
+
+    def _resolve(self, uid):
+        # Follow uid's chain of refs, then remember the result for every
+        # node on it that has a ref
+        chain = [] # uids with a node ref, in the order they were followed
+        read = set() # Other uids the result was read from
+        value = error = None
+        while True:
+            if uid in chain:
+                cycle = chain[chain.index(uid):]
+                error = (RefCycleError, (cycle, ))
+                read.update(cycle)
+                break
+            if chain and uid in self.memo: # Resolved before, from another ref
+                value, error = self.memo[uid]
+                read.update(self.reads[uid])
+                break
+            node = self._node(uid)
+            if node is None:
+                error = (KeyError, (uid, ))
+                read.add(uid)
+                break
+            target = self.parse(node.get('ref'))
+            if target is None: # The end of a "store:uid" chain
+                value = node.get(VALUE)
+                read.add(uid)
+                break
+            chain.append(uid)
+            uid, field = target
+            if field is not None:
+                node = self._node(uid)
+                read.add(uid)
+                if node is None:
+                    error = (KeyError, (uid, ))
+                else:
+                    value = node.get(field)
+                break
+        for x in range(len(chain)):
+            self._remember(chain[x], value, error, read.union(chain[x:]))
+
+    def _remember(self, uid, value, error, read):
+        self.memo[uid] = (value, error)
+        self.reads[uid] = read
+        for other in read:
+            self.readers.setdefault(other, set()).add(uid)
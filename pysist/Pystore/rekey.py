@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+#  rekey.py
+#
+#  2020 Wharpus Web and Dev <wharpus@gmail.com>
+#
+
+'''
+rekey_node gives a node a new uid, in the nodes and in the indexes kept
+of them (ChildIndex, PathIndex and RefIndex). Only the node itself, its
+direct children's 'parent' and the refs that point at it change, all
+found by the indexes, so re-keying a big table doesn't scan the root:
+
+    kids, refs = rekey_node(nodes, children, paths, refs, 'd1', 'T1')
+    # kids: ['f1', 'v1'], whose 'parent' is now 'T1'
+    # refs: {'i1'}, whose 'ref' now points at 'T1'
+
+The caller saves the changed nodes, and shows them. rekey_node raises
+ValueError when the new uid is already in use, or when partial is True:
+while nodes doesn't hold the whole root (it is loading, or its load
+stopped), the nodes not read yet may still name the old uid as their
+parent or in a ref, and would be orphaned. It raises KeyError when the
+old uid isn't there. Either way, before anything has changed.
+'''
+
+__all__ = ['rekey_node']
+
+from .refindex import retarget_ref
+
+
+def rekey_node(nodes, children, paths, refs, oldUID, newUID, partial=False):
+    # RETURNS: (kids, refs) the uids of oldUID's direct children, and of
+    # the nodes whose ref was pointed at newUID (maybe newUID itself)
+    if partial:
+        raise ValueError("the root is not fully loaded")
+    if newUID in nodes:
+        raise ValueError("'{}' is already in use".format(newUID))
+    node = nodes[oldUID]
+    node['uid'] = newUID
+    nodes[newUID] = node
+    del nodes[oldUID]
+    kids = list(children.children_of(oldUID))
+    for child in kids:
+        nodes[child]['parent'] = newUID
+    children.rename(oldUID, newUID)
+    paths.rekey(oldUID, newUID)
+    changed = refs.rekey(oldUID, newUID)
+    for uid in changed:
+        nodes[uid]['ref'] = retarget_ref(nodes[uid]['ref'], oldUID, newUID)
+    return kids, changed
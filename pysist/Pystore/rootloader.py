@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+#  rootloader.py
+#
+#  2020 Wharpus Web and Dev <wharpus@gmail.com>
+#
+
+'''
+The :class:`RootLoader` class reads a root on a worker thread, so the
+window is shown (and can be used) while a big root is still loading.
+
+The reading is done by a generator function, produce(loader), that
+yields (kind, value) messages, ie. ('nodes', [(uid, parent), ...]) or
+('progress', ...). The worker puts them in a bounded queue, and the Tk
+thread collects them a batch at a time from an after() callback:
+
+    loader = RootLoader(produce)
+    loader.start()
+    ...
+    for kind, value in loader.results(20):
+        handle(kind, value)
+    if loader.is_done():
+        ...
+
+An exception in produce() arrives as an ('error', err) message. cancel()
+stops the worker at its next message, and closes the generator, so the
+files it has open are closed.
+'''
+
+import queue
+import threading
+
+__all__ = ['RootLoader']
+
+
+class RootLoader:
+
+    def __init__(self, produce, queueSize=64):
+        self.produce = produce
+        self.messages = queue.Queue(queueSize)
+        self.cancelled = threading.Event()
+        self.finished = threading.Event()
+        self.thread = None
+        self.error = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, name='root-loader',
+                                       daemon=True)
+        self.thread.start()
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def is_cancelled(self):
+        return self.cancelled.is_set()
+
+    def is_done(self):
+        # True when the worker has finished and every message was collected
+        return self.finished.is_set() and self.messages.empty()
+
+    def results(self, maxItems=20):
+        # Collect up to maxItems messages without waiting
+        messages = []
+        while len(messages) < maxItems:
+            try:
+                messages.append(self.messages.get_nowait())
+            except queue.Empty:
+                break
+        return messages
+
+    def wait(self, timeout=None):
+        if self.thread is not None:
+            self.thread.join(timeout)
+
+    def _put(self, message):
+        # A put that gives up when the load is cancelled
+        while not self.cancelled.is_set():
+            try:
+                self.messages.put(message, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _run(self):
+        messages = self.produce(self)
+        try:
+            for message in messages:
+                if not self._put(message):
+                    break
+        except Exception as err:
+            self.error = err
+            self._put(('error', err))
+        finally:
+            close = getattr(messages, 'close', None)
+            if close is not None:
+                close()
+            self.finished.set()
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+#  rootreader.py
+#
+#  2020 Wharpus Web and Dev <wharpus@gmail.com>
+#
+
+'''
+Streaming root reading.
+
+iter_root -- parse a json root file a chunk at a time and yield each
+node of the nodes object as soon as it has been read, so nothing has to
+wait for (or hold) the whole parsed document.
+    YIELDS: (N_KEY, uid, node) for each node, in file order, and
+            (key, None, value) for every other top level key (ie. prefs).
+
+iter_root_batches -- the same, but nodes come in lists of batchSize.
+    YIELDS: (N_KEY, [(uid, node), ...]) and (key, value)
+
+batch_root -- batch what iter_root yields, for callers with their own
+file object (ie. to see how far through the file they are).
+'''
+
+import re
+import json
+
+__all__ = ['iter_root', 'iter_root_file', 'iter_root_batches', 'batch_root']
+
+CHUNK_SIZE = 1 << 16 # Characters to read at a time
+
+_WS = re.compile(r'[ \t\n\r]*')
+_NUMBER_TAIL = '0123456789.eE+-' # Chars that could still follow a number
+_decoder = json.JSONDecoder()
+
+
+class _Reader:
+    # A growable text buffer over a file that json values are decoded from
+
+    def __init__(self, fileobj, chunkSize=CHUNK_SIZE):
+        self.fileobj = fileobj
+        self.chunkSize = chunkSize
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+        self.consumed = 0 # characters before buf[0], for progress
+
+    def more(self, size=None):
+        # Read more text, dropping what has already been parsed
+        if self.eof:
+            return False
+        data = self.fileobj.read(size or self.chunkSize)
+        if not data:
+            self.eof = True
+            return False
+        self.consumed += self.pos
+        self.buf = self.buf[self.pos:] + data
+        self.pos = 0
+        return True
+
+    def skip_ws(self):
+        while True:
+            self.pos = _WS.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf) or not self.more():
+                return
+
+    def peek(self):
+        self.skip_ws()
+        if self.pos >= len(self.buf):
+            raise ValueError('Unexpected end of root file')
+        return self.buf[self.pos]
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError("Expected '{}' at char {} of root file".format(
+                                char, self.consumed + self.pos))
+        self.pos += 1
+
+    def value(self):
+        # Decode one json value, reading more until all of it is in buf
+        self.skip_ws()
+        size = self.chunkSize
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buf, self.pos)
+                # A number at the very end of buf might still be cut short
+                if self.eof or (end < len(self.buf) and self.buf[end] not in _NUMBER_TAIL):
+                    self.pos = end
+                    return value
+            except ValueError:
+                if self.eof:
+                    raise
+            if not self.more(size):
+                continue # Now at eof, try one last time
+            size = min(size * 2, 1 << 24) # Big values read in bigger bites
+
+    def tell(self):
+        return self.consumed + self.pos
+
+
+def iter_root(fileobj, N_KEY='nodes', chunkSize=CHUNK_SIZE):
+    reader = _Reader(fileobj, chunkSize)
+    reader.expect('{')
+    if reader.peek() == '}':
+        return
+    while True:
+        key = reader.value()
+        reader.expect(':')
+        if key == N_KEY and reader.peek() == '{':
+            reader.expect('{')
+            if reader.peek() == '}':
+                reader.pos += 1
+            else:
+                while True:
+                    uid = reader.value()
+                    reader.expect(':')
+                    yield N_KEY, uid, reader.value()
+                    if reader.peek() == ',':
+                        reader.pos += 1
+                        continue
+                    reader.expect('}')
+                    break
+        else:
+            yield key, None, reader.value()
+        if reader.peek() == ',':
+            reader.pos += 1
+            continue
+        reader.expect('}')
+        return
+
+
+def iter_root_file(FILE, N_KEY='nodes', chunkSize=CHUNK_SIZE):
+    with open(FILE) as json_file:
+        yield from iter_root(json_file, N_KEY, chunkSize)
+
+
+def iter_root_batches(FILE, N_KEY='nodes', batchSize=500, chunkSize=CHUNK_SIZE):
+    yield from batch_root(iter_root_file(FILE, N_KEY, chunkSize), N_KEY, batchSize)
+
+
+def batch_root(items, N_KEY='nodes', batchSize=500):
+    batch = []
+    for key, uid, value in items:
+        if key == N_KEY:
+            batch.append((uid, value))
+            if len(batch) >= batchSize:
+                yield N_KEY, batch
+                batch = []
+            continue
+        if batch:
+            yield N_KEY, batch
+            batch = []
+        yield key, value
+    if batch:
+        yield N_KEY, batch
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+#  rootwriter.py
+#
+#  2020 Wharpus Web and Dev <wharpus@gmail.com>
+#
+
+'''
+Crash safe root writing.
+
+atomic_open -- write to a temp file next to FILE, fsync it, then
+rename it over FILE. A crash or a full disk leaves the old FILE as is.
+
+iter_root_json -- encode a root one node at a time. With compact=False
+the text is the same as json.dump(root, indent=2), with compact=True
+there is no indenting or spacing at all.
+
+write_root -- atomic_open + iter_root_json, written in chunks.
+'''
+
+import os
+import json
+import tempfile
+from contextlib import contextmanager
+
+from .node import node_json
+
+__all__ = ['atomic_open', 'iter_root_json', 'write_root']
+
+CHUNK_SIZE = 1 << 16 # Bytes of json to gather before each write
+
+
+@contextmanager
+def atomic_open(FILE, mode='w'):
+    folder = os.path.dirname(os.path.abspath(FILE))
+    fd, temppath = tempfile.mkstemp(dir=folder, suffix='.tmp',
+                                    prefix='.{}.'.format(os.path.basename(FILE)))
+    try:
+        with os.fdopen(fd, mode) as outfile:
+            yield outfile
+            outfile.flush()
+            os.fsync(outfile.fileno())
+        if os.path.isfile(FILE): # Keep the old file's permissions
+            os.chmod(temppath, os.stat(FILE).st_mode & 0o7777)
+        os.replace(temppath, FILE)
+    except BaseException:
+        if os.path.exists(temppath):
+            os.remove(temppath)
+        raise
+    _fsync_dir(folder) # Make the rename itself durable
+
+
+def _fsync_dir(folder):
+    if not hasattr(os, 'O_DIRECTORY'): # Windows can't open folders
+        return
+    fd = os.open(folder, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def iter_root_json(nodes, prefs, N_KEY='nodes', P_KEY='prefs', compact=False):
+    if compact:
+        def encode(obj, level):
+            return json.dumps(obj, ensure_ascii=True, separators=(',', ':'),
+                              default=node_json)
+        newline = lambda level: ''
+        colon = ':'
+    else:
+        # json strings can't hold a raw newline, so re-indenting is safe
+        def encode(obj, level):
+            return json.dumps(obj, ensure_ascii=True, indent=2,
+                              default=node_json).replace('\n', '\n' + '  ' * level)
+        newline = lambda level: '\n' + '  ' * level
+        colon = ': '
+
+    yield '{' + newline(1) + encode(N_KEY, 1) + colon + '{'
+    first = True
+    for uid in nodes:
+        yield ('' if first else ',') + newline(2) + encode(uid, 2) + colon
+        yield encode(nodes[uid], 2)
+        first = False
+    yield ('}' if first else newline(1) + '}') + ','
+    yield newline(1) + encode(P_KEY, 1) + colon + encode(prefs, 1)
+    yield newline(0) + '}'
+
+
+def write_root(FILE, nodes, prefs, N_KEY='nodes', P_KEY='prefs', compact=False):
+    # Returns the number of characters written
+    written = 0
+    with atomic_open(FILE) as outfile:
+        chunk = []
+        size = 0
+        for text in iter_root_json(nodes, prefs, N_KEY, P_KEY, compact):
+            chunk.append(text)
+            size += len(text)
+            if size >= CHUNK_SIZE:
+                outfile.write(''.join(chunk))
+                written += size
+                chunk = []
+                size = 0
+        outfile.write(''.join(chunk))
+        written += size
+    return written
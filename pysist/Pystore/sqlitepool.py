@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+#  sqlitepool.py
+#
+#  2020 Wharpus Web and Dev <wharpus@gmail.com>
+#
+
+'''
+The :class:`SqliteManager` class owns every connection to one sqlite3
+database file (ie. B.D_PATH, './data/root.sqlite').
+
+The database is put in WAL mode, so readers never block the writer and
+the writer never blocks readers.
+
+Writes -- one writer thread, with the only writable connection, takes
+writes from a queue. Every write waiting in the queue (up to batchSize)
+is run in one transaction, so many small writes cost one commit and one
+fsync. write() returns a :class:`SqliteWrite` that can be waited on.
+
+Reads -- a pool of read only connections, shared by any thread:
+
+    with manager.reading() as conn:
+        rows = conn.execute('SELECT nid FROM nodes').fetchall()
+'''
+
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+__all__ = ['SqliteManager', 'SqliteWrite']
+
+_STOP = object() # Tells the writer thread to finish
+
+
+class SqliteWrite:
+    # A queued write, run by the writer thread as fn(conn)
+
+    def __init__(self, fn, alone=False):
+        self.fn = fn
+        self.alone = alone # Run in a transaction of its own
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+    def is_done(self):
+        return self.done.is_set()
+
+    def wait(self, timeout=None):
+        # RETURNS: fn's result, or raises the error fn raised
+        if not self.done.wait(timeout):
+            raise TimeoutError('sqlite3 write did not finish in time')
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+class SqliteManager:
+
+    def __init__(self, FILE='./data/root.sqlite', readers=4, batchSize=1000):
+        self.FILE = FILE
+        self.readers = readers # Most read only connections to keep open
+        self.batchSize = batchSize # Most writes in one transaction
+        self.writes = queue.Queue()
+        self.pool = queue.LifoQueue()
+        self.opened = 0 # Read only connections made so far
+        self.lock = threading.Lock()
+        self.writer = None
+        self.commits = 0 # Transactions committed, for stats
+        self.open()
+
+    def open(self):
+        folder = os.path.dirname(self.FILE)
+        if folder and not os.path.isdir(folder):
+            os.makedirs(folder)
+        ready = SqliteWrite(None)
+        self.writer = threading.Thread(target=self._write_loop, args=(ready, ),
+                                       name='sqlite-writer', daemon=True)
+        self.writer.start()
+        ready.wait() # Raises here if the database can't be opened
+
+    def close(self):
+        if self.writer is not None:
+            self.writes.put(_STOP)
+            self.writer.join()
+            self.writer = None
+        while True:
+            try:
+                self.pool.get_nowait().close()
+            except queue.Empty:
+                break
+        self.opened = 0
+
+    def connect(self, readOnly=False):
+        if readOnly:
+            uri = 'file:{}?mode=ro'.format(os.path.abspath(self.FILE))
+            conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            conn.execute('PRAGMA query_only = ON')
+            return conn
+        conn = sqlite3.connect(self.FILE, check_same_thread=False)
+        conn.execute('PRAGMA journal_mode = WAL')
+        conn.execute('PRAGMA synchronous = NORMAL') # WAL is still crash safe
+        return conn
+
+    # Writes
+    def write(self, sql, params=()):
+        return self.submit(lambda conn: conn.execute(sql, params).rowcount)
+
+    def write_many(self, sql, seq):
+        return self.submit(lambda conn: conn.executemany(sql, seq).rowcount)
+
+    def write_script(self, script):
+        # Note: executescript() commits first, so it is run on its own
+        return self.submit(lambda conn: conn.executescript(script), alone=True)
+
+    def submit(self, fn, alone=False):
+        # Queue fn(conn) to run in the writer's next transaction
+        if self.writer is None:
+            raise RuntimeError('SqliteManager is closed')
+        write = SqliteWrite(fn, alone)
+        self.writes.put(write)
+        return write
+
+    def sync(self):
+        # Wait until every write queued so far has been committed
+        return self.submit(lambda conn: None).wait()
+
+    def _write_loop(self, ready):
+        try:
+            conn = self.connect()
+        except Exception as err:
+            ready.error = err
+            ready.done.set()
+            return
+        ready.done.set()
+        carry = None # A write that could not join the last batch
+        try:
+            while True:
+                write = carry or self.writes.get()
+                carry = None
+                if write is _STOP:
+                    return
+                if write.alone:
+                    self._commit_each(conn, [write])
+                    continue
+                batch = [write]
+                while len(batch) < self.batchSize:
+                    try:
+                        write = self.writes.get_nowait()
+                    except queue.Empty:
+                        break
+                    if write is _STOP or write.alone:
+                        carry = write
+                        break
+                    batch.append(write)
+                self._commit(conn, batch)
+        finally:
+            conn.close()
+
+    def _commit(self, conn, batch):
+        try:
+            with conn:
+                results = [write.fn(conn) for write in batch]
+        except Exception:
+            # Find the write that failed, without losing the others
+            self._commit_each(conn, batch)
+            return
+        self.commits += 1
+        for write, result in zip(batch, results):
+            write.result = result
+            write.done.set()
+
+    def _commit_each(self, conn, batch):
+        for write in batch:
+            try:
+                with conn:
+                    write.result = write.fn(conn)
+                self.commits += 1
+            except Exception as err:
+                write.error = err
+            write.done.set()
+
+    # Reads
+    @contextmanager
+    def reading(self):
+        conn = self.get_reader()
+        try:
+            yield conn
+        finally:
+            self.put_reader(conn)
+
+    def get_reader(self):
+        try:
+            return self.pool.get_nowait()
+        except queue.Empty:
+            pass
+        with self.lock:
+            self.opened += 1
+        return self.connect(readOnly=True)
+
+    def put_reader(self, conn):
+        if conn.in_transaction:
+            conn.rollback()
+        if self.pool.qsize() < self.readers:
+            self.pool.put(conn)
+        else:
+            with self.lock:
+                self.opened -= 1
+            conn.close()
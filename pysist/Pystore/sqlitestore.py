@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+#  sqlitestore.py
+#
+#  2020 Wharpus Web and Dev <wharpus@gmail.com>
+#
+
+'''
+The :class:`SqliteRoot` class is a sqlite3 backed root store.
+The :class:`SqliteNodes` class is a dict like view of the nodes table.
+
+Prefs are small, so they are loaded eagerly by load_prefs().
+Nodes are only read from the nodes table when a uid is asked for,
+and a saved node is a single row UPDATE (or INSERT if it is new).
+Each row also keeps the node's node_item() fields (parent, size, text,
+target and orderKey), so a root is indexed without decoding any json.
+
+All writes go through a :class:`SqliteManager`, so every change saved
+together is one transaction, and reads use a read only connection.
+'''
+
+import json
+from collections.abc import MutableMapping
+
+from .sqlitepool import SqliteManager
+from .node import Node, node_json
+from .nodeitem import node_item
+
+__all__ = ['SqliteRoot', 'SqliteNodes', 'ROOT_SCHEMA']
+
+# Same tables as ./data/root_table_schema.sql
+ROOT_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS [root] (
+    [id] INTEGER  NOT NULL  PRIMARY KEY,
+    [tKey] VARCHAR(64)  NOT NULL  DEFAULT "root",
+    [nKey] VARCHAR(64)  NOT NULL  DEFAULT "nodes",
+    [pKey] VARCHAR(64)  NOT NULL  DEFAULT "prefs",
+    [json] TEXT  NOT NULL,
+    [tType] VARCHAR(10)  DEFAULT "json",
+    [rootPath] VARCHAR(256)  DEFAULT "./root.json"
+);
+
+CREATE TABLE IF NOT EXISTS [nodes] (
+    [id] INTEGER  NOT NULL  PRIMARY KEY,
+    [nid] VARCHAR(64)  NOT NULL  UNIQUE,
+    [parent] VARCHAR(64)  NULL,
+    [json] TEXT  NULL,
+    [nType] VARCHAR(20)  NULL,
+    [vType] VARCHAR(20)  NULL,
+    [dataRef] VARCHAR(128)  NULL,
+    [size] INTEGER  NULL,
+    [text] TEXT  NULL,
+    [target] VARCHAR(64)  NULL,
+    [orderKey] VARCHAR(64)  NULL
+);
+
+CREATE INDEX IF NOT EXISTS [nodes_parent] ON [nodes] ([parent]);
+
+CREATE TABLE IF NOT EXISTS [prefs] (
+    [id] INTEGER  NOT NULL  PRIMARY KEY,
+    [key] VARCHAR(64)  NOT NULL  UNIQUE,
+    [json] TEXT  NOT NULL,
+    [pType] VARCHAR(20)  NOT NULL  DEFAULT "json"
+);
+'''
+
+# The node_item() columns, and their types for files made before them
+ITEM_COLUMNS = {'size': 'INTEGER', 'text': 'TEXT', 'target': 'VARCHAR(64)',
+                'orderKey': 'VARCHAR(64)'}
+NODE_COLUMNS = ('nid', 'parent', 'json', 'nType', 'vType', 'dataRef') + tuple(ITEM_COLUMNS)
+INSERT_NODE = 'INSERT INTO nodes ({}) VALUES ({})'.format(
+                ', '.join(NODE_COLUMNS), ', '.join('?' * len(NODE_COLUMNS)))
+UPDATE_NODE = 'UPDATE nodes SET {} = ? WHERE nid = ?'.format(' = ?, '.join(NODE_COLUMNS[1:]))
+
+
+class SqliteNodes(MutableMapping):
+    '''
+    A dict like view of the nodes table, so B.nodes[uid][B._T_PARENT]
+    style code keeps working. Rows are only decoded when touched,
+    and touched nodes are kept so in-place edits survive until flush().
+    '''
+
+    def __init__(self, conn, db):
+        self.conn = conn # Read only connection
+        self.db = db # SqliteManager that does the writes
+        self.loaded = {} # uid: node dict of every node touched so far
+        self.dirty = set() # uids to UPDATE on the next flush()
+        self.deleted = set() # uids to DELETE on the next flush()
+
+    def __getitem__(self, uid):
+        if uid in self.loaded:
+            return self.loaded[uid]
+        if uid in self.deleted:
+            raise KeyError(uid)
+        row = self.conn.execute('SELECT json FROM nodes WHERE nid = ?',
+                                (uid,)).fetchone()
+        if row is None:
+            raise KeyError(uid)
+        node = Node(json.loads(row[0]))
+        self.loaded[uid] = node
+        return node
+
+    def __setitem__(self, uid, node):
+        self.loaded[uid] = node
+        self.deleted.discard(uid)
+        self.dirty.add(uid)
+
+    def __delitem__(self, uid):
+        if uid not in self:
+            raise KeyError(uid)
+        self.loaded.pop(uid, None)
+        self.dirty.discard(uid)
+        if self._row_exists(uid): # never saved nodes only need forgetting
+            self.deleted.add(uid)
+
+    def __contains__(self, uid):
+        if uid in self.loaded:
+            return True
+        if uid in self.deleted:
+            return False
+        row = self.conn.execute('SELECT 1 FROM nodes WHERE nid = ?',
+                                (uid,)).fetchone()
+        return row is not None
+
+    def __iter__(self):
+        # Row id order is insertion order, same as a json root's dict order
+        seen = set()
+        for (uid,) in self.conn.execute('SELECT nid FROM nodes ORDER BY id'):
+            if uid in self.deleted:
+                continue
+            seen.add(uid)
+            yield uid
+        for uid in list(self.dirty):
+            if uid not in seen:
+                yield uid
+
+    def __len__(self):
+        # On the Tk thread only, it reads dirty and deleted, a loader thread 
+        # wants item_count()
+        count = self.conn.execute('SELECT COUNT(*) FROM nodes').fetchone()[0]
+        for uid in self.dirty:
+            if not self._row_exists(uid):
+                count += 1
+        return count - len(self.deleted)
+
+    def _row_exists(self, uid):
+        row = self.conn.execute('SELECT 1 FROM nodes WHERE nid = ?',
+                                (uid,)).fetchone()
+        return row is not None
+
+    def iter_parents(self):
+        # (uid, parent) pairs without decoding any node json
+        for uid, parent in self.conn.execute(
+                        'SELECT nid, parent FROM nodes ORDER BY id'):
+            if uid in self.deleted:
+                continue
+            if uid in self.loaded:
+                parent = self.loaded[uid].get('parent', parent)
+            yield uid, parent
+
+    def iter_items(self):
+        # node_item()s of the saved rows, from their columns, no json is 
+        # decoded. Only the database is read, not loaded or deleted, so a 
+        # loader thread can walk it while the Tk thread changes nodes
+        with self.db.reading() as conn:
+            yield from conn.execute('SELECT nid, parent, size, text, target, '
+                                    'orderKey FROM nodes ORDER BY id')
+
+    def snapshot(self):
+        # On the Tk thread: (uid, node) pairs of every node as it is now, for
+        # another thread to walk. Only the touched nodes are copied here, the
+        # saved rows are decoded as they are walked
+        return self._iter_snapshot(dict(self.loaded), set(self.deleted))
+
+    def _iter_snapshot(self, loaded, deleted):
+        with self.db.reading() as conn:
+            for uid, data in conn.execute('SELECT nid, json FROM nodes ORDER BY id'):
+                if uid in deleted:
+                    continue
+                node = loaded.pop(uid, None)
+                yield uid, node if node is not None else json.loads(data)
+        yield from loaded.items() # Nodes not saved yet
+
+    def item_count(self):
+        # The number of iter_items() items, the saved rows, read like them
+        with self.db.reading() as conn:
+            return conn.execute('SELECT COUNT(*) FROM nodes').fetchone()[0]
+
+    def fresh_items(self, items):
+        # On the Tk thread: iter_items() items less the deleted nodes, and 
+        # the items of nodes that were read (and maybe changed) made again
+        fresh = []
+        for item in items:
+            uid = item[0]
+            node = self.loaded.get(uid)
+            if node is not None:
+                fresh.append(node_item(uid, node))
+            elif uid not in self.deleted:
+                fresh.append(item)
+        return fresh
+
+    def iter_records(self):
+        # (uid, node) pairs, decoded but not kept. Reads loaded and deleted,
+        # so only for the Tk thread, a loader thread wants iter_items()
+        with self.db.reading() as conn:
+            for uid, data in conn.execute('SELECT nid, json FROM nodes ORDER BY id'):
+                if uid in self.deleted:
+                    continue
+                node = self.loaded.get(uid)
+                yield uid, node if node is not None else json.loads(data)
+
+    def children_of(self, parentUID):
+        # uids of all direct children of parentUID, in insertion order
+        rows = self.conn.execute('SELECT nid FROM nodes WHERE parent = ? ORDER BY id',
+                                (parentUID,))
+        return [uid for (uid,) in rows if uid not in self.deleted]
+
+    def mark_dirty(self, uid):
+        # Call after changing a node in place, ie. B.nodes[uid]['text'] = 'x'
+        if uid in self.loaded:
+            self.dirty.add(uid)
+
+    def flush(self):
+        # Write only the changed rows, all in one transaction
+        deleted = [(uid,) for uid in self.deleted]
+        rows = [node_row(uid, self.loaded[uid]) for uid in self.dirty]
+
+        def write_rows(conn):
+            conn.executemany('DELETE FROM nodes WHERE nid = ?', deleted)
+            for row in rows:
+                cursor = conn.execute(UPDATE_NODE, row[1:] + row[:1])
+                if cursor.rowcount == 0:
+                    conn.execute(INSERT_NODE, row)
+            return len(deleted) + len(rows)
+
+        written = self.db.submit(write_rows).wait()
+        self.dirty.clear()
+        self.deleted.clear()
+        return written
+
+    def forget(self, uid=None):
+        # Drop unchanged decoded nodes so memory only holds dirty nodes
+        if uid is not None:
+            if uid not in self.dirty:
+                self.loaded.pop(uid, None)
+            return
+        self.loaded = {k: v for (k, v) in self.loaded.items() if k in self.dirty}
+
+
+def node_row(uid, node):
+    # Build a nodes table row, in NODE_COLUMNS order
+    item = node_item(uid, node)
+    return (uid,
+            item[1],
+            json.dumps(node, ensure_ascii=True, default=node_json),
+            node.get('rowtype'),
+            node.get('type'),
+            node.get('dataRef') or node.get('ref') or None) + item[2:]
+
+
+def add_item_columns(conn):
+    # Files made before the node_item() columns get them, filled in once.
+    # RETURNS: the number of rows filled in
+    have = {row[1] for row in conn.execute('PRAGMA table_info(nodes)')}
+    missing = [name for name in ITEM_COLUMNS if name not in have]
+    if not missing:
+        return 0
+    for name in missing:
+        conn.execute('ALTER TABLE nodes ADD COLUMN [{}] {} NULL'.format(name, ITEM_COLUMNS[name]))
+    rows = [node_item(uid, json.loads(data))[2:] + (uid,)
+            for uid, data in conn.execute('SELECT nid, json FROM nodes')]
+    conn.executemany('UPDATE nodes SET size = ?, text = ?, target = ?, orderKey = ? '
+                    'WHERE nid = ?', rows)
+    return len(rows)
+
+
+class SqliteRoot:
+    '''
+    A root stored in a sqlite3 database, using the root, nodes and
+    prefs tables from ./data/root_table_schema.sql
+    '''
+
+    def __init__(self, FILE='./data/root.sqlite', N_KEY='nodes', P_KEY='prefs'):
+        self.FILE = FILE
+        self.N_KEY = N_KEY
+        self.P_KEY = P_KEY
+        self.db = None
+        self.conn = None
+        self.nodes = None
+        self.open()
+
+    def open(self):
+        self.db = SqliteManager(self.FILE)
+        self.db.write_script(ROOT_SCHEMA).wait()
+        self.db.submit(add_item_columns).wait()
+        self.conn = self.db.get_reader() # Kept for the Tk thread's reads
+        self.nodes = SqliteNodes(self.conn, self.db)
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+        if self.db is not None:
+            self.db.close()
+            self.db = None
+
+    def is_empty(self):
+        return self.conn.execute('SELECT COUNT(*) FROM nodes').fetchone()[0] == 0
+
+    def load_prefs(self):
+        prefs = {}
+        for key, data in self.conn.execute('SELECT key, json FROM prefs ORDER BY id'):
+            prefs[key] = json.loads(data)
+        return prefs
+
+    def save_prefs(self, prefs):
+        rows = [(json.dumps(value, ensure_ascii=True), key) for key, value in prefs.items()]
+
+        def write_prefs(conn):
+            for row in rows:
+                cursor = conn.execute('UPDATE prefs SET json = ? WHERE key = ?', row)
+                if cursor.rowcount == 0:
+                    conn.execute('INSERT INTO prefs (json, key) VALUES (?, ?)', row)
+
+        self.db.submit(write_prefs).wait()
+
+    def save_node(self, uid, node=None):
+        # Saving one node is one row write, not a rewrite of the whole root
+        if node is not None:
+            self.nodes[uid] = node
+        else:
+            self.nodes.mark_dirty(uid)
+        return self.nodes.flush()
+
+    def save(self, prefs=None):
+        if prefs is not None:
+            self.save_prefs(prefs)
+        return self.nodes.flush()
+
+    def import_root(self, nodes, prefs, rootPath=''):
+        # Copy a whole json style root (nodes and prefs dicts) into the store.
+        # The rows are made by the writer thread, from a snapshot() of a 
+        # store's nodes (or the dict's items), so the caller isn't held up.
+        # RETURNS: the SqliteWrite, its result is the number of nodes written
+        records = nodes.snapshot() if hasattr(nodes, 'snapshot') else list(nodes.items())
+        prefRows = [(key, json.dumps(value, ensure_ascii=True)) for key, value in prefs.items()]
+
+        def write_root(conn):
+            conn.execute('DELETE FROM nodes')
+            cursor = conn.executemany(INSERT_NODE, (node_row(uid, node) for uid, node in records))
+            conn.execute('DELETE FROM root')
+            conn.execute('INSERT INTO root (nKey, pKey, json, tType, rootPath) '
+                        'VALUES (?, ?, ?, ?, ?)',
+                        (self.N_KEY, self.P_KEY,
+                        json.dumps({'fileFormat': prefs.get('fileFormat', 1.1)}),
+                        'sqlite3', rootPath))
+            conn.execute('DELETE FROM prefs')
+            conn.executemany('INSERT INTO prefs (key, json) VALUES (?, ?)', prefRows)
+            return cursor.rowcount
+
+        self.nodes = SqliteNodes(self.conn, self.db)
+        return self.db.submit(write_root, alone=True)
+
+    def export_root(self):
+        # Returns the whole root as one json style dict
+        data = {}
+        data[self.N_KEY] = {uid: self.nodes[uid] for uid in self.nodes}
+        data[self.P_KEY] = self.load_prefs()
+        return data
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+#  thumbcache.py
+#
+#  2020 Wharpus Web and Dev <wharpus@gmail.com>
+#
+
+'''
+The :class:`ThumbLoader` class makes the small previews of image rows
+with a pool of worker threads, and keeps them on disk, and the
+:class:`ThumbCache` class keeps the ones in use in memory.
+
+A thumbnail is keyed by the content hash of its image (the digest of a
+stored blob's ref, or of the file), so the same picture in two places, or
+in the next session, is only ever shrunk once. Thumbnails are kept as
+small png files in thumbDir/9f/9f86..._32.png.
+
+The workers only do the file work: reading and hashing the image, and
+reading and writing the thumbnails kept on disk. With Pillow installed
+they shrink the image too, as Pillow decodes without holding the GIL.
+Without it, png and gif images are handed back whole ('raw'), for Tk's
+own decoder to read and subsample() on the Tk thread, and keep() has a
+worker save the small png Tk made, so an image is only decoded once:
+
+    loader = ThumbLoader(blobs, './data/thumbs', size=32)
+    loader.request(uid, dataRef=node['dataRef'], path=node['ref'], ext='png')
+    ...
+    for record in loader.results(20):
+        # {'uid': ..., 'key': '9f86...', 'data': b'...', 'raw': False, 'error': None}
+        ...
+
+Every request gets a record, an image that can't be previewed (a bad
+one, a jpg without Pillow, or a raw one over maxRawBytes) gets one with
+an 'error', and its row keeps its type's icon.
+
+ThumbCache is an LRU of the Tk images, limited by their size in bytes,
+so browsing a big image table never holds more than its budget. It only
+holds images for reuse, a row showing one keeps its own reference.
+'''
+
+import io
+import os
+import queue
+import hashlib
+import threading
+from collections import OrderedDict
+
+try:
+    from PIL import Image # Optional, shrinks off the Tk thread and reads jpg too
+except ImportError:
+    Image = None
+
+__all__ = ['ThumbCache', 'ThumbLoader', 'TK_IMAGE_TYPES']
+
+TK_IMAGE_TYPES = frozenset(['png', 'gif']) # Types Tk 8.6 can read itself
+_DONE = None # Tells a worker to stop
+_KEEP = object() # Marks a (_KEEP, key, data) request to save a thumbnail
+
+
+class ThumbCache:
+
+    def __init__(self, budget=8 * 1024 * 1024):
+        self.items = OrderedDict() # key: (thumb, nbytes), least recently used first
+        self.budget = budget # Most bytes to keep
+        self.used = 0
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+
+    def __len__(self):
+        return len(self.items)
+
+    def __contains__(self, key):
+        return key in self.items
+
+    def get(self, key, default=None):
+        item = self.items.get(key)
+        if item is None:
+            self.misses += 1
+            return default
+        self.items.move_to_end(key)
+        self.hits += 1
+        return item[0]
+
+    def put(self, key, thumb, nbytes):
+        # RETURNS: False if thumb is bigger than the whole budget
+        if key in self.items:
+            self.used -= self.items.pop(key)[1]
+        if nbytes > self.budget:
+            return False
+        self.items[key] = (thumb, nbytes)
+        self.used += nbytes
+        while self.used > self.budget:
+            oldKey, (oldThumb, oldBytes) = self.items.popitem(last=False)
+            self.used -= oldBytes
+            self.evicted += 1
+        return True
+
+    def clear(self):
+        self.items.clear()
+        self.used = 0
+
+    def stats(self):
+        return {'items': len(self.items), 'bytes': self.used, 'budget': self.budget,
+                'hits': self.hits, 'misses': self.misses, 'evicted': self.evicted}
+
+
+class ThumbLoader:
+
+    def __init__(self, blobs, thumbDir, size=32, workers=2, maxRawBytes=4 * 1024 * 1024):
+        self.blobs = blobs
+        self.thumbDir = thumbDir
+        self.size = size # Longest side of a thumbnail, in pixels
+        self.maxRawBytes = maxRawBytes # Biggest image handed to Tk to shrink
+        self.workerCount = max(1, workers)
+        self.requests = queue.Queue()
+        self.records = queue.Queue()
+        self.lock = threading.Lock()
+        self.threads = []
+        self.waiting = 0 # Requests not collected yet
+
+    def ref_key(self, dataRef):
+        # RETURNS: the content key in a blob ref, or None. Doesn't look on disk
+        try:
+            return self.blobs.split_ref(dataRef)[1]
+        except (ValueError, AttributeError):
+            return None
+
+    def thumb_path(self, key):
+        return os.path.join(self.thumbDir, key[:2], '{}_{}.png'.format(key, self.size))
+
+    def has_thumb(self, key):
+        return os.path.isfile(self.thumb_path(key))
+
+    def save(self, key, data):
+        # Keep a thumbnail's png bytes on disk, whole or not at all
+        path = self.thumb_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmpPath = '{}.{}.tmp'.format(path, threading.get_ident())
+        with open(tmpPath, 'wb') as outfile:
+            outfile.write(data)
+        os.replace(tmpPath, path)
+
+    def request(self, uid, dataRef=None, path=None, ext=''):
+        if not self.threads:
+            self.start()
+        with self.lock:
+            self.waiting += 1
+        self.requests.put((uid, dataRef, path, ext.lower()))
+
+    def keep(self, key, data):
+        # Have a worker save a thumbnail the Tk thread made from a raw record
+        if not self.threads:
+            self.start()
+        self.requests.put((_KEEP, key, data))
+
+    def is_busy(self):
+        return self.waiting > 0
+
+    def results(self, maxItems=20):
+        # Collect up to maxItems finished thumbnails without waiting
+        records = []
+        while len(records) < maxItems:
+            try:
+                records.append(self.records.get_nowait())
+            except queue.Empty:
+                break
+        with self.lock:
+            self.waiting -= len(records)
+        return records
+
+    def start(self):
+        for x in range(self.workerCount):
+            thread = threading.Thread(target=self._work, name='thumbs-{}'.format(x),
+                                      daemon=True)
+            self.threads.append(thread)
+            thread.start()
+
+    def close(self):
+        # Stop the workers once they finish the requests before this one
+        for thread in self.threads:
+            self.requests.put(_DONE)
+        self.threads = []
+
+    def _work(self):
+        while True:
+            request = self.requests.get()
+            if request is _DONE:
+                return
+            if request[0] is _KEEP: # Not a request that is waited for
+                try:
+                    self.save(*request[1:])
+                except OSError:
+                    pass # It is made again next time
+                continue
+            try:
+                record = self.make_thumb(*request)
+            except Exception as err: # Any bad image, the request must still be answered
+                record = self.new_record(request[0])
+                record['error'] = str(err) or err.__class__.__name__
+            self.records.put(record)
+
+    def new_record(self, uid):
+        return {'uid': uid, 'key': None, 'data': None, 'raw': False, 'error': None}
+
+    def make_thumb(self, uid, dataRef, path, ext):
+        record = self.new_record(uid)
+        if Image is None and ext not in TK_IMAGE_TYPES:
+            record['error'] = "No preview of '{}' images without Pillow".format(ext)
+            return record
+        try:
+            data = None
+            key = self.ref_key(dataRef) if dataRef in self.blobs else None
+            if key is None: # Not stored, so hash the file itself
+                with open(path, 'rb') as infile:
+                    data = infile.read()
+                key = hashlib.sha256(data).hexdigest()
+            record['key'] = key
+            cached = self.thumb_path(key)
+            if os.path.isfile(cached):
+                with open(cached, 'rb') as infile:
+                    record['data'] = infile.read()
+                return record
+            if data is None:
+                data = self.blobs.get_bytes(dataRef)
+            if Image is not None:
+                record['data'] = self.shrink(data)
+                self.save(key, record['data'])
+            elif len(data) > self.maxRawBytes: # Too slow for Tk to decode
+                record['error'] = 'No preview of images over {:,} bytes without Pillow'.format(
+                                    self.maxRawBytes)
+            else:
+                record['data'] = data
+                record['raw'] = True
+        except (OSError, ValueError, TypeError) as err:
+            record['error'] = str(err)
+        return record
+
+    def shrink(self, data):
+        # RETURNS: png bytes of the image, no bigger than size x size
+        image = Image.open(io.BytesIO(data))
+        image.thumbnail((self.size, self.size))
+        if image.mode not in ('1', 'L', 'LA', 'P', 'RGB', 'RGBA'):
+            image = image.convert('RGBA')
+        outfile = io.BytesIO()
+        image.save(outfile, 'PNG')
+        return outfile.getvalue()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+#  changeset.py
+#
+#  2020 Wharpus Web and Dev <wharpus@gmail.com>
+#
+"""pysist.changeset collects node changes until the tree is next refreshed.
+
+Every change to B.nodes is noted by uid as an insert, update, move or
+delete. Changes to the same uid are folded together (an insert then an
+update is still one insert, an insert then a delete is nothing at all),
+so however many times a node changes between two Tk idle cycles, the
+tree gets at most one refresh of its row:
+
+    changes.insert('f1')
+    changes.update('f1') # still just ('f1', 'insert')
+    changes.delete('d1', 'root') # parent, so a whole deleted table is one delete
+    for uid, kind in changes.items():
+        ...
+
+A uid that is deleted and then inserted again in the same cycle is a
+'replace': its old row goes and a new one is made.
+"""
+
+__all__ = ['ChangeSet', 'INSERT', 'UPDATE', 'MOVE', 'DELETE', 'REPLACE']
+
+INSERT = 'insert'
+UPDATE = 'update'
+MOVE = 'move' # Has a new parent or index, and may have changed too
+DELETE = 'delete'
+REPLACE = 'replace' # Deleted, then inserted again
+
+# (kind so far, new change): kind after both
+_FOLD = {
+    (INSERT, INSERT): INSERT, (INSERT, UPDATE): INSERT, (INSERT, MOVE): INSERT,
+    (UPDATE, INSERT): REPLACE, (UPDATE, UPDATE): UPDATE, (UPDATE, MOVE): MOVE,
+    (UPDATE, DELETE): DELETE,
+    (MOVE, INSERT): REPLACE, (MOVE, UPDATE): MOVE, (MOVE, MOVE): MOVE,
+    (MOVE, DELETE): DELETE,
+    (DELETE, INSERT): REPLACE, (DELETE, UPDATE): DELETE, (DELETE, MOVE): DELETE,
+    (DELETE, DELETE): DELETE,
+    (REPLACE, INSERT): REPLACE, (REPLACE, UPDATE): REPLACE, (REPLACE, MOVE): REPLACE,
+    (REPLACE, DELETE): DELETE,
+    }
+
+
+class ChangeSet:
+
+    def __init__(self):
+        self.kinds = {} # uid: kind, in the order uids were first changed
+        self.parents = {} # uid: parent it had, of deleted uids
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def __bool__(self):
+        return bool(self.kinds)
+
+    def __contains__(self, uid):
+        return uid in self.kinds
+
+    def kind_of(self, uid):
+        return self.kinds.get(uid)
+
+    def items(self):
+        # (uid, kind) of every change, in the order they were first made
+        return list(self.kinds.items())
+
+    def deleted(self):
+        # uids whose old rows must go
+        return set(self.parents)
+
+    def note(self, uid, kind):
+        old = self.kinds.get(uid)
+        if old is None:
+            self.kinds[uid] = kind
+        elif old == INSERT and kind == DELETE:
+            del self.kinds[uid] # Never shown, so nothing to do
+        else:
+            self.kinds[uid] = _FOLD[(old, kind)]
+
+    def insert(self, uid):
+        self.note(uid, INSERT)
+
+    def update(self, uid):
+        self.note(uid, UPDATE)
+
+    def move(self, uid):
+        self.note(uid, MOVE)
+
+    def delete(self, uid, parent):
+        if self.kinds.get(uid) != INSERT:
+            self.parents.setdefault(uid, parent) # The parent its row had
+        self.note(uid, DELETE)
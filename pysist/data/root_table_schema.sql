@@ -5,23 +5,30 @@ CREATE TABLE IF NOT EXISTS [root] (
     [pKey] VARCHAR(64)  NOT NULL  DEFAULT "prefs",
     [json] TEXT  NOT NULL,
     [tType] VARCHAR(10)  DEFAULT "json",
-    [rootPath] VARCHAR(256)  DEFAULT "./root.json",
+    [rootPath] VARCHAR(256)  DEFAULT "./root.json"
 );
 
 CREATE TABLE IF NOT EXISTS [nodes] (
     [id] INTEGER  NOT NULL  PRIMARY KEY,
     [nid] VARCHAR(64)  NOT NULL  UNIQUE,
+    [parent] VARCHAR(64)  NULL,
     [json] TEXT  NULL,
     [nType] VARCHAR(20)  NULL,
     [vType] VARCHAR(20)  NULL,
-    {dataRef] VARCHAR(128)  NULL
+    [dataRef] VARCHAR(128)  NULL,
+    [size] INTEGER  NULL,
+    [text] TEXT  NULL,
+    [target] VARCHAR(64)  NULL,
+    [orderKey] VARCHAR(64)  NULL
 );
 
+CREATE INDEX IF NOT EXISTS [nodes_parent] ON [nodes] ([parent]);
+
 CREATE TABLE IF NOT EXISTS [prefs] (
     [id] INTEGER  NOT NULL  PRIMARY KEY,
     [key] VARCHAR(64)  NOT NULL  UNIQUE,
     [json] TEXT  NOT NULL,
-    [pType] VARCHAR(20)  NOT NULL  DEFAULT "json",
+    [pType] VARCHAR(20)  NOT NULL  DEFAULT "json"
 );
 
 -- ~ Sample nodes json data
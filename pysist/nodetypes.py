@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+#  nodetypes.py
+#
+#  2020 Wharpus Web and Dev <wharpus@gmail.com>
+#
+
+'''
+The :class:`TypeRegistry` class is the one place node types are looked up.
+The :class:`NodeType` class is what it knows of one row type.
+
+A root's prefs keep its row types as three parallel lists (rowTypes,
+tagNames and tagBg), and B._type_map maps value types and file
+extensions to a row type and an encoding. TypeRegistry is built once
+from both, and from B._node_types' icons, so every lookup after that is 
+a dict lookup, not a list scan. The Window registers each built-in 
+type's handler with set_handler(), and Open Selected calls it.
+
+TypeRegistry.row(rowtype) -- the NodeType of a node's 'rowtype'. Only
+the last word counts ('child Table' is a 'Table'), and the answer is
+remembered, so each distinct rowtype string is only split once.
+    NodeType has: name, tag, bg, icon, encoding, handler, table, thumb
+
+TypeRegistry.value_type(typeStr) -- (rowtype, encoding) of a value type
+or extension from the type map, ie. 'png' -> ('image', 'bytes').
+
+payload_size(node) -- the bytes a node holds, from Pystore.nodeitem, where
+the stores can use it too.
+'''
+
+__all__ = ['TypeRegistry', 'NodeType', 'payload_size']
+
+from Pystore.nodeitem import payload_size, TABLE_TYPES
+
+DEFAULT_VALUE_TYPE = ('file', 'bytes') # For types that are not in the type map
+THUMB_TYPES = frozenset(['image']) # Row types whose rows show a thumbnail
+
+
+class NodeType:
+    __slots__ = ('name', 'tag', 'bg', 'icon', 'encoding', 'handler', 'table', 'thumb')
+
+    def __init__(self, name, tag, bg, icon=None, encoding='utf-8', handler=None, 
+                 table=False, thumb=False):
+        self.name = name
+        self.tag = tag
+        self.bg = bg
+        self.icon = icon # Image file name, or None
+        self.encoding = encoding # 'utf-8' or 'bytes', for payloads of this type
+        self.handler = handler # Called as handler(uid) to open a node of this type
+        self.table = table # True when nodes of this type have children
+        self.thumb = thumb # True when rows of this type show a thumbnail
+
+    def is_table(self):
+        return self.table
+
+    def __repr__(self):
+        return 'NodeType({!r}, tag={!r}, bg={!r})'.format(self.name, self.tag, self.bg)
+
+
+class TypeRegistry:
+
+    def __init__(self, rowTypes, tagNames, tagBg, typeMap, icons=None, 
+                 tableTypes=TABLE_TYPES, thumbTypes=THUMB_TYPES):
+        icons = icons or {}
+        self.typeMap = typeMap
+        self.types = {} # rowtype string: NodeType
+        self.tags = {} # tag: NodeType
+        # A row type's payload encoding is the one most of its value types use
+        encodings = {}
+        for rowtype, encoding in typeMap.values():
+            counts = encodings.setdefault(rowtype, {})
+            counts[encoding] = counts.get(encoding, 0) + 1
+        for name, tag, bg in zip(rowTypes, tagNames, tagBg):
+            counts = encodings.get(name, {'utf-8': 1})
+            nodeType = NodeType(name, tag, bg, icons.get(name),
+                                max(counts, key=counts.get), table=name in tableTypes,
+                                thumb=name in thumbTypes)
+            self.types[name] = nodeType
+            self.tags[tag] = nodeType
+
+    def row(self, rowtype):
+        nodeType = self.types.get(rowtype)
+        if nodeType is None:
+            nodeType = self.types.get(rowtype.split()[-1]) if rowtype.strip() else None
+            if nodeType is None:
+                raise KeyError("Unknown rowtype: '{}'".format(rowtype))
+            self.types[rowtype] = nodeType # Remember 'child Table' etc.
+        return nodeType
+
+    def get(self, rowtype, default=None):
+        try:
+            return self.row(rowtype)
+        except KeyError:
+            return default
+
+    def tag_of(self, rowtype):
+        return self.row(rowtype).tag
+
+    def is_table(self, rowtype):
+        nodeType = self.get(rowtype)
+        return nodeType is not None and nodeType.is_table()
+
+    def has_thumb(self, rowtype):
+        nodeType = self.get(rowtype)
+        return nodeType is not None and nodeType.thumb
+
+    def value_type(self, typeStr):
+        # RETURNS: (rowtype, encoding) of a value type or file extension
+        rowtype, encoding = self.typeMap.get(typeStr, DEFAULT_VALUE_TYPE)
+        return rowtype, encoding
+
+    def encoding_of(self, typeStr):
+        return self.value_type(typeStr)[1]
+
+    def set_handler(self, rowtype, handler):
+        self.row(rowtype).handler = handler
+
+    def tag_colours(self):
+        # [(tag, background)] of every row type, for tag_configure
+        return [(tag, nodeType.bg) for tag, nodeType in self.tags.items()]
+
+    def theme_entry(self, rowtype):
+        # The {'tagName', 'tagBg'} dict get_theme_tree_type() gives out
+        nodeType = self.get(rowtype)
+        if nodeType is None: # Theme names are capitalized, ie. 'File'
+            lowered = {name.lower(): t for name, t in self.types.items()}
+            nodeType = lowered.get(rowtype.lower())
+        if nodeType is None:
+            return None
+        return {'tagName': nodeType.tag, 'tagBg': nodeType.bg}
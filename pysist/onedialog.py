@@ -16,6 +16,10 @@
 Onedialog contains the following public objects:
 The onedialog is a drop-in replacement for tkinter.simpledialog
 
+onechooser -- a onedialog that picks one of a long list of choices 
+from a scrolled list, where a row of buttons would not fit.
+    RETURNS: The index of the choice, or None.
+
 _QueryString and_QueryDialog contains the all of the functionality 
 behind each multitypedialog call.
 
@@ -104,6 +108,7 @@ askmultitypetuple -- get a variety of supported valid python types.
     (None, unconvertedInput, unconvertedType, errorString) if an error occurred
 """
 import os
+import sys
 from tkinter import *
 from tkinter import messagebox
 import tkinter # used in _QueryDialog for tkinter._default_root
@@ -244,6 +249,72 @@ class onedialog:
         self.root.quit()
 
 
+class onechooser(onedialog):
+
+    def __init__(self, master,
+                 text='', choices=[], default=0, title=None, class_=None, 
+                 height=10):
+        logger.debug('{}: {}({})'.format(self.__class__.__name__, 
+                                sys._getframe().f_code.co_name, 
+                                "'{}', '{}', {}, {}, {}, {}, {}, {}"
+                                .format(self, master, text, len(choices), 
+                                    default, title, class_, height)))
+        if class_:
+            self.root = Toplevel(master, class_=class_)
+        else:
+            self.root = Toplevel(master)
+        if title:
+            self.root.title(title)
+            self.root.iconname(title)
+        self.message = Message(self.root, text=text, aspect=400)
+        self.message.pack(expand=1, fill=BOTH)
+        self.frame = Frame(self.root)
+        self.frame.pack(expand=1, fill=BOTH)
+        self.num = None
+        self.cancel = None
+        self.default = default
+        width = max([20] + [len(str(choice)) for choice in choices])
+        self.list = Listbox(self.frame, height=min(height, max(1, len(choices))), 
+                            width=min(width, 80), exportselection=False)
+        scroll = Scrollbar(self.frame, orient=VERTICAL, command=self.list.yview)
+        self.list.config(yscrollcommand=scroll.set)
+        self.list.pack(side=LEFT, fill=BOTH, expand=1)
+        scroll.pack(side=RIGHT, fill=Y)
+        for choice in choices:
+            self.list.insert(END, choice)
+        if choices and default is not None:
+            self.list.selection_set(default)
+            self.list.activate(default)
+            self.list.see(default)
+        self.buttons = Frame(self.root)
+        self.buttons.pack()
+        b = Button(self.buttons, text='OK', width=10, command=self.choose)
+        b.config(relief=RIDGE, borderwidth=8)
+        b.pack(side=LEFT, fill=BOTH, expand=1)
+        b = Button(self.buttons, text='Cancel', width=10, 
+                   command=(lambda self=self: self.done(None)))
+        b.pack(side=LEFT, fill=BOTH, expand=1)
+        self.list.bind('<Double-Button-1>', lambda event: self.choose())
+        self.root.bind('<Return>', self.return_event)
+        self.root.bind('<Escape>', lambda event: self.done(None))
+        self.root.protocol('WM_DELETE_WINDOW', self.wm_delete_window)
+        self._set_transient(master)
+        self.list.focus_set()
+
+    def choose(self):
+        picked = self.list.curselection()
+        if not picked:
+            self.root.bell()
+        else:
+            self.done(picked[0])
+
+    def return_event(self, event):
+        self.choose()
+
+    def wm_delete_window(self):
+        self.done(None)
+
+
 """This class builds the dialog windows"""
 class Dialog(Toplevel):
 
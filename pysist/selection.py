@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+#  selection.py
+#
+#  2020 Wharpus Web and Dev <wharpus@gmail.com>
+#
+"""pysist.selection keeps the tree's selection on the Python side.
+
+Asking Tk for tree.item(uid) of every selected row is one round trip
+per row, and a few thousand selected rows take seconds. Everything a row
+shows comes from its node anyway, so Selection only takes the selected
+iids from Tk (one tree.selection() call) and reads the rest from the
+nodes by uid:
+
+    selection.set(tree.selection())
+    for uid, node in selection.nodes():
+        ...
+    selection.cell(uid, '#1') # what the row shows in column #1
+
+Columns are read through values(uid, node), the Window's row_values(),
+so cell() and item() give what the row shows, not the saved 'columns'.
+
+Range (shift) selection runs from the anchor, the last row clicked
+without shift, to the row clicked, over their table's children:
+
+    selection.set_anchor('f1')
+    tree.selection_set(selection.range_to('f9'))
+
+Placeholder rows (not in the child index) are never selected.
+"""
+
+__all__ = ['Selection']
+
+
+class Selection:
+
+    def __init__(self, store=None, children=None, values=None):
+        self.store = store # uid: node, ie. B.nodes
+        self.children = children # ChildIndex of the same root
+        self.values = values or saved_columns # values(uid, node): the row's columns
+        self.uids = () # Selected uids, in the tree's order
+        self.members = frozenset()
+        self.anchor = None # Where a range selection starts
+
+    def attach(self, store, children):
+        # Use another root's nodes, which also clears the selection
+        self.store = store
+        self.children = children
+        self.anchor = None
+        self.set(())
+
+    def set(self, uids):
+        # RETURNS: True if the selection changed
+        uids = tuple(uid for uid in uids if uid in self.children)
+        if uids == self.uids:
+            return False
+        self.uids = uids
+        self.members = frozenset(uids)
+        return True
+
+    def clear(self):
+        self.set(())
+
+    def __len__(self):
+        return len(self.uids)
+
+    def __bool__(self):
+        return bool(self.uids)
+
+    def __iter__(self):
+        return iter(self.uids)
+
+    def __contains__(self, uid):
+        return uid in self.members
+
+    def set_anchor(self, uid):
+        self.anchor = uid if uid in self.children else None
+
+    def range_to(self, uid):
+        # RETURNS: the uids from the anchor to uid, in their table's order.
+        # Only the two ends' positions are looked up, so a range over a big
+        # table costs its length, not a walk of the table. Rows of another 
+        # table than the anchor's (or no anchor) give just uid
+        if uid not in self.children:
+            return ()
+        anchor = self.anchor
+        parent = self.children.parent_of(uid)
+        if anchor not in self.children or self.children.parent_of(anchor) != parent:
+            return (uid, )
+        start = self.children.index_of(anchor)
+        end = self.children.index_of(uid)
+        siblings = self.children.children_of(parent)
+        if start > end:
+            return tuple(reversed(siblings[end:start + 1]))
+        return tuple(siblings[start:end + 1])
+
+    def first(self):
+        return self.uids[0] if self.uids else None
+
+    def last(self):
+        return self.uids[-1] if self.uids else None
+
+    def nodes(self):
+        # (uid, node) of each selected node
+        store = self.store
+        for uid in self.uids:
+            yield uid, store[uid]
+
+    def item(self, uid):
+        # The same keys as tree.item(uid), read from the node
+        node = self.store[uid]
+        return {'text': node['text'], 'values': self.values(uid, node),
+                'open': node['isopen'], 'tags': node['tags']}
+
+    def cell(self, uid, col='#0'):
+        # What uid's row shows in column col ('#0' is the tree column)
+        node = self.store[uid]
+        if col in ('', '#0'):
+            return node['text']
+        values = self.values(uid, node)
+        n = int(col[1:]) - 1
+        return values[n] if 0 <= n < len(values) else ''
+
+
+def saved_columns(uid, node):
+    # The columns a node was saved with, for a Selection with no values()
+    return node['columns']
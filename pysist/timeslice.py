@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+#  timeslice.py
+#
+#  2020 Wharpus Web and Dev <wharpus@gmail.com>
+#
+"""pysist.timeslice runs long jobs a slice at a time on the Tk thread.
+
+Inserting a big root's rows in one go freezes the window until the last
+one is in. SliceQueue holds the row inserts as small jobs, and the
+window runs one slice of them per after() callback, so Tk can paint and
+handle input between slices:
+
+    jobs = SliceQueue(budgetMs=16)
+    jobs.put(tree.insert, '', 'end', 'd1')
+    if jobs.run_slice(): # True while jobs are left
+        root.after(1, ...)
+
+Jobs are run in chunks, and each chunk is timed. The chunk size follows
+how long jobs really take, so a slice stays under budgetMs (about one
+frame) on both a fast and a slow machine.
+"""
+
+import time
+from collections import deque
+
+__all__ = ['SliceQueue']
+
+
+class SliceQueue:
+
+    def __init__(self, budgetMs=16, chunk=50, minChunk=5, maxChunk=5000,
+                 clock=time.perf_counter):
+        self.jobs = deque() # (fn, args), run in order
+        self.budgetMs = budgetMs
+        self.chunk = chunk # Jobs to run before looking at the clock
+        self.minChunk = minChunk
+        self.maxChunk = maxChunk
+        self.clock = clock
+        self.slices = 0 # Slices run, for stats
+
+    def __len__(self):
+        return len(self.jobs)
+
+    def __bool__(self):
+        return bool(self.jobs)
+
+    def put(self, fn, *args):
+        self.jobs.append((fn, args))
+
+    def clear(self):
+        self.jobs.clear()
+
+    def run_all(self):
+        # Run every job now, including the ones jobs add while running
+        jobs = self.jobs
+        while jobs:
+            fn, args = jobs.popleft()
+            fn(*args)
+
+    def run_slice(self):
+        # Run jobs until the budget is used up. RETURNS: True if any are left
+        jobs = self.jobs
+        clock = self.clock
+        budget = self.budgetMs / 1000
+        start = clock()
+        while jobs:
+            count = min(self.chunk, len(jobs))
+            began = clock()
+            for x in range(count):
+                fn, args = jobs.popleft()
+                fn(*args)
+            now = clock()
+            self.adapt(count, now - began)
+            if now - start >= budget:
+                break
+        self.slices += 1
+        return bool(jobs)
+
+    def adapt(self, count, elapsed):
+        # Size the next chunk to take about half the budget, so one chunk
+        # can't run far past it. Grow at most 2x, one slow job is not a trend
+        target = self.budgetMs / 2000
+        if elapsed <= 0:
+            chunk = count * 2
+        else:
+            chunk = int(count * target / elapsed)
+        chunk = min(chunk, self.chunk * 2)
+        self.chunk = max(self.minChunk, min(self.maxChunk, chunk))
@@ -0,0 +1,583 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+#  virtualtree.py
+#
+#  2020 Wharpus Web and Dev <wharpus@gmail.com>
+#
+"""pysist.virtualtree is a tree view for tables with huge numbers of rows.
+
+A ttk.Treeview makes a Tk item for every row, so a table with a few
+hundred thousand children gets slow to fill, scroll and close. The
+VirtualTree keeps its items in Python instead, in a :class:`TreeRows`
+model with a flattened list of the rows that can be seen, and only
+draws the rows that fit in the window. Rows have a fixed height, so the
+row under any y position is just a division, and scrolling re-uses the
+same few canvas items with new text.
+
+VirtualTree -- a tk.Frame with the parts of the ttk.Treeview interface
+that Pysist uses: insert, delete, move, index, parent, exists, item,
+focus, selection, selection_set, identify_column, tag_configure, column,
+heading, yview, xview, bind, ['columns'] and cget('columns'). It generates
+<<TreeviewSelect>>, <<TreeviewOpen>> and <<TreeviewClose>> the same way,
+and shift-click / control-click select a range / more rows like ttk.
+
+TreeRows -- the item store and flattened row index, without any Tk.
+"""
+
+import tkinter as tk
+from tkinter import font as tkfont
+
+__all__ = ['VirtualTree', 'TreeRows']
+
+
+class TreeRows:
+    '''
+    Items keyed by iid, each table's ordered children, and rows: the iids
+    that can be seen (every parent open), in display order.
+    '''
+
+    def __init__(self):
+        self.items = {'': {'parent': None, 'depth': -1, 'open': True,
+                           'text': '', 'values': (), 'tags': ()}}
+        self.children = {'': []}
+        self.rows = []
+        self.dirty = False # rows must be rebuilt before they are used
+
+    def __contains__(self, iid):
+        return iid in self.items and iid != ''
+
+    def __len__(self):
+        return len(self.items) - 1
+
+    def insert(self, parent, index, iid, text='', values=(), open=False, tags=()):
+        if iid in self.items:
+            raise ValueError("Item '{}' already exists".format(iid))
+        if parent not in self.items:
+            raise KeyError("Item '{}' not found".format(parent))
+        if isinstance(tags, str):
+            tags = tuple(tags.split())
+        self.items[iid] = {'parent': parent, 'depth': self.items[parent]['depth'] + 1,
+                           'open': bool(open), 'text': text, 'values': tuple(values),
+                           'tags': tuple(tags)}
+        self.children[iid] = []
+        siblings = self.children[parent]
+        atEnd = index == 'end' or int(index) >= len(siblings)
+        if atEnd:
+            siblings.append(iid)
+        else:
+            siblings.insert(int(index), iid)
+        if self.is_shown(parent):
+            if atEnd and not self.dirty and self.ends_rows(parent):
+                self.rows.append(iid) # The usual case while a root loads
+            else:
+                self.dirty = True
+        return iid
+
+    def delete(self, iid):
+        item = self.items[iid]
+        if self.is_visible(iid) and not self.dirty:
+            start = self.index(iid)
+            del self.rows[start:self.subtree_end(start)]
+        self.children[item['parent']].remove(iid)
+        stack = [iid]
+        while stack:
+            uid = stack.pop()
+            stack.extend(self.children.pop(uid))
+            del self.items[uid]
+
+    def move(self, iid, parent, index):
+        item = self.items[iid]
+        self.children[item['parent']].remove(iid)
+        siblings = self.children[parent]
+        if index == 'end' or int(index) >= len(siblings):
+            siblings.append(iid)
+        else:
+            siblings.insert(int(index), iid)
+        item['parent'] = parent
+        stack = [iid]
+        while stack: # The subtree's depths all change by the same amount
+            uid = stack.pop()
+            self.items[uid]['depth'] = self.items[self.items[uid]['parent']]['depth'] + 1
+            stack.extend(self.children[uid])
+        self.dirty = True
+
+    def set_open(self, iid, isopen):
+        item = self.items[iid]
+        if item['open'] == bool(isopen):
+            return
+        item['open'] = bool(isopen)
+        if not self.is_visible(iid) or self.dirty:
+            return
+        start = self.index(iid)
+        if isopen:
+            self.rows[start + 1:start + 1] = list(self.iter_shown(iid))
+        else:
+            del self.rows[start + 1:self.subtree_end(start)]
+
+    def is_shown(self, iid):
+        # True when iid's children can be seen: iid and all its parents are open
+        items = self.items
+        while iid is not None:
+            if not items[iid]['open']:
+                return False
+            iid = items[iid]['parent']
+        return True
+
+    def is_visible(self, iid):
+        return self.is_shown(self.items[iid]['parent'])
+
+    def ends_rows(self, parent):
+        # True when parent's last shown descendant is the last row
+        if not self.rows:
+            return parent == ''
+        iid = self.rows[-1]
+        while iid is not None:
+            if iid == parent:
+                return True
+            iid = self.items[iid]['parent']
+        return False
+
+    def iter_shown(self, iid):
+        # Every row under iid that can be seen, in display order
+        items = self.items
+        children = self.children
+        stack = [iter(children[iid])]
+        while stack:
+            for child in stack[-1]:
+                yield child
+                if items[child]['open'] and children[child]:
+                    stack.append(iter(children[child]))
+                break
+            else:
+                stack.pop()
+
+    def subtree_end(self, start):
+        # The row after the last row under rows[start]
+        rows = self.rows
+        items = self.items
+        depth = items[rows[start]]['depth']
+        end = start + 1
+        while end < len(rows) and items[rows[end]]['depth'] > depth:
+            end += 1
+        return end
+
+    def get_rows(self):
+        if self.dirty:
+            self.rows = list(self.iter_shown(''))
+            self.dirty = False
+        return self.rows
+
+    def index(self, iid):
+        return self.get_rows().index(iid)
+
+    def shown_index(self, iid):
+        # The row of iid, or of the parent it is hidden under (a closed one)
+        hidden = iid
+        iid = self.items[iid]['parent']
+        while iid:
+            if not self.items[iid]['open']:
+                hidden = iid
+            iid = self.items[iid]['parent']
+        return self.index(hidden)
+
+    def span(self, first, last):
+        # The rows from first to last (either way round), for a range select
+        rows = self.get_rows()
+        a, b = sorted((rows.index(first), rows.index(last)))
+        return rows[a:b + 1]
+
+
+class VirtualTree(tk.Frame):
+
+    def __init__(self, master=None, rowHeight=20, font=('Calibri', 11),
+                 headingFont=('Calibri', 12, 'bold'), indent=20,
+                 selectBg='#b3d9d9', yscrollcommand=None, xscrollcommand=None, **kw):
+        tk.Frame.__init__(self, master, **kw)
+        self.model = TreeRows()
+        self.rowHeight = rowHeight
+        self.indent = indent
+        self.selectBg = selectBg
+        self.font = tkfont.Font(root=self, font=font)
+        self.charWidth = max(1, self.font.measure('0'))
+        self.yscrollcommand = yscrollcommand
+        self.xscrollcommand = xscrollcommand
+        self.columns = ()
+        self.colWidths = {'#0': 200}
+        self.colMinWidths = {}
+        self.headings = {'#0': ''}
+        self.tagBg = {}
+        self.selected = []
+        self.focused = ''
+        self.anchor = '' # Where a shift-click range starts
+        self.top = 0 # Index of the first row drawn
+        self.slots = [] # Canvas items of each drawn row, re-used on scroll
+        self.slotsStale = False # Columns changed, so slots must be made again
+        self.pending = False
+
+        self.header = tk.Canvas(self, height=rowHeight + 4, highlightthickness=0,
+                                bd=0, background='#f0eef3')
+        self.header.pack(side=tk.TOP, fill=tk.X)
+        self.headingFont = tkfont.Font(root=self, font=headingFont)
+        self.canvas = tk.Canvas(self, highlightthickness=0, bd=0, background='white',
+                                takefocus=True)
+        self.canvas.pack(side=tk.TOP, fill=tk.BOTH, expand=True)
+        self.canvas.configure(xscrollcommand=self._on_xscroll)
+        self.draw_header()
+
+        self.canvas.bind('<Configure>', lambda e: self.redraw())
+        self.canvas.bind('<ButtonPress-1>', self._on_click)
+        self.canvas.bind('<Double-Button-1>', self._on_double_click)
+        self.canvas.bind('<Shift-Button-1>', self._on_shift_click)
+        self.canvas.bind('<Control-Button-1>', self._on_control_click)
+        self.canvas.bind('<MouseWheel>', lambda e: self.yview_scroll(-e.delta // 120, 'units'))
+        self.canvas.bind('<Button-4>', lambda e: self.yview_scroll(-3, 'units'))
+        self.canvas.bind('<Button-5>', lambda e: self.yview_scroll(3, 'units'))
+        self.canvas.bind('<Up>', lambda e: self._move_focus(-1))
+        self.canvas.bind('<Down>', lambda e: self._move_focus(1))
+        self.canvas.bind('<Prior>', lambda e: self._move_focus(-self.page_rows()))
+        self.canvas.bind('<Next>', lambda e: self._move_focus(self.page_rows()))
+        self.canvas.bind('<Left>', lambda e: self._toggle(self.focused, False))
+        self.canvas.bind('<Right>', lambda e: self._toggle(self.focused, True))
+
+    # ttk.Treeview style interface
+    def bind(self, sequence=None, func=None, add=None):
+        # Bindings go on the canvas, added to the tree's own bindings
+        return self.canvas.bind(sequence, func, '+')
+
+    def __setitem__(self, key, value):
+        if key == 'columns':
+            self.columns = tuple(value)
+            for col in self.columns:
+                self.colWidths.setdefault(col, 200)
+                self.headings.setdefault(col, col)
+            self.draw_header()
+            self.schedule_redraw()
+        else:
+            tk.Frame.__setitem__(self, key, value)
+
+    def __getitem__(self, key):
+        if key == 'columns':
+            return self.columns
+        return tk.Frame.__getitem__(self, key)
+
+    def cget(self, key):
+        return self[key]
+
+    def column(self, col, option=None, **kw):
+        # Like ttk, column(col, 'width') returns an option, column(col,
+        # width=80) sets it and column(col) returns them all
+        if 'minwidth' in kw:
+            self.colMinWidths[col] = int(kw['minwidth'])
+        if 'width' in kw:
+            self.colWidths[col] = max(int(kw['width']), self.colMinWidths.get(col, 0))
+        if 'width' in kw or 'minwidth' in kw:
+            self.draw_header()
+            self.schedule_redraw()
+        data = {'width': self.colWidths.get(col, 200), 
+                'minwidth': self.colMinWidths.get(col, 20), 
+                'stretch': True, 'anchor': 'w', 'id': col}
+        if option is not None:
+            return data[option]
+        return data
+
+    def heading(self, col, option=None, **kw):
+        # Like ttk, heading(col, 'text') returns an option
+        if 'text' in kw:
+            self.headings[col] = kw['text']
+            self.draw_header()
+        data = {'text': self.headings.get(col, ''), 'image': '', 'anchor': 'w', 
+                'command': ''}
+        if option is not None:
+            return data[option]
+        return data
+
+    def tag_configure(self, tag, background=None, **kw):
+        if background is not None:
+            self.tagBg[tag] = background
+            self.schedule_redraw()
+
+    def insert(self, parent, index, iid=None, text='', values=(), open=False, tags=(), **kw):
+        if iid is None: # Made up like ttk does, ie. 'I001'
+            self.lastIid = getattr(self, 'lastIid', 0) + 1
+            iid = 'I{:03X}'.format(self.lastIid)
+        iid = self.model.insert(parent, index, iid, text, values, open, tags)
+        self.schedule_redraw()
+        return iid
+
+    def delete(self, *iids):
+        for iid in iids:
+            if iid in self.model:
+                self.model.delete(iid)
+        self.selected = [iid for iid in self.selected if iid in self.model]
+        if self.focused and self.focused not in self.model:
+            self.focused = ''
+        self.schedule_redraw()
+
+    def exists(self, iid):
+        return iid in self.model
+
+    def item(self, iid, option=None, **kw):
+        item = self.model.items[iid]
+        if 'open' in kw:
+            self.model.set_open(iid, kw['open'])
+        for key in ('values', 'tags'):
+            if key in kw:
+                item[key] = tuple(kw[key])
+        if 'text' in kw:
+            item['text'] = kw['text']
+        if kw:
+            self.schedule_redraw()
+        data = {'text': item['text'], 'image': '', 'values': list(item['values']),
+                'open': item['open'], 'tags': list(item['tags'])}
+        if option is not None:
+            return data[option]
+        return data
+
+    def parent(self, iid):
+        return self.model.items[iid]['parent']
+
+    def index(self, iid):
+        return self.model.children[self.model.items[iid]['parent']].index(iid)
+
+    def move(self, iid, parent, index):
+        self.model.move(iid, parent, index)
+        self.schedule_redraw()
+
+    def get_children(self, iid=''):
+        return tuple(self.model.children[iid])
+
+    def focus(self, iid=None):
+        if iid is None:
+            return self.focused
+        self.focused = iid
+
+    def selection(self):
+        return tuple(self.selected)
+
+    def selection_set(self, *items):
+        if len(items) == 1 and isinstance(items[0], (list, tuple)):
+            items = items[0]
+        self.selected = [iid for iid in items if iid in self.model]
+        self.schedule_redraw()
+        self.canvas.event_generate('<<TreeviewSelect>>')
+
+    def see(self, iid):
+        # Open iid's parents and scroll it into view
+        parent = self.model.items[iid]['parent']
+        while parent:
+            self.model.set_open(parent, True)
+            parent = self.model.items[parent]['parent']
+        row = self.model.index(iid)
+        if not self.top <= row < self.top + self.page_rows():
+            self.top = max(0, row - self.page_rows() // 2)
+        self.schedule_redraw()
+
+    def identify_row(self, y):
+        row = self.top + int(self.canvas.canvasy(y)) // self.rowHeight
+        rows = self.model.get_rows()
+        return rows[row] if 0 <= row < len(rows) else ''
+
+    def identify_column(self, x):
+        x = self.canvas.canvasx(x)
+        for n, col in enumerate(('#0', ) + self.columns):
+            x -= self.colWidths[col]
+            if x < 0:
+                return '#{}'.format(n)
+        return ''
+
+    def yview(self, *args):
+        if not args:
+            count = max(1, len(self.model.get_rows()))
+            return self.top / count, min(1.0, (self.top + self.page_rows()) / count)
+        if args[0] == 'moveto':
+            self.top = int(float(args[1]) * len(self.model.get_rows()))
+        elif args[0] == 'scroll':
+            self.yview_scroll(int(args[1]), args[2])
+            return
+        self.redraw()
+
+    def yview_scroll(self, number, what='units'):
+        self.top += number * (self.page_rows() if what == 'pages' else 1)
+        self.redraw()
+
+    def xview(self, *args):
+        result = self.canvas.xview(*args)
+        self.header.xview(*args)
+        return result
+
+    # Drawing
+    def page_rows(self):
+        return max(1, self.canvas.winfo_height() // self.rowHeight)
+
+    def col_x(self):
+        # Left x of every column, and the total width
+        xs = []
+        x = 0
+        for col in ('#0', ) + self.columns:
+            xs.append(x)
+            x += self.colWidths[col]
+        return xs, x
+
+    def draw_header(self):
+        self.header.delete('all')
+        xs, width = self.col_x()
+        for x, col in zip(xs, ('#0', ) + self.columns):
+            self.header.create_rectangle(x, 0, x + self.colWidths[col], self.rowHeight + 4,
+                                         fill='#f0eef3', outline='#c8c8c8')
+            self.header.create_text(x + 4, (self.rowHeight + 4) // 2, anchor=tk.W,
+                                    text=self.headings.get(col, ''), font=self.headingFont)
+        self.header.configure(scrollregion=(0, 0, width, self.rowHeight + 4))
+        self.slotsStale = True
+
+    def schedule_redraw(self):
+        # Many inserts make one redraw, when Tk is next idle
+        if not self.pending:
+            self.pending = True
+            self.after_idle(self.redraw)
+
+    def redraw(self):
+        self.pending = False
+        rows = self.model.get_rows()
+        count = self.page_rows() + 1
+        self.top = max(0, min(self.top, len(rows) - count + 1))
+        xs, width = self.col_x()
+        if len(self.slots) != count or self.slotsStale:
+            self.make_slots(count, xs, width)
+        canvas = self.canvas
+        items = self.model.items
+        children = self.model.children
+        selected = set(self.selected)
+        for n, slot in enumerate(self.slots):
+            row = self.top + n
+            if row >= len(rows):
+                canvas.itemconfigure(slot['tag'], state='hidden')
+                continue
+            iid = rows[row]
+            item = items[iid]
+            y = n * self.rowHeight
+            if iid in selected:
+                bg = self.selectBg
+            else:
+                bg = next((self.tagBg[tag] for tag in item['tags'] if tag in self.tagBg),
+                          'white')
+            canvas.itemconfigure(slot['tag'], state='normal')
+            canvas.itemconfigure(slot['bg'], fill=bg)
+            x = item['depth'] * self.indent
+            if children[iid]:
+                canvas.itemconfigure(slot['arrow'], text='▾' if item['open'] else '▸')
+            else:
+                canvas.itemconfigure(slot['arrow'], text='')
+            canvas.coords(slot['arrow'], x + 8, y + self.rowHeight // 2)
+            canvas.coords(slot['text'], x + self.indent, y + self.rowHeight // 2)
+            canvas.itemconfigure(slot['text'], text=self.clip(item['text'],
+                                        self.colWidths['#0'] - x - self.indent))
+            for c, colItem in enumerate(slot['cols']):
+                value = item['values'][c] if c < len(item['values']) else ''
+                canvas.itemconfigure(colItem, text=self.clip(str(value),
+                                        self.colWidths[self.columns[c]] - 8))
+        total = max(1, len(rows))
+        if self.yscrollcommand is not None:
+            self.yscrollcommand(self.top / total, min(1.0, (self.top + count - 1) / total))
+
+    def make_slots(self, count, xs, width):
+        # Canvas items for count rows, moved into place by each redraw
+        self.canvas.delete('all')
+        self.slots = []
+        mid = self.rowHeight // 2
+        for n in range(count):
+            y = n * self.rowHeight
+            tag = 'slot{}'.format(n)
+            slot = {'tag': tag}
+            slot['bg'] = self.canvas.create_rectangle(0, y, width, y + self.rowHeight,
+                                                      outline='', tags=tag)
+            slot['arrow'] = self.canvas.create_text(8, y + mid, anchor=tk.CENTER,
+                                                    font=self.font, tags=tag)
+            slot['text'] = self.canvas.create_text(self.indent, y + mid, anchor=tk.W,
+                                                   font=self.font, tags=tag)
+            slot['cols'] = [self.canvas.create_text(x + 4, y + mid, anchor=tk.W,
+                                                    font=self.font, tags=tag)
+                            for x in xs[1:]]
+            self.slots.append(slot)
+        self.canvas.configure(scrollregion=(0, 0, width, count * self.rowHeight))
+        self.slotsStale = False
+
+    def clip(self, text, width):
+        # Cut text to about width pixels, without measuring every string
+        chars = max(0, width // self.charWidth)
+        return text if len(text) <= chars else text[:max(0, chars - 1)] + '…'
+
+    # Events
+    def _on_xscroll(self, first, last):
+        self.header.xview('moveto', first)
+        if self.xscrollcommand is not None:
+            self.xscrollcommand(first, last)
+
+    def _on_click(self, event):
+        self.canvas.focus_set()
+        iid = self.identify_row(event.y)
+        if not iid:
+            return
+        item = self.model.items[iid]
+        x = self.canvas.canvasx(event.x) - item['depth'] * self.indent
+        if 0 <= x < self.indent and self.model.children[iid]:
+            self._toggle(iid, not item['open'])
+            return
+        self.focused = iid
+        self.anchor = iid
+        self.selection_set(iid)
+
+    def _on_shift_click(self, event):
+        # Select every row from the anchor to here
+        iid = self.identify_row(event.y)
+        if not iid:
+            return
+        self.canvas.focus_set()
+        anchor = self.anchor
+        if not anchor or anchor not in self.model or not self.model.is_visible(anchor):
+            anchor = iid
+        self.focused = iid
+        self.selection_set(self.model.span(anchor, iid))
+
+    def _on_control_click(self, event):
+        # Add a row to the selection, or take it out
+        self.canvas.focus_set()
+        iid = self.identify_row(event.y)
+        if not iid:
+            return
+        self.focused = iid
+        self.anchor = iid
+        if iid in self.selected:
+            self.selection_set([x for x in self.selected if x != iid])
+        else:
+            self.selection_set(self.selected + [iid])
+
+    def _on_double_click(self, event):
+        iid = self.identify_row(event.y)
+        if iid and self.model.children[iid]:
+            self._toggle(iid, not self.model.items[iid]['open'])
+
+    def _toggle(self, iid, isopen):
+        if not iid or self.model.items[iid]['open'] == isopen:
+            return
+        # Same order as ttk: focus, event, then open, so handlers can fill it
+        self.focused = iid
+        if isopen:
+            self.canvas.event_generate('<<TreeviewOpen>>')
+        else:
+            self.canvas.event_generate('<<TreeviewClose>>')
+        if iid in self.model:
+            self.model.set_open(iid, isopen)
+        self.redraw()
+
+    def _move_focus(self, step):
+        rows = self.model.get_rows()
+        if not rows:
+            return
+        row = self.model.shown_index(self.focused) + step if self.focused in self.model else 0
+        row = max(0, min(row, len(rows) - 1))
+        self.focused = rows[row]
+        if not self.top <= row < self.top + self.page_rows():
+            self.top = row if step < 0 else row - self.page_rows() + 1
+        self.selection_set(self.focused)
+        self.redraw()
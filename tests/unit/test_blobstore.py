@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+#  test_blobstore.py
+#
+
+'''
+The :class:`TestBlobStore` class is a unittest class.
+'''
+
+import io
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', '..', 'pysist'))
+from Pystore import BlobStore
+
+class TestBlobStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.blobs = BlobStore(os.path.join(self.tmpdir.name, 'data'))
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_same_content_is_stored_once(self):
+        FILE = os.path.join(self.tmpdir.name, 'photo1.png')
+        with open(FILE, 'wb') as outfile:
+            outfile.write(b'\x89PNG' * 1000)
+        ref = self.blobs.put_file(FILE)
+        self.assertEqual(self.blobs.put_bytes(b'\x89PNG' * 1000), ref)
+        self.assertEqual(list(self.blobs.iter_refs()), [ref])
+        self.assertEqual(os.listdir(self.blobs.tempDir), [])
+
+    def test_fan_out_path(self):
+        ref = self.blobs.put_bytes(b'test')
+        digest = ref.split(':')[1]
+        self.assertEqual(ref, 'sha256:9f86d081884c7d659a2feaa0c55ad015'
+                              'a3bf4f1b2b0b822cd15d6c15b0f00a08')
+        self.assertEqual(self.blobs.path_of(ref), os.path.join(
+            self.blobs.blobDir, '9f', '86', digest))
+        self.assertIn(ref, self.blobs)
+        self.assertEqual(self.blobs.get_bytes(ref), b'test')
+
+    def test_streamed_in_chunks(self):
+        data = os.urandom(10000)
+        ref = self.blobs.put_stream(io.BytesIO(data), chunkSize=333)
+        self.assertEqual(self.blobs.stored_size(ref), 10000)
+        self.assertEqual(self.blobs.get_bytes(ref), data)
+
+    def test_bad_refs(self):
+        for ref in ('', './path/to/file/photo1.png', 'tablename:uid', 'sha256:abc'):
+            self.assertNotIn(ref, self.blobs)
+        with self.assertRaises(ValueError):
+            self.blobs.path_of('md5:d41d8cd98f00b204e9800998ecf8427e')
+
+    def test_compressed_by_policy(self):
+        text = 'name,value\n' * 5000
+        self.assertEqual(self.blobs.codec_for('utf-8'), 'gzip')
+        self.assertIsNone(self.blobs.codec_for('bytes'))
+        ref = self.blobs.put_bytes(text.encode(), self.blobs.codec_for('utf-8'))
+        self.assertEqual(self.blobs.codec_of(ref), 'gzip')
+        self.assertLess(self.blobs.stored_size(ref), len(text) / 20)
+        with self.blobs.open(ref) as infile:
+            self.assertEqual(infile.read(11), b'name,value\n')
+        self.assertEqual(self.blobs.get_bytes(ref), text.encode())
+        # Same content, other codec: still the one copy
+        self.assertEqual(self.blobs.put_bytes(text.encode(), 'lzma'), ref)
+        self.assertEqual(list(self.blobs.iter_refs()), [ref])
+        self.assertLess(self.blobs.compression_stats()['gzip']['ratio'], 0.05)
+
+    def test_incompressible_kept_as_is(self):
+        data = os.urandom(5000)
+        ref = self.blobs.put_bytes(data, 'lzma')
+        self.assertIsNone(self.blobs.codec_of(ref))
+        self.assertEqual(self.blobs.get_bytes(ref), data)
+        self.assertEqual(os.listdir(self.blobs.tempDir), [])
+
+    def test_remove_unused(self):
+        keep = self.blobs.put_bytes(b'keep')
+        self.blobs.put_bytes(b'drop')
+        self.assertEqual(self.blobs.remove_unused([keep]), 1)
+        self.assertEqual(list(self.blobs.iter_refs()), [keep])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+#  test_changeset.py
+#
+
+'''
+The :class:`TestChangeSet` class is a unittest class.
+'''
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', '..', 'pysist'))
+from changeset import ChangeSet, INSERT, UPDATE, MOVE, DELETE, REPLACE
+
+
+class TestChangeSet(unittest.TestCase):
+
+    def setUp(self):
+        self.changes = ChangeSet()
+
+    def test_many_updates_are_one(self):
+        for x in range(10000):
+            self.changes.update('f{}'.format(x % 10))
+        self.assertEqual(len(self.changes), 10)
+        self.assertEqual(self.changes.kind_of('f3'), UPDATE)
+
+    def test_insert_folds_later_changes(self):
+        self.changes.insert('f1')
+        self.changes.update('f1')
+        self.changes.move('f1')
+        self.assertEqual(self.changes.items(), [('f1', INSERT)])
+        self.changes.delete('f1', 'root')
+        self.assertFalse(self.changes) # Never shown
+        self.assertEqual(self.changes.deleted(), set())
+
+    def test_update_then_move_is_a_move(self):
+        self.changes.update('f1')
+        self.changes.move('f1')
+        self.changes.update('f1')
+        self.assertEqual(self.changes.kind_of('f1'), MOVE)
+
+    def test_delete_then_insert_is_a_replace(self):
+        self.changes.update('f1')
+        self.changes.delete('f1', 'd1')
+        self.assertEqual(self.changes.kind_of('f1'), DELETE)
+        self.changes.insert('f1')
+        self.assertEqual(self.changes.kind_of('f1'), REPLACE)
+        self.assertEqual(self.changes.parents, {'f1': 'd1'})
+
+    def test_order_of_first_change(self):
+        self.changes.update('b')
+        self.changes.delete('a', 'root')
+        self.changes.insert('c')
+        self.changes.update('b')
+        self.assertEqual([uid for uid, kind in self.changes.items()], ['b', 'a', 'c'])
+        self.assertEqual(self.changes.deleted(), {'a'})
+
+
+if __name__ == '__main__':
+    unittest.main()
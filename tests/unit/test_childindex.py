@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+#  test_childindex.py
+#
+
+'''
+The :class:`TestChildIndex` class is a unittest class.
+'''
+
+import os
+import sys
+import json
+import random
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', '..', 'pysist'))
+from Pystore import ChildIndex
+
+ROOT_JSON = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        '..', '..', 'pysist', 'root.json')
+
+class TestChildIndex(unittest.TestCase):
+
+    def setUp(self):
+        with open(ROOT_JSON) as json_file:
+            self.nodes = json.load(json_file)['nodes']
+        self.index = ChildIndex((uid, node['parent']) for uid, node in self.nodes.items())
+
+    def test_children_in_order(self):
+        self.assertEqual(self.index.children_of('root'), ['d1', 'd2'])
+        self.assertEqual(self.index.children_of('d1'), ['f1', 'v1', 'f2'])
+        self.assertEqual(self.index.children_of('f1'), [])
+        self.assertEqual(self.index.roots(), ['root'])
+        self.assertEqual(self.index.count('root'), 8)
+
+    def test_any_key_order(self):
+        pairs = [(uid, node['parent']) for uid, node in self.nodes.items()]
+        random.Random(5).shuffle(pairs)
+        index = ChildIndex(pairs)
+        order = list(index.topological())
+        self.assertEqual(len(order), len(self.nodes))
+        for uid in order:
+            parent = self.nodes[uid]['parent']
+            if parent:
+                self.assertLess(order.index(parent), order.index(uid))
+
+    def test_move_and_remove(self):
+        self.index.move('d2', 'd1', 0)
+        self.assertEqual(self.index.children_of('d1'), ['d2', 'f1', 'v1', 'f2'])
+        self.assertEqual(self.index.walk('d1'), ['d2', 'f3', 'i1', 'f4', 'f1', 'v1', 'f2'])
+        with self.assertRaises(ValueError):
+            self.index.move('d1', 'f3')
+        self.assertEqual(self.index.remove('d2'), ['d2', 'f3', 'i1', 'f4'])
+        self.assertNotIn('i1', self.index)
+        self.assertEqual(self.index.children_of('d1'), ['f1', 'v1', 'f2'])
+
+    def test_totals_follow_changes(self):
+        pairs = [(uid, node['parent']) for uid, node in self.nodes.items()]
+        random.Random(7).shuffle(pairs) # Children before parents too
+        index = ChildIndex(pairs)
+        index.set_sizes([('f3', 100), ('i1', 20), ('f1', 3)])
+        self.assertEqual((index.count('root'), index.count('d2')), (8, 3))
+        self.assertEqual((index.total_size('root'), index.total_size('d2')), (123, 120))
+        index.move('d2', 'd1')
+        self.assertEqual((index.count('d1'), index.total_size('d1')), (7, 123))
+        index.set_size('i1', 0)
+        self.assertEqual(index.total_size('root'), 103)
+        index.remove('d2')
+        self.assertEqual((index.count('root'), index.total_size('root')), (4, 3))
+        self.assertEqual(index.child_count('d1'), 3)
+        for uid in index.parents: # Same as walking each subtree
+            self.assertEqual(index.count(uid), len(index.walk(uid)))
+
+    def test_many_moves_and_removes(self):
+        # Same order as a plain list, with holes left and closed up
+        index = ChildIndex(('f{}'.format(x), 'big') for x in range(200))
+        index.add('other', '')
+        expected = ['f{}'.format(x) for x in range(200)]
+        rand = random.Random(3)
+        for x in range(300):
+            uid = rand.choice(expected)
+            expected.remove(uid)
+            if x % 3 == 0:
+                index.remove(uid)
+            elif x % 3 == 1:
+                index.move(uid, 'other')
+                at = rand.randrange(len(expected) + 1)
+                index.move(uid, 'big', at)
+                expected.insert(at, uid)
+            else:
+                index.move(uid, 'other')
+            self.assertEqual(index.child_count('big'), len(expected))
+            if expected:
+                at = rand.randrange(len(expected))
+                self.assertEqual(index.index_of(expected[at]), at)
+            if x % 25 == 0:
+                self.assertEqual(index.children_of('big'), expected)
+        self.assertEqual(index.walk('big'), expected)
+        self.assertEqual([index.index_of(uid) for uid in expected], list(range(len(expected))))
+        self.assertEqual(index.count('other'), 100)
+
+    def test_insert_leaves_siblings_before_it(self):
+        # Only the positions after the insert are rewritten, and only when asked for
+        index = ChildIndex(('f{}'.format(x), 'big') for x in range(1000))
+        before = dict(index.positions)
+        index.add('new', 'big', index=500)
+        index.add('new2', 'big', index=700)
+        self.assertEqual({uid: index.positions[uid] for uid in before}, before)
+        self.assertEqual(index.index_of('f499'), 499)
+        self.assertEqual(index.positions, dict(before, new=500, new2=700))
+        self.assertEqual(index.index_of('f500'), 501)
+        self.assertEqual(index.index_of('new2'), 700)
+        self.assertEqual(index.index_of('f999'), 1001)
+        for uid, position in before.items():
+            self.assertEqual(index.positions[uid], position + (position >= 500) + (position >= 699))
+
+    def test_rename(self):
+        self.index.rename('d2', 'images')
+        self.assertEqual(self.index.children_of('root'), ['d1', 'images'])
+        self.assertEqual(self.index.parent_of('f4'), 'images')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+#  test_ingest.py
+#
+
+'''
+The :class:`TestFileIngest` class is a unittest class.
+'''
+
+import os
+import sys
+import time
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', '..', 'pysist'))
+from Pystore import BlobStore, FileIngest
+
+TYPE_MAP = {'png': ['image', 'bytes'], 'txt': ['file', 'utf-8']}
+
+class TestFileIngest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.blobs = BlobStore(os.path.join(self.tmpdir.name, 'data'))
+        self.source = os.path.join(self.tmpdir.name, 'files')
+        os.makedirs(os.path.join(self.source, 'sub'))
+        for x in range(40):
+            folder = self.source if x % 2 else os.path.join(self.source, 'sub')
+            ext = ('png', 'txt', 'dat')[x % 3]
+            with open(os.path.join(folder, 'file{}.{}'.format(x, ext)), 'wb') as outfile:
+                outfile.write(b'same' if x < 10 else str(x).encode())
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def collect(self, ingest):
+        records = []
+        while not ingest.is_done():
+            records.extend(ingest.results(7))
+            time.sleep(0.001)
+        return records
+
+    def test_import_folder(self):
+        ingest = FileIngest(self.blobs, TYPE_MAP, workers=3, queueSize=4)
+        ingest.start([self.source])
+        records = self.collect(ingest)
+        self.assertEqual(len(records), 40)
+        self.assertEqual(ingest.progress(), (40, 40, True, 0, 
+                                             sum(r['size'] for r in records)))
+        types = {r['name']: r['rowtype'] for r in records}
+        self.assertEqual(types['file0.png'], 'image')
+        self.assertEqual(types['file1.txt'], 'file')
+        self.assertEqual(types['file2.dat'], 'file')
+        self.assertEqual(len(list(self.blobs.iter_refs())), 31) # 10 are the same
+
+    def test_missing_file(self):
+        ingest = FileIngest(self.blobs, TYPE_MAP, workers=1)
+        ingest.start([os.path.join(self.source, 'nofile.png')])
+        records = self.collect(ingest)
+        self.assertIsNotNone(records[0]['error'])
+        self.assertEqual(ingest.progress()[3], 1)
+
+    def test_cancel(self):
+        ingest = FileIngest(self.blobs, TYPE_MAP, workers=2, queueSize=1)
+        ingest.start([self.source])
+        ingest.cancel()
+        records = self.collect(ingest) # Records still come until it is done
+        ingest.wait(5)
+        self.assertTrue(ingest.is_cancelled())
+        self.assertEqual(ingest.running, 0)
+        self.assertLess(len(records), 40)
+        # Every stored file has a record, none is left only in the blob store
+        refs = {r['dataRef'] for r in records if r['error'] is None}
+        self.assertEqual(refs, set(self.blobs.iter_refs()))
+
+    def test_codec_error(self):
+        def put_file(path, codec=None):
+            raise ValueError('bad codec')
+        self.blobs.put_file = put_file
+        ingest = FileIngest(self.blobs, TYPE_MAP, workers=1)
+        ingest.start([os.path.join(self.source, 'file1.txt')])
+        records = self.collect(ingest)
+        self.assertEqual(records[0]['error'], 'bad codec')
+
+if __name__ == '__main__':
+    unittest.main()
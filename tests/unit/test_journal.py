@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+#  test_journal.py
+#
+
+'''
+The :class:`TestRootJournal` class is a unittest class.
+'''
+
+import os
+import sys
+import json
+import shutil
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', '..', 'pysist'))
+from Pystore import RootJournal
+
+ROOT_JSON = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        '..', '..', 'pysist', 'root.json')
+
+class TestRootJournal(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.FILE = os.path.join(self.tmpdir.name, 'root.json')
+        shutil.copy(ROOT_JSON, self.FILE)
+        self.treeroot = self.load(self.FILE)
+        self.nodes = self.treeroot['nodes']
+        self.prefs = self.treeroot['prefs']
+        self.journal = RootJournal(self.FILE, interval=0, maxRatio=100)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def load(self, FILE):
+        with open(FILE) as json_file:
+            return json.load(json_file)
+
+    def test_save_appends_only_changes(self):
+        before = os.path.getsize(self.FILE)
+        self.nodes['v1']['value'] = 'Wharpus'
+        self.journal.mark_dirty('v1')
+        written = self.journal.save(self.nodes, self.prefs)
+        self.assertEqual(os.path.getsize(self.FILE), before)
+        self.assertEqual(os.path.getsize(self.journal.JOURNAL), written)
+        self.assertLess(written, before / 4)
+        self.assertEqual(self.journal.save(self.nodes, self.prefs), 0)
+
+    def test_replay(self):
+        self.nodes['v1']['value'] = 'Wharpus'
+        self.journal.mark_dirty('v1')
+        del self.nodes['f4']
+        self.journal.mark_deleted('f4')
+        self.prefs['rootGeo'] = '+1+1'
+        self.journal.mark_prefs()
+        self.journal.save(self.nodes, self.prefs)
+
+        treeroot = self.load(self.FILE)
+        journal = RootJournal(self.FILE)
+        self.assertEqual(journal.replay(treeroot['nodes'], treeroot['prefs']), 3)
+        self.assertEqual(treeroot['nodes'], self.nodes)
+        self.assertEqual(treeroot['prefs'], self.prefs)
+
+    def test_torn_entry_is_dropped(self):
+        self.nodes['v1']['value'] = 'Wharpus'
+        self.journal.mark_dirty('v1')
+        self.journal.save(self.nodes, self.prefs)
+        with open(self.journal.JOURNAL, 'a') as journal:
+            journal.write('{"op": "put", "uid": "v')
+        treeroot = self.load(self.FILE)
+        journal = RootJournal(self.FILE)
+        self.assertEqual(journal.replay(treeroot['nodes'], treeroot['prefs']), 1)
+        self.assertEqual(treeroot['nodes']['v1']['value'], 'Wharpus')
+        with open(journal.JOURNAL) as journal_file:
+            self.assertEqual(len(journal_file.readlines()), 1)
+
+    def test_compact_after_max_entries(self):
+        self.journal.maxEntries = 2
+        for uid in ('f1', 'f2'):
+            self.nodes[uid]['value'] = 'changed'
+            self.journal.mark_dirty(uid)
+            self.journal.save(self.nodes, self.prefs)
+        self.assertFalse(os.path.isfile(self.journal.JOURNAL))
+        self.assertEqual(self.load(self.FILE)['nodes'], self.nodes)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+#  test_mmapstore.py
+#
+
+'''
+The :class:`TestMmapNodes` class is a unittest class.
+'''
+
+import os
+import sys
+import json
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', '..', 'pysist'))
+from Pystore import MmapNodes, write_proot, read_proot, node_item
+
+ROOT_JSON = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        '..', '..', 'pysist', 'root.json')
+
+class TestMmapNodes(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.FILE = os.path.join(self.tmpdir.name, 'root.proot')
+        with open(ROOT_JSON) as json_file:
+            self.treeroot = json.load(json_file)
+        write_proot(self.FILE, self.treeroot['nodes'], self.treeroot['prefs'])
+        self.nodes = MmapNodes(self.FILE)
+
+    def tearDown(self):
+        self.nodes.close()
+        self.tmpdir.cleanup()
+
+    def test_decode_on_touch(self):
+        self.assertEqual(len(self.nodes), len(self.treeroot['nodes']))
+        self.assertTrue(self.nodes.node_exists('f3'))
+        self.assertFalse(self.nodes.node_exists('zz'))
+        self.assertEqual(self.nodes.decoded, {})
+        self.assertEqual(self.nodes.get_node('i1'), self.treeroot['nodes']['i1'])
+        self.assertEqual(list(self.nodes.decoded), ['i1'])
+        self.assertEqual(list(self.nodes), list(self.treeroot['nodes']))
+        self.assertEqual(list(self.nodes.decoded), ['i1'])
+        self.assertEqual(list(self.nodes.iter_parents())[:3], 
+                         [('root', ''), ('d1', 'root'), ('d2', 'root')])
+        self.assertEqual(list(self.nodes.decoded), ['i1'])
+        self.assertEqual(self.nodes.prefs(), self.treeroot['prefs'])
+
+    def test_fresh_items(self):
+        items = list(self.nodes.iter_items())
+        self.assertEqual(self.nodes.decoded, {})
+        self.nodes['v1']['text'] = 'Wharpus'
+        del self.nodes['f2']
+        fresh = {item[0]: item for item in self.nodes.fresh_items(items)}
+        self.assertEqual(fresh['v1'], node_item('v1', self.nodes['v1']))
+        self.assertEqual(fresh['v1'][3], 'Wharpus')
+        self.assertNotIn('f2', fresh)
+        self.assertEqual(len(fresh), len(items) - 1)
+        self.assertEqual(self.nodes.item_count(), len(items))
+
+    def test_snapshot(self):
+        self.nodes['v1']['value'] = 'Wharpus'
+        self.nodes['n1'] = {'uid': 'n1', 'parent': 'd1'}
+        del self.nodes['f2']
+        records = self.nodes.snapshot()
+        self.nodes.save(self.treeroot['prefs']) # Remapped before the walk
+        records = dict(records)
+        self.assertEqual(list(records), list(self.nodes))
+        self.assertEqual(records['v1']['value'], 'Wharpus')
+        self.assertNotIn('f2', records)
+
+    def test_edit_and_save(self):
+        self.nodes['v1']['value'] = 'Wharpus'
+        self.nodes['n1'] = {'uid': 'n1', 'parent': 'd1'}
+        del self.nodes['f2']
+        self.assertNotIn('f2', self.nodes)
+        self.assertEqual(len(self.nodes), len(self.treeroot['nodes']))
+        self.nodes.save(self.treeroot['prefs'])
+        nodes, prefs = read_proot(self.FILE)
+        self.assertEqual(nodes['v1']['value'], 'Wharpus')
+        self.assertEqual(list(nodes)[-1], 'n1')
+        self.assertNotIn('f2', nodes)
+        self.assertEqual(self.nodes['n1']['parent'], 'd1')
+
+    def test_forget_keeps_marked_changes(self):
+        self.nodes['f1']['value'] = 'changed'
+        self.nodes.mark_dirty('f1')
+        self.nodes['v1']['value'] = 'not marked'
+        self.nodes.forget()
+        self.assertEqual(self.nodes['f1']['value'], 'changed')
+        self.assertEqual(self.nodes['v1']['value'], 'Greg')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+#  test_node.py
+#
+
+'''
+The :class:`TestNode` class is a unittest class.
+'''
+
+import os
+import sys
+import copy
+import json
+import pickle
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', '..', 'pysist'))
+from Pystore import Node, node_json
+
+NODE = {'rowtype': 'var', 'columns': ['Greg', 'STR[4] var'], 'isopen': False,
+        'parent': 'd1', 'position': 'end', 'tags': 'v', 'text': 'myName',
+        'uid': 'v1', 'value': 'Greg', 'type': 'str', 'ref': 'nodes:v1:value'}
+
+
+class TestNode(unittest.TestCase):
+
+    def test_reads_like_the_dict(self):
+        node = Node(NODE)
+        self.assertEqual(node, NODE)
+        self.assertEqual(list(node), list(NODE))
+        self.assertEqual(len(node), len(NODE))
+        self.assertEqual(node['columns'], ['Greg', 'STR[4] var'])
+        self.assertNotIn('dataRef', node)
+        self.assertIsNone(node.get('dataRef'))
+        with self.assertRaises(KeyError):
+            node['size']
+
+    def test_columns_keep_the_old_value(self):
+        node = Node(NODE)
+        node['value'] = 'Ann'
+        self.assertEqual(node['columns'], ['Greg', 'STR[4] var'])
+        node['columns'] = ['Ann', 'STR[3] var']
+        self.assertEqual(node['columns'], ['Ann', 'STR[3] var'])
+        del node['value']
+        self.assertEqual(node['columns'], ['Ann', 'STR[3] var'])
+
+    def test_columns_edited_in_place(self):
+        node = Node(json.loads(json.dumps(NODE)))
+        self.assertIs(node['columns'][0], node['value'])
+        node['columns'][1] = 'STR var'
+        node['columns'].append('more')
+        self.assertEqual(node['columns'], ['Greg', 'STR var', 'more'])
+        self.assertEqual(dict(node)['columns'], ['Greg', 'STR var', 'more'])
+
+    def test_other_keys(self):
+        node = Node(NODE, note='x')
+        self.assertEqual(list(node)[-1], 'note')
+        del node['note']
+        self.assertNotIn('note', node)
+        self.assertIsNone(node._extra)
+
+    def test_strings_are_shared(self):
+        a = Node(json.loads(json.dumps(NODE)))
+        b = Node(json.loads(json.dumps(NODE)))
+        self.assertIs(a['rowtype'], b['rowtype'])
+        self.assertIs(a['parent'], b['parent'])
+
+    def test_copies_and_json(self):
+        node = Node(NODE)
+        self.assertEqual(copy.deepcopy(node), NODE)
+        self.assertEqual(pickle.loads(pickle.dumps(node)), NODE)
+        self.assertEqual(json.dumps(node, default=node_json), json.dumps(NODE))
+        with self.assertRaises(TypeError):
+            json.dumps(object(), default=node_json)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+#  test_nodetypes.py
+#
+
+'''
+The :class:`TestTypeRegistry` class is a unittest class.
+'''
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', '..', 'pysist'))
+from nodetypes import TypeRegistry, payload_size
+
+ROW_TYPES = ["Root", "Table", "Dir", "file", "text", "var", "image", "bytes", "script",
+             "code", "none"]
+TAG_NAMES = ["R", "T", "D", "f", "t", "v", "i", "b", "s", "c", "n"]
+TAG_BG = ["#DDB3B3", "#F0CFCF", "#F0CFCF", "#F8F8F8", "#F8F8F8", "#9EEEEB", "#A5E0F5",
+          "#E2E389", "#F8F8F8", "#F8F8F8", "#FFFFFF"]
+TYPE_MAP = {'png': ['image', 'bytes'], 'jpg': ['image', 'bytes'], 'svg': ['image', 'utf-8'],
+            'txt': ['file', 'utf-8'], 'py': ['script', 'utf-8']}
+
+class TestTypeRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.types = TypeRegistry(ROW_TYPES, TAG_NAMES, TAG_BG, TYPE_MAP)
+
+    def test_rowtype_lookups(self):
+        self.assertEqual(self.types.tag_of('Root'), 'R')
+        self.assertEqual(self.types.tag_of('child Table'), 'T')
+        self.assertIn('child Table', self.types.types) # Remembered
+        self.assertEqual(self.types.row('image').bg, '#A5E0F5')
+        self.assertTrue(self.types.is_table('Dir'))
+        self.assertFalse(self.types.is_table('var'))
+        self.assertFalse(self.types.is_table('nothing'))
+        self.assertTrue(self.types.has_thumb('image'))
+        self.assertTrue(self.types.has_thumb('child image'))
+        self.assertFalse(self.types.has_thumb('Table'))
+        with self.assertRaises(KeyError):
+            self.types.row('nothing')
+
+    def test_encodings(self):
+        self.assertEqual(self.types.value_type('png'), ('image', 'bytes'))
+        self.assertEqual(self.types.value_type('zzz'), ('file', 'bytes'))
+        self.assertEqual(self.types.row('image').encoding, 'bytes')
+        self.assertEqual(self.types.row('script').encoding, 'utf-8')
+
+    def test_tags_and_theme(self):
+        self.assertEqual(len(self.types.tag_colours()), len(TAG_NAMES))
+        self.assertEqual(self.types.theme_entry('File'), {'tagName': 'f', 'tagBg': '#F8F8F8'})
+        self.assertIsNone(self.types.theme_entry('Nothing'))
+
+    def test_icons_and_handlers(self):
+        types = TypeRegistry(ROW_TYPES, TAG_NAMES, TAG_BG, TYPE_MAP, 
+                             {'Table': 'folder.png', 'image': 'file.png'})
+        opened = []
+        types.set_handler('Table', opened.append)
+        types.row('child Table').handler('d1')
+        self.assertEqual(opened, ['d1'])
+        self.assertEqual(types.row('child Table').icon, 'folder.png')
+        self.assertIsNone(types.row('var').icon)
+        self.assertIsNone(types.row('var').handler)
+
+    def test_payload_size(self):
+        self.assertEqual(payload_size({'rowtype': 'var', 'value': 'Grég'}), 5)
+        self.assertEqual(payload_size({'rowtype': 'image', 'value': '', 'size': 1234}), 1234)
+        self.assertEqual(payload_size({'rowtype': 'child Table', 'value': '3 items'}), 0)
+
+if __name__ == '__main__':
+    unittest.main()
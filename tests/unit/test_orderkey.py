@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+#  test_orderkey.py
+#
+
+'''
+The :class:`TestOrderKey` class is a unittest class.
+'''
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', '..', 'pysist'))
+from Pystore import ChildIndex, key_between, keys_between, even_keys
+
+
+class TestOrderKey(unittest.TestCase):
+
+    def test_key_between(self):
+        a = key_between(None, None)
+        b = key_between(a, None)
+        c = key_between(a, b)
+        d = key_between(None, a)
+        self.assertTrue(d < a < c < b)
+        self.assertRaises(ValueError, key_between, b, a)
+        self.assertRaises(ValueError, key_between, 'A0', None)
+
+    def test_same_gap(self):
+        low, high = 'A', 'B'
+        for x in range(500):
+            key = key_between(low, high)
+            self.assertTrue(low < key < high, (low, key, high))
+            self.assertFalse(key.endswith('0'))
+            high = key
+        self.assertLess(len(high), 120)
+
+    def test_keys_between(self):
+        keys = keys_between('V', 'W', 1000)
+        self.assertEqual(keys, sorted(set(keys)))
+        self.assertTrue('V' < keys[0] and keys[-1] < 'W')
+        self.assertLessEqual(max(len(key) for key in keys), 3)
+        self.assertEqual(keys_between(None, None, 0), [])
+
+    def test_even_keys(self):
+        keys = even_keys(100)
+        self.assertEqual(keys, sorted(set(keys)))
+        self.assertLessEqual(max(len(key) for key in keys), 2)
+        self.assertEqual(len(even_keys(1)[0]), 1)
+
+    def test_child_index_keys(self):
+        children = ChildIndex()
+        children.add('a', 'd1', key='V')
+        children.add('b', 'd1') # No key, sorts last
+        children.add('c', 'd1', key='K')
+        children.add('e', 'd1', key=key_between('K', 'V'))
+        self.assertEqual(children.children_of('d1'), ['c', 'e', 'a', 'b'])
+        self.assertIsNone(children.key_for('a')) # b has no key yet
+        changed = children.rebalance('d1')
+        self.assertEqual(len(changed), 4)
+        keys = [children.key_of(uid) for uid in children.children_of('d1')]
+        self.assertEqual(keys, sorted(keys))
+        self.assertEqual(children.children_of('d1'), ['c', 'e', 'a', 'b'])
+
+
+if __name__ == '__main__':
+    unittest.main()
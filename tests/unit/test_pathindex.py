@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+#  test_pathindex.py
+#
+
+'''
+The :class:`TestPathIndex` class is a unittest class.
+'''
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', '..', 'pysist'))
+from Pystore import PathIndex, split_path, join_path
+
+ITEMS = [('v1', 'd1', 'myName'), # A child before its parent
+         ('root', '', 'ROOT'), ('d1', 'root', 'Files'), ('d2', 'root', 'Images'),
+         ('f1', 'd1', 'myResume.txt'), ('i1', 'd2', 'photo'), ('i2', 'd2', 'photo')]
+
+
+class TestPathIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.paths = PathIndex(ITEMS)
+
+    def test_find_and_path_of(self):
+        self.assertEqual(self.paths.find('root/Files/myName'), 'v1')
+        self.assertEqual(self.paths.find('root'), 'root')
+        self.assertIsNone(self.paths.find('root/Nothing/myName'))
+        self.assertEqual(self.paths.path_of('f1'), 'root/Files/myResume.txt')
+
+    def test_same_names(self):
+        self.assertEqual(self.paths.find('root/Images/photo'), 'i1')
+        self.assertEqual(self.paths.find_all('root/Images/photo'), ['i1', 'i2'])
+        self.paths.remove('i1')
+        self.assertEqual(self.paths.find('root/Images/photo'), 'i2')
+
+    def test_under(self):
+        self.assertEqual(self.paths.under('root/Images'),
+                         [('root/Images/photo', 'i1'), ('root/Images/photo', 'i2')])
+        self.assertEqual(len(self.paths.under('root')), 6)
+        self.assertEqual(self.paths.under('root/Nothing'), [])
+
+    def test_rename_move_and_remove(self):
+        self.paths.rename('d1', 'Docs')
+        self.assertEqual(self.paths.find('root/Docs/myName'), 'v1')
+        self.assertIsNone(self.paths.find('root/Files/myName'))
+        self.paths.move('d1', 'd2')
+        self.assertEqual(self.paths.path_of('v1'), 'root/Images/Docs/myName')
+        self.assertEqual(sorted(self.paths.remove('d1')), ['d1', 'f1', 'v1'])
+        self.assertNotIn('v1', self.paths)
+        self.assertEqual(len(self.paths), 4)
+
+    def test_rekey(self):
+        self.paths.rekey('d1', 'd9')
+        self.assertEqual(self.paths.find('root/Files'), 'd9')
+        self.assertEqual(self.paths.path_of('v1'), 'root/Files/myName')
+        self.paths.remove('d9')
+        self.assertEqual(len(self.paths), 4)
+
+    def test_escaped_names(self):
+        self.paths.add('w1', 'd1', 'a/b\\c')
+        path = self.paths.path_of('w1')
+        self.assertEqual(path, 'root/Files/a\\/b\\\\c')
+        self.assertEqual(split_path(path), ['root', 'Files', 'a/b\\c'])
+        self.assertEqual(self.paths.find(path), 'w1')
+        self.assertEqual(join_path(split_path(path)), path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+#  test_prootfile.py
+#
+
+'''
+The :class:`TestProotFile` class is a unittest class.
+'''
+
+import os
+import sys
+import json
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', '..', 'pysist'))
+from Pystore import (write_proot, read_proot, load_proot, is_proot_file,
+                    json_to_proot, proot_to_json, node_item)
+
+ROOT_JSON = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        '..', '..', 'pysist', 'root.json')
+
+class TestProotFile(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.FILE = os.path.join(self.tmpdir.name, 'root.proot')
+        with open(ROOT_JSON) as json_file:
+            self.text = json_file.read()
+        self.treeroot = json.loads(self.text)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_round_trip(self):
+        write_proot(self.FILE, self.treeroot['nodes'], self.treeroot['prefs'])
+        self.assertTrue(is_proot_file(self.FILE))
+        nodes, prefs = read_proot(self.FILE)
+        self.assertEqual(list(nodes), list(self.treeroot['nodes']))
+        self.assertEqual(nodes, self.treeroot['nodes'])
+        self.assertEqual(prefs, self.treeroot['prefs'])
+        self.assertLess(os.path.getsize(self.FILE), len(self.text) / 2)
+
+    def test_odd_values(self):
+        nodes = {'xé': {'uid': 'xé', 'value': [None, -1, 2 ** 70, -0.5,
+                        {'nested': (1, 'two')}, '☃' * 200, True, False]}}
+        write_proot(self.FILE, nodes, {})
+        read = read_proot(self.FILE)[0]
+        nodes['xé']['value'][4]['nested'] = [1, 'two'] # tuples come back as lists
+        self.assertEqual(read, nodes)
+
+    def test_index(self):
+        write_proot(self.FILE, self.treeroot['nodes'], self.treeroot['prefs'])
+        proot = load_proot(self.FILE)
+        uids = [proot.index_entry(i)[0] for i in range(proot.count)]
+        self.assertEqual(uids, sorted(uid.encode() for uid in self.treeroot['nodes']))
+        uid, offset, length = proot.index_entry(uids.index(b'v1'))
+        self.assertEqual(proot.record_at(offset, length),
+                        ('v1', self.treeroot['nodes']['v1']))
+
+    def test_items(self):
+        write_proot(self.FILE, self.treeroot['nodes'], self.treeroot['prefs'])
+        items = [node_item(uid, node) for uid, node in self.treeroot['nodes'].items()]
+        self.assertEqual(list(load_proot(self.FILE).iter_items()), items)
+        # A file from before the items section has its records decoded
+        with open(self.FILE, 'r+b') as prootfile:
+            prootfile.seek(8)
+            prootfile.write(b'\0\0') # No F_ITEMS flag
+        proot = load_proot(self.FILE)
+        self.assertIsNone(proot.itemsOffset)
+        self.assertEqual(list(proot.iter_items()), items)
+
+    def test_json_conversion(self):
+        jsonFILE = os.path.join(self.tmpdir.name, 'root.json')
+        json_to_proot(ROOT_JSON, self.FILE)
+        proot_to_json(self.FILE, jsonFILE)
+        with open(jsonFILE) as json_file:
+            self.assertEqual(json_file.read(), self.text)
+
+if __name__ == '__main__':
+    unittest.main()
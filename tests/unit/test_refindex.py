@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+#  test_refindex.py
+#
+
+'''
+The :class:`TestRefIndex` class is a unittest class.
+'''
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', '..', 'pysist'))
+from Pystore import RefIndex, ref_target, retarget_ref
+
+
+class TestRefIndex(unittest.TestCase):
+
+    def test_ref_target(self):
+        self.assertEqual(ref_target('nodes:v1:value'), 'v1')
+        self.assertEqual(ref_target('tablename:uid'), 'uid')
+        for ref in ('', None, './path/to/file.txt', 'C:\\files\\a.txt',
+                    'http://localhost:8080/', 'nodes:'):
+            self.assertIsNone(ref_target(ref), ref)
+
+    def test_retarget_ref(self):
+        self.assertEqual(retarget_ref('nodes:v1:value', 'v1', 'v2'), 'nodes:v2:value')
+        self.assertEqual(retarget_ref('nodes:v3:value', 'v1', 'v2'), 'nodes:v3:value')
+
+    def test_set_and_referrers(self):
+        refs = RefIndex()
+        refs.set('a', 'v1')
+        refs.set('b', 'v1')
+        self.assertEqual(refs.referrers_of('v1'), {'a', 'b'})
+        refs.set('a', 'v2')
+        refs.discard('b')
+        self.assertEqual(refs.referrers_of('v1'), set())
+        self.assertNotIn('v1', refs.referrers)
+        self.assertEqual(refs.target_of('a'), 'v2')
+
+    def test_rekey(self):
+        refs = RefIndex()
+        refs.set('a', 'd1')
+        refs.set('d1', 'x')
+        refs.set('v1', 'v1') # Points at itself
+        self.assertEqual(refs.rekey('d1', 'd9'), {'a'})
+        self.assertEqual(refs.target_of('a'), 'd9')
+        self.assertEqual(refs.target_of('d9'), 'x')
+        self.assertEqual(refs.referrers_of('x'), {'d9'})
+        self.assertEqual(refs.rekey('v1', 'v2'), {'v2'})
+        self.assertEqual(refs.target_of('v2'), 'v2')
+        self.assertEqual(refs.referrers_of('v2'), {'v2'})
+        self.assertEqual(len(refs), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
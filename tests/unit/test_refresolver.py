@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+#  test_refresolver.py
+#
+
+'''
+The :class:`TestRefResolver` class is a unittest class.
+'''
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', '..', 'pysist'))
+from Pystore import RefResolver, RefCycleError, parse_ref
+
+
+class TestRefResolver(unittest.TestCase):
+
+    def setUp(self):
+        self.nodes = {'a': {'ref': 'nodes:b'}, 'b': {'ref': 'nodes:c:value'},
+                      'c': {'value': 'Greg', 'ref': ''},
+                      'v1': {'ref': 'nodes:v1:value', 'value': 'Bob'},
+                      'f1': {'ref': './path/to/file/myResume.txt'},
+                      'x': {'ref': 'nodes:y'}, 'y': {'ref': 'tablename:x'},
+                      'z': {'ref': 'nodes:x'}, 'd': {'ref': 'tablename:uid'}}
+        self.refs = RefResolver(self.nodes)
+
+    def test_parse_ref(self):
+        self.assertEqual(parse_ref('nodes:v1:value'), ('v1', 'value'))
+        self.assertEqual(parse_ref('tablename:uid'), ('uid', None))
+        self.assertIsNone(parse_ref('./path/to/file/myResume.txt'))
+
+    def test_resolve(self):
+        self.assertEqual(self.refs.resolve('a'), 'Greg')
+        self.assertEqual(self.refs.resolve('v1'), 'Bob') # Its own value
+        self.assertIsNone(self.refs.resolve('f1'))
+        self.assertIsNone(self.refs.resolve('c'))
+        self.assertEqual(sorted(self.refs.memo), ['a', 'b', 'v1'])
+
+    def test_invalidate(self):
+        self.refs.resolve('a')
+        self.refs.resolve('v1')
+        self.assertEqual(self.refs.invalidate('c'), {'a', 'b'})
+        self.assertEqual(sorted(self.refs.memo), ['v1'])
+        self.assertEqual(self.refs.invalidate('c'), set())
+        self.nodes['c']['value'] = 'Ann'
+        self.assertEqual(self.refs.resolve('a'), 'Ann')
+        self.assertEqual(self.refs.invalidate('a'), {'a'}) # b doesn't read a
+        self.assertIn('b', self.refs.memo)
+
+    def test_cycle(self):
+        with self.assertRaises(RefCycleError) as caught:
+            self.refs.resolve('z')
+        self.assertEqual(caught.exception.cycle, ['x', 'y'])
+        with self.assertRaises(RefCycleError) as again: # Remembered
+            self.refs.resolve('z')
+        self.assertIsNot(again.exception, caught.exception) # A new one each time
+        self.assertEqual(again.exception.cycle, ['x', 'y'])
+        self.assertRaises(RefCycleError, self.refs.resolve, 'y')
+        self.nodes['y']['ref'] = 'nodes:c'
+        self.assertEqual(self.refs.invalidate('y'), {'x', 'y', 'z'})
+        self.assertEqual(self.refs.resolve('z'), 'Greg')
+
+    def test_missing(self):
+        self.assertRaises(KeyError, self.refs.resolve, 'd')
+        self.nodes['uid'] = {'value': 1}
+        self.assertEqual(self.refs.invalidate('uid'), {'d'})
+        self.assertEqual(self.refs.resolve('d'), 1)
+
+    def test_attach(self):
+        self.refs.resolve('a')
+        self.assertIn('nodes:b', self.refs.parsed)
+        self.refs.attach({'n': {'value': 2}})
+        self.assertEqual((self.refs.parsed, self.refs.memo), ({}, {}))
+        self.assertIsNone(self.refs.resolve('n'))
+
+
+if __name__ == '__main__':
+    unittest.main()
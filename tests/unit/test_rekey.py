@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+#  test_rekey.py
+#
+
+'''
+The :class:`TestRekeyNode` class is a unittest class.
+'''
+
+import os
+import sys
+import json
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', '..', 'pysist'))
+from Pystore import ChildIndex, PathIndex, RefIndex, rekey_node, ref_target
+
+ROOT_JSON = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        '..', '..', 'pysist', 'root.json')
+
+
+class TestRekeyNode(unittest.TestCase):
+
+    def setUp(self):
+        with open(ROOT_JSON) as json_file:
+            self.nodes = json.load(json_file)['nodes']
+        self.nodes['i1']['ref'] = 'nodes:d1:text'
+        self.children = ChildIndex()
+        self.paths = PathIndex()
+        self.refs = RefIndex()
+        for uid, node in self.nodes.items():
+            self.children.add(uid, node['parent'])
+            self.paths.add(uid, node['parent'], node['text'])
+            self.refs.set(uid, ref_target(node.get('ref')))
+
+    def rekey(self, oldUID, newUID, partial=False):
+        return rekey_node(self.nodes, self.children, self.paths, self.refs, oldUID, newUID,
+                          partial)
+
+    def test_table(self):
+        kids, refs = self.rekey('d1', 'T1')
+        self.assertEqual(kids, ['f1', 'v1', 'f2'])
+        self.assertEqual(refs, {'i1'})
+        self.assertNotIn('d1', self.nodes)
+        self.assertEqual(self.nodes['T1']['uid'], 'T1')
+        self.assertEqual([self.nodes[uid]['parent'] for uid in kids], ['T1'] * 3)
+        self.assertEqual(self.nodes['i1']['ref'], 'nodes:T1:text')
+        self.assertEqual(self.children.children_of('root'), ['T1', 'd2'])
+        self.assertEqual(self.children.children_of('T1'), kids)
+        self.assertEqual(self.paths.find('root/Files/myName'), 'v1')
+        self.assertEqual(self.paths.find('root/Files'), 'T1')
+        self.assertEqual(self.refs.referrers_of('T1'), {'i1'})
+
+    def test_leaf_with_a_ref_at_itself(self):
+        kids, refs = self.rekey('v1', 'v9')
+        self.assertEqual((kids, refs), ([], {'v9'}))
+        self.assertEqual(self.nodes['v9']['ref'], 'nodes:v9:value')
+        self.assertEqual(self.children.index_of('v9'), 1)
+        self.assertEqual(self.refs.target_of('v9'), 'v9')
+
+    def test_nothing_changes_on_errors(self):
+        with self.assertRaises(ValueError):
+            self.rekey('d1', 'd2')
+        with self.assertRaises(KeyError):
+            self.rekey('nope', 'T1')
+        self.assertEqual(self.nodes['d1']['uid'], 'd1')
+        self.assertEqual(self.children.children_of('root'), ['d1', 'd2'])
+
+    def test_children_not_loaded(self):
+        # A part loaded root: d1 is in, its children are still to be read
+        nodes = {uid: self.nodes[uid] for uid in ('root', 'd1', 'd2')}
+        children = ChildIndex([(uid, node['parent']) for uid, node in nodes.items()])
+        with self.assertRaises(ValueError):
+            rekey_node(nodes, children, PathIndex(), RefIndex(), 'd1', 'T1', partial=True)
+        self.assertEqual(list(nodes), ['root', 'd1', 'd2'])
+        self.assertEqual(nodes['d1']['uid'], 'd1')
+        self.assertEqual(children.children_of('root'), ['d1', 'd2'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+#  test_rootloader.py
+#
+
+'''
+The :class:`TestRootLoader` class is a unittest class.
+'''
+
+import os
+import sys
+import time
+import threading
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', '..', 'pysist'))
+from Pystore import RootLoader
+
+
+class TestRootLoader(unittest.TestCase):
+
+    def collect(self, loader, timeout=5):
+        messages = []
+        end = time.time() + timeout
+        while not loader.is_done() and time.time() < end:
+            messages.extend(loader.results())
+            time.sleep(0.001)
+        return messages
+
+    def test_messages_in_order(self):
+        def produce(loader):
+            for x in range(500):
+                yield 'nodes', [(str(x), 'root')]
+            yield 'done', None
+        loader = RootLoader(produce, queueSize=8)
+        loader.start()
+        messages = self.collect(loader)
+        self.assertEqual(len(messages), 501)
+        self.assertEqual(messages[3], ('nodes', [('3', 'root')]))
+        self.assertEqual(messages[-1], ('done', None))
+
+    def test_error_is_a_message(self):
+        def produce(loader):
+            yield 'nodes', []
+            raise ValueError('bad root')
+        loader = RootLoader(produce)
+        loader.start()
+        messages = self.collect(loader)
+        self.assertEqual(messages[-1][0], 'error')
+        self.assertIsInstance(loader.error, ValueError)
+
+    def test_cancel_closes_the_producer(self):
+        closed = threading.Event()
+        def produce(loader):
+            try:
+                while True:
+                    yield 'nodes', []
+            finally:
+                closed.set()
+        loader = RootLoader(produce, queueSize=4)
+        loader.start()
+        loader.results(2)
+        loader.cancel()
+        loader.wait(5)
+        self.assertTrue(closed.is_set())
+        self.assertTrue(loader.finished.is_set())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+#  test_rootreader.py
+#
+
+'''
+The :class:`TestRootReader` class is a unittest class.
+'''
+
+import io
+import os
+import sys
+import json
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', '..', 'pysist'))
+from Pystore import iter_root, iter_root_batches
+
+ROOT_JSON = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        '..', '..', 'pysist', 'root.json')
+
+class TestRootReader(unittest.TestCase):
+
+    def setUp(self):
+        with open(ROOT_JSON) as json_file:
+            self.text = json_file.read()
+        self.treeroot = json.loads(self.text)
+
+    def read(self, text, chunkSize):
+        nodes = {}
+        others = {}
+        for key, uid, value in iter_root(io.StringIO(text), chunkSize=chunkSize):
+            if uid is None:
+                others[key] = value
+            else:
+                nodes[uid] = value
+        return nodes, others
+
+    def test_any_chunk_size(self):
+        for chunkSize in (1, 3, 50, 1 << 16):
+            nodes, others = self.read(self.text, chunkSize)
+            self.assertEqual(list(nodes), list(self.treeroot['nodes']))
+            self.assertEqual(nodes, self.treeroot['nodes'])
+            self.assertEqual(others, {'prefs': self.treeroot['prefs']})
+
+    def test_compact_and_numbers(self):
+        text = json.dumps({'fileFormat': 1.25, 'nodes': {}, 'count': 123456},
+                          separators=(',', ':'))
+        for chunkSize in (1, 2, 1 << 16):
+            nodes, others = self.read(text, chunkSize)
+            self.assertEqual(nodes, {})
+            self.assertEqual(others, {'fileFormat': 1.25, 'count': 123456})
+
+    def test_nodes_arrive_before_the_end(self):
+        reader = iter_root(io.StringIO(self.text), chunkSize=64)
+        key, uid, node = next(reader)
+        self.assertEqual((key, uid), ('nodes', 'root'))
+
+    def test_batches(self):
+        batches = list(iter_root_batches(ROOT_JSON, batchSize=4))
+        self.assertEqual([len(value) for key, value in batches[:-1]], [4, 4, 1])
+        self.assertEqual(batches[-1], ('prefs', self.treeroot['prefs']))
+
+    def test_truncated_file(self):
+        with self.assertRaises(ValueError):
+            self.read(self.text[:len(self.text) // 2], 64)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+#  test_rootwriter.py
+#
+
+'''
+The :class:`TestRootWriter` class is a unittest class.
+'''
+
+import os
+import sys
+import json
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', '..', 'pysist'))
+from Pystore import atomic_open, write_root
+
+ROOT_JSON = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        '..', '..', 'pysist', 'root.json')
+
+class TestRootWriter(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.FILE = os.path.join(self.tmpdir.name, 'root.json')
+        with open(ROOT_JSON) as json_file:
+            self.text = json_file.read()
+        self.treeroot = json.loads(self.text)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_same_as_json_dump(self):
+        write_root(self.FILE, self.treeroot['nodes'], self.treeroot['prefs'])
+        with open(self.FILE) as json_file:
+            self.assertEqual(json_file.read(), self.text)
+
+    def test_compact(self):
+        write_root(self.FILE, self.treeroot['nodes'], self.treeroot['prefs'],
+                   compact=True)
+        self.assertLess(os.path.getsize(self.FILE), len(self.text) * 0.75)
+        with open(self.FILE) as json_file:
+            self.assertEqual(json.load(json_file), self.treeroot)
+
+    def test_empty_nodes(self):
+        write_root(self.FILE, {}, {}, compact=False)
+        with open(self.FILE) as json_file:
+            self.assertEqual(json.load(json_file), {'nodes': {}, 'prefs': {}})
+
+    def test_failed_write_keeps_old_file(self):
+        write_root(self.FILE, self.treeroot['nodes'], self.treeroot['prefs'])
+        with self.assertRaises(RuntimeError):
+            with atomic_open(self.FILE) as outfile:
+                outfile.write('{"nodes": {')
+                raise RuntimeError('disk full')
+        with open(self.FILE) as json_file:
+            self.assertEqual(json_file.read(), self.text)
+        self.assertEqual(os.listdir(self.tmpdir.name), ['root.json'])
+
+if __name__ == '__main__':
+    unittest.main()
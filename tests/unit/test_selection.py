@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+#  test_selection.py
+#
+
+'''
+The :class:`TestSelection` class is a unittest class.
+'''
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', '..', 'pysist'))
+from selection import Selection
+from Pystore import ChildIndex
+
+
+def make_node(uid, parent, text, columns):
+    return {'uid': uid, 'parent': parent, 'text': text, 'columns': columns,
+            'isopen': False, 'tags': 'file_tag'}
+
+
+class TestSelection(unittest.TestCase):
+
+    def setUp(self):
+        self.nodes = {
+            'root': make_node('root', '', 'Root', ['Root', 'All']),
+            'f1': make_node('f1', 'root', 'myFile', ['Data', 'TEXT file']),
+            'f2': make_node('f2', 'root', 'other', ['Data']),
+            'f3': make_node('f3', 'root', 'third', ['Data']),
+            'd1': make_node('d1', 'root', 'table', ['1 item']),
+            'v1': make_node('v1', 'd1', 'var', ['Greg']),
+            }
+        children = ChildIndex([(uid, node['parent']) for uid, node in self.nodes.items()])
+        self.selection = Selection(self.nodes, children)
+
+    def test_set_skips_placeholders(self):
+        self.assertTrue(self.selection.set(('f1', '~placeholder~root', 'f2')))
+        self.assertEqual(self.selection.uids, ('f1', 'f2'))
+        self.assertIn('f2', self.selection)
+        self.assertFalse(self.selection.set(['f1', 'f2'])) # Unchanged
+
+    def test_reads_nodes_not_the_tree(self):
+        self.selection.set(['f1', 'f2'])
+        self.assertEqual([uid for uid, node in self.selection.nodes()], ['f1', 'f2'])
+        self.assertEqual(self.selection.item('f1')['values'], ['Data', 'TEXT file'])
+        self.assertEqual(self.selection.cell('f1', '#0'), 'myFile')
+        self.assertEqual(self.selection.cell('f1', '#2'), 'TEXT file')
+        self.assertEqual(self.selection.cell('f2', '#2'), '') # No such column
+
+    def test_cells_as_the_rows_show_them(self):
+        shown = {'f1': ['Edited', 'TEXT file']}
+        selection = Selection(self.nodes, self.selection.children,
+                              lambda uid, node: shown.get(uid, node['columns']))
+        self.assertEqual(selection.cell('f1', '#1'), 'Edited')
+        self.assertEqual(selection.item('f1')['values'], ['Edited', 'TEXT file'])
+        self.assertEqual(selection.cell('f2', '#1'), 'Data')
+
+    def test_range_from_the_anchor(self):
+        self.assertEqual(self.selection.range_to('f3'), ('f3', )) # No anchor yet
+        self.selection.set_anchor('f1')
+        self.assertEqual(self.selection.range_to('d1'), ('f1', 'f2', 'f3', 'd1'))
+        self.selection.set_anchor('f3')
+        self.assertEqual(self.selection.range_to('f1'), ('f3', 'f2', 'f1'))
+        self.assertEqual(self.selection.range_to('v1'), ('v1', )) # Another table
+        self.assertEqual(self.selection.range_to('~placeholder~d1'), ())
+
+    def test_attach_clears(self):
+        self.selection.set(['f1'])
+        self.selection.set_anchor('f1')
+        self.selection.attach({}, ChildIndex())
+        self.assertFalse(self.selection)
+        self.assertIsNone(self.selection.last())
+        self.assertIsNone(self.selection.anchor)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+#  test_sqlitepool.py
+#
+
+'''
+The :class:`TestSqliteManager` class is a unittest class.
+'''
+
+import os
+import sys
+import sqlite3
+import tempfile
+import threading
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', '..', 'pysist'))
+from Pystore import SqliteManager
+
+class TestSqliteManager(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db = SqliteManager(os.path.join(self.tmpdir.name, 'data', 'root.sqlite'))
+        self.db.write_script('CREATE TABLE t (id INTEGER PRIMARY KEY, v TEXT UNIQUE);').wait()
+
+    def tearDown(self):
+        self.db.close()
+        self.tmpdir.cleanup()
+
+    def count(self):
+        with self.db.reading() as conn:
+            return conn.execute('SELECT COUNT(*) FROM t').fetchone()[0]
+
+    def test_wal_mode(self):
+        with self.db.reading() as conn:
+            self.assertEqual(conn.execute('PRAGMA journal_mode').fetchone()[0], 'wal')
+
+    def test_writes_are_batched(self):
+        commits = self.db.commits
+        block = threading.Event()
+        self.db.submit(lambda conn: block.wait()) # Holds the writer up
+        writes = [self.db.write('INSERT INTO t (v) VALUES (?)', (str(x),))
+                  for x in range(2000)]
+        block.set()
+        self.assertEqual(writes[-1].wait(5), 1)
+        self.assertEqual(self.count(), 2000)
+        self.assertLessEqual(self.db.commits - commits, 3)
+
+    def test_failed_write_keeps_the_others(self):
+        block = threading.Event()
+        self.db.submit(lambda conn: block.wait())
+        first = self.db.write('INSERT INTO t (v) VALUES (?)', ('a',))
+        bad = self.db.write('INSERT INTO t (v) VALUES (?)', ('a',))
+        last = self.db.write('INSERT INTO t (v) VALUES (?)', ('b',))
+        block.set()
+        last.wait(5)
+        first.wait(5)
+        with self.assertRaises(sqlite3.IntegrityError):
+            bad.wait(5)
+        self.assertEqual(self.count(), 2)
+
+    def test_readers_are_read_only(self):
+        with self.db.reading() as conn:
+            with self.assertRaises(sqlite3.OperationalError):
+                conn.execute('INSERT INTO t (v) VALUES (?)', ('x',))
+
+    def test_readers_in_threads(self):
+        self.db.write_many('INSERT INTO t (v) VALUES (?)', 
+                           [(str(x),) for x in range(100)]).wait()
+        counts = []
+        threads = [threading.Thread(target=lambda: counts.append(self.count()))
+                   for x in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(counts, [100] * 8)
+        self.assertLessEqual(self.db.pool.qsize(), self.db.readers)
+
+if __name__ == '__main__':
+    unittest.main()
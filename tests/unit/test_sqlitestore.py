@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+#  test_sqlitestore.py
+#
+
+'''
+The :class:`TestSqliteRoot` class is a unittest class.
+'''
+
+import os
+import sys
+import json
+import sqlite3
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', '..', 'pysist'))
+from Pystore import SqliteRoot, node_item
+
+ROOT_JSON = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        '..', '..', 'pysist', 'root.json')
+
+class TestSqliteRoot(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.FILE = os.path.join(self.tmpdir.name, 'root.sqlite')
+        with open(ROOT_JSON) as json_file:
+            self.treeroot = json.load(json_file)
+        self.store = SqliteRoot(self.FILE)
+        self.store.import_root(self.treeroot['nodes'], self.treeroot['prefs']).wait()
+
+    def tearDown(self):
+        self.store.close()
+        self.tmpdir.cleanup()
+
+    def test_round_trip(self):
+        self.assertEqual(self.store.export_root(), self.treeroot)
+
+    def test_import_from_store(self):
+        # A copy of another open store, with changes it has not saved yet,
+        # written by the copy's writer thread from a snapshot
+        nodes = self.store.nodes
+        nodes['v1']['value'] = 'Wharpus'
+        nodes['n1'] = {'uid': 'n1', 'parent': 'd1', 'text': 'New'}
+        del nodes['f4']
+        copy = SqliteRoot(os.path.join(self.tmpdir.name, 'copy.sqlite'))
+        written = copy.import_root(nodes, self.treeroot['prefs'])
+        self.assertEqual(written.wait(), len(self.treeroot['nodes']))
+        self.assertEqual(copy.nodes['v1']['value'], 'Wharpus')
+        self.assertEqual(list(copy.nodes)[-1], 'n1')
+        self.assertNotIn('f4', copy.nodes)
+        self.assertEqual(copy.load_prefs(), self.treeroot['prefs'])
+        copy.close()
+
+    def test_prefs_loaded(self):
+        prefs = self.store.load_prefs()
+        self.assertEqual(prefs['topNodeUid'], 'root')
+
+    def test_nodes_read_on_demand(self):
+        nodes = self.store.nodes
+        self.assertEqual(nodes.loaded, {})
+        self.assertEqual(nodes['v1']['value'], 'Greg')
+        self.assertEqual(list(nodes.loaded), ['v1'])
+        self.assertIn('f4', nodes)
+        self.assertNotIn('nope', nodes)
+        self.assertEqual(list(nodes), list(self.treeroot['nodes']))
+        self.assertEqual(nodes.children_of('d2'), ['f3', 'i1', 'f4'])
+
+    def test_iter_records_keeps_nothing(self):
+        nodes = self.store.nodes
+        nodes['v1']['value'] = 'Wharpus'
+        records = dict(nodes.iter_records())
+        self.assertEqual(records['v1']['value'], 'Wharpus') # The loaded one
+        self.assertEqual(records['f4'], self.treeroot['nodes']['f4'])
+        self.assertEqual(list(nodes.loaded), ['v1'])
+
+    def test_iter_items_decodes_nothing(self):
+        nodes = self.store.nodes
+        items = list(nodes.iter_items())
+        self.assertEqual(items, [node_item(uid, node) for uid, node in
+                                self.treeroot['nodes'].items()])
+        self.assertEqual(nodes.loaded, {})
+        nodes['v1']['text'] = 'Wharpus'
+        del nodes['f1']
+        fresh = {item[0]: item for item in nodes.fresh_items(items)}
+        self.assertEqual(fresh['v1'][3], 'Wharpus')
+        self.assertNotIn('f1', fresh)
+        self.assertEqual(len(fresh), len(items) - 1)
+
+    def test_item_count_is_of_saved_rows(self):
+        nodes = self.store.nodes
+        saved = len(self.treeroot['nodes'])
+        nodes['n1'] = {'uid': 'n1', 'parent': 'root', 'text': 'New'}
+        self.assertEqual(len(nodes), saved + 1)
+        self.assertEqual(nodes.item_count(), saved) # Not of the unsaved dirty node
+        nodes.flush()
+        self.assertEqual(nodes.item_count(), saved + 1)
+
+    def test_old_file_gets_item_columns(self):
+        FILE = os.path.join(self.tmpdir.name, 'old.sqlite')
+        conn = sqlite3.connect(FILE)
+        with conn:
+            conn.execute('CREATE TABLE nodes (id INTEGER NOT NULL PRIMARY KEY, '
+                        'nid VARCHAR(64) NOT NULL UNIQUE, parent VARCHAR(64), json TEXT, '
+                        'nType VARCHAR(20), vType VARCHAR(20), dataRef VARCHAR(128))')
+            conn.executemany('INSERT INTO nodes (nid, parent, json) VALUES (?, ?, ?)',
+                            [(uid, node['parent'], json.dumps(node)) for uid, node in
+                            self.treeroot['nodes'].items()])
+        conn.close()
+        store = SqliteRoot(FILE)
+        self.assertEqual(list(store.nodes.iter_items()),
+                        [node_item(uid, node) for uid, node in self.treeroot['nodes'].items()])
+        store.close()
+
+    def test_save_one_node(self):
+        self.store.nodes['v1']['value'] = 'Wharpus'
+        self.assertEqual(self.store.save_node('v1'), 1)
+        self.store.close()
+        self.store = SqliteRoot(self.FILE)
+        self.assertEqual(self.store.nodes['v1']['value'], 'Wharpus')
+
+    def test_add_and_delete(self):
+        nodes = self.store.nodes
+        node = dict(self.treeroot['nodes']['v1'], uid='v2')
+        nodes['v2'] = node
+        del nodes['f1']
+        self.assertEqual(len(nodes), len(self.treeroot['nodes']))
+        self.store.save()
+        self.assertIn('v2', nodes)
+        self.assertNotIn('f1', nodes)
+        self.assertEqual(len(nodes), len(self.treeroot['nodes']))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+#  test_thumbcache.py
+#
+
+'''
+The :class:`TestThumbCache` and :class:`TestThumbLoader` classes are
+unittest classes.
+'''
+
+import os
+import sys
+import time
+import hashlib
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', '..', 'pysist'))
+from Pystore import BlobStore, ThumbCache, ThumbLoader
+from Pystore import thumbcache
+
+
+class TestThumbCache(unittest.TestCase):
+
+    def test_evicts_least_recently_used(self):
+        cache = ThumbCache(budget=300)
+        cache.put('a', 'A', 100)
+        cache.put('b', 'B', 100)
+        cache.put('c', 'C', 100)
+        self.assertEqual(cache.get('a'), 'A') # Now b is the oldest
+        cache.put('d', 'D', 100)
+        self.assertNotIn('b', cache)
+        self.assertEqual(sorted(cache.items), ['a', 'c', 'd'])
+        self.assertEqual(cache.used, 300)
+        self.assertEqual(cache.evicted, 1)
+
+    def test_replace_and_too_big(self):
+        cache = ThumbCache(budget=300)
+        cache.put('a', 'A', 100)
+        cache.put('a', 'A2', 250)
+        self.assertEqual(cache.used, 250)
+        self.assertFalse(cache.put('huge', 'H', 301))
+        self.assertEqual(cache.get('a'), 'A2')
+        self.assertIsNone(cache.get('huge'))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+
+class TestThumbLoader(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.blobs = BlobStore(os.path.join(self.tmpdir.name, 'data'))
+        self.loader = ThumbLoader(self.blobs, os.path.join(self.tmpdir.name, 'thumbs'),
+                                  size=16, workers=2)
+        self.path = os.path.join(self.tmpdir.name, 'pic.gif')
+        self.data = b'GIF89a not really'
+        with open(self.path, 'wb') as outfile:
+            outfile.write(self.data)
+
+    def tearDown(self):
+        self.loader.close()
+        self.tmpdir.cleanup()
+
+    def collect(self, count):
+        records = []
+        deadline = time.time() + 5
+        while len(records) < count and time.time() < deadline:
+            records.extend(self.loader.results())
+            time.sleep(0.01)
+        return records
+
+    def test_keyed_by_content(self):
+        dataRef = self.blobs.put_file(self.path)
+        self.loader.request('stored', dataRef=dataRef, ext='gif')
+        self.loader.request('file', path=self.path, ext='GIF')
+        records = {r['uid']: r for r in self.collect(2)}
+        key = hashlib.sha256(self.data).hexdigest()
+        self.assertEqual(records['stored']['key'], key)
+        self.assertEqual(records['file']['key'], key)
+        self.assertFalse(self.loader.is_busy())
+
+    def test_thumb_kept_on_disk(self):
+        key = hashlib.sha256(self.data).hexdigest()
+        self.loader.save(key, b'small png')
+        self.assertTrue(self.loader.has_thumb(key))
+        self.loader.request('file', path=self.path, ext='gif')
+        record = self.collect(1)[0]
+        self.assertEqual(record['data'], b'small png')
+
+    def test_bad_images_answered(self):
+        # Whatever a bad image raises, every request gets a record
+        self.loader.make_thumb = lambda uid, *args: {}[uid]
+        for x in range(4):
+            self.loader.request('bad{}'.format(x), path=self.path, ext='gif')
+        records = self.collect(4)
+        self.assertEqual(sorted(r['uid'] for r in records), ['bad0', 'bad1', 'bad2', 'bad3'])
+        self.assertTrue(all(r['error'] for r in records))
+        self.assertFalse(self.loader.is_busy())
+
+    def test_raw_without_pillow(self):
+        # Tk shrinks a whole png or gif, a worker then keeps what it made
+        key = hashlib.sha256(self.data).hexdigest()
+        with mock.patch.object(thumbcache, 'Image', None):
+            record = self.loader.make_thumb('file', None, self.path, 'gif')
+            self.assertEqual((record['data'], record['raw']), (self.data, True))
+            self.assertIsNotNone(self.loader.make_thumb('jpg', None, self.path, 'jpg')['error'])
+            self.loader.maxRawBytes = len(self.data) - 1
+            self.assertIsNotNone(self.loader.make_thumb('big', None, self.path, 'gif')['error'])
+        self.loader.keep(key, b'small png')
+        deadline = time.time() + 5
+        while not self.loader.has_thumb(key) and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertTrue(self.loader.has_thumb(key))
+        self.assertFalse(self.loader.is_busy())
+
+    def test_missing_file(self):
+        self.loader.request('gone', path=os.path.join(self.tmpdir.name, 'gone.png'),
+                            ext='png')
+        record = self.collect(1)[0]
+        self.assertIsNotNone(record['error'])
+        self.assertIsNone(self.loader.ref_key('not a ref'))
+
+
+if __name__ == '__main__':
+    unittest.main()
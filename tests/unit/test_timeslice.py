@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+#  test_timeslice.py
+#
+
+'''
+The :class:`TestSliceQueue` class is a unittest class.
+'''
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', '..', 'pysist'))
+from timeslice import SliceQueue
+
+
+class FakeClock:
+    # Every job "takes" step seconds
+
+    def __init__(self, step):
+        self.now = 0.0
+        self.step = step
+
+    def __call__(self):
+        return self.now
+
+    def job(self, done, x):
+        self.now += self.step
+        done.append(x)
+
+
+class TestSliceQueue(unittest.TestCase):
+
+    def test_run_all_keeps_order(self):
+        jobs = SliceQueue()
+        done = []
+        for x in range(10):
+            jobs.put(done.append, x)
+        jobs.run_all()
+        self.assertEqual(done, list(range(10)))
+        self.assertFalse(jobs)
+
+    def test_jobs_added_by_jobs_run(self):
+        jobs = SliceQueue()
+        done = []
+        jobs.put(lambda: jobs.put(done.append, 'child'))
+        jobs.run_all()
+        self.assertEqual(done, ['child'])
+
+    def test_slice_stays_near_budget(self):
+        clock = FakeClock(0.001) # 1 ms a job, 16 jobs fit a slice
+        jobs = SliceQueue(budgetMs=16, chunk=4, clock=clock)
+        done = []
+        for x in range(1000):
+            jobs.put(clock.job, done, x)
+        self.assertTrue(jobs.run_slice())
+        self.assertLess(len(done), 40)
+        while jobs.run_slice():
+            pass
+        self.assertEqual(done, list(range(1000)))
+        self.assertEqual(jobs.chunk, 8) # Half the budget
+
+    def test_chunk_grows_for_fast_jobs(self):
+        clock = FakeClock(0.00001)
+        jobs = SliceQueue(budgetMs=16, chunk=10, maxChunk=400, clock=clock)
+        done = []
+        for x in range(5000):
+            jobs.put(clock.job, done, x)
+        jobs.run_slice()
+        self.assertEqual(jobs.chunk, 400)
+
+    def test_chunk_shrinks_for_slow_jobs(self):
+        clock = FakeClock(0.01)
+        jobs = SliceQueue(budgetMs=16, chunk=100, minChunk=1, clock=clock)
+        done = []
+        for x in range(100):
+            jobs.put(clock.job, done, x)
+        jobs.run_slice()
+        self.assertEqual(len(done), 100) # The first chunk is too big
+        self.assertEqual(jobs.chunk, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+#  test_virtualtree.py
+#
+
+'''
+The :class:`TestTreeRows` class is a unittest class.
+'''
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', '..', 'pysist'))
+from virtualtree import TreeRows
+
+class TestTreeRows(unittest.TestCase):
+
+    def setUp(self):
+        self.rows = TreeRows()
+        self.rows.insert('', 0, 'root', open=True)
+        self.rows.insert('root', 'end', 'd1', open=True)
+        self.rows.insert('d1', 'end', 'f1')
+        self.rows.insert('root', 'end', 'd2')
+        self.rows.insert('d2', 'end', 'f3')
+        self.rows.insert('d2', 'end', 'i1')
+
+    def test_only_shown_rows(self):
+        self.assertEqual(self.rows.get_rows(), ['root', 'd1', 'f1', 'd2'])
+        self.assertFalse(self.rows.dirty) # All appended without a rebuild
+
+    def test_open_and_close(self):
+        self.rows.set_open('d2', True)
+        self.assertEqual(self.rows.get_rows(), ['root', 'd1', 'f1', 'd2', 'f3', 'i1'])
+        self.rows.set_open('d1', False)
+        self.assertEqual(self.rows.get_rows(), ['root', 'd1', 'd2', 'f3', 'i1'])
+        self.rows.set_open('root', False)
+        self.assertEqual(self.rows.get_rows(), ['root'])
+        self.rows.set_open('root', True)
+        self.assertEqual(self.rows.get_rows(), ['root', 'd1', 'd2', 'f3', 'i1'])
+
+    def test_insert_in_the_middle(self):
+        self.rows.insert('d1', 'end', 'v1')
+        self.rows.insert('root', 0, 'd0')
+        self.assertEqual(self.rows.get_rows(), ['root', 'd0', 'd1', 'f1', 'v1', 'd2'])
+
+    def test_delete(self):
+        self.rows.set_open('d2', True)
+        self.rows.delete('d2')
+        self.assertEqual(self.rows.get_rows(), ['root', 'd1', 'f1'])
+        self.assertNotIn('i1', self.rows)
+        self.assertEqual(len(self.rows), 3)
+
+    def test_move(self):
+        self.rows.move('d2', 'd1', 0)
+        self.assertEqual(self.rows.get_rows(), ['root', 'd1', 'd2', 'f1'])
+        self.assertEqual(self.rows.items['i1']['depth'], 3)
+
+    def test_big_table(self):
+        for x in range(200000):
+            self.rows.insert('d1', 'end', 'r{}'.format(x))
+        self.assertEqual(len(self.rows.get_rows()), 200004)
+        self.rows.set_open('d1', False)
+        self.assertEqual(self.rows.get_rows(), ['root', 'd1', 'd2'])
+
+    def test_shown_index(self):
+        self.assertEqual(self.rows.shown_index('f1'), 2)
+        self.assertEqual(self.rows.shown_index('i1'), 3) # Under closed d2
+        self.rows.set_open('root', False)
+        self.assertEqual(self.rows.shown_index('f1'), 0)
+
+    def test_span(self):
+        self.assertEqual(self.rows.span('d2', 'd1'), ['d1', 'f1', 'd2'])
+        self.assertEqual(self.rows.span('f1', 'f1'), ['f1'])
+
+if __name__ == '__main__':
+    unittest.main()